@@ -10,19 +10,26 @@ Implementation Details:
 
 1. Context Management:
    - Uses ContextManager to maintain dynamic context from analysis results
+   - Context is kept per (user, repository); the user comes from the bearer token
+     (anonymous without one) and the repository from repo_url, defaulting to the
+     repository the user analyzed most recently
    - Combines base context (platform capabilities) with dynamic context (current analysis)
+   - Retrieves only the top-k chunks relevant to the question from a FAISS index
+     (see utils/vector_store.py), packed into CHAT_CONTEXT_TOKEN_BUDGET tokens
    - Tracks data freshness (24-hour validity) and suggests re-analysis when needed
    - Supports multiple analysis types: code quality, security, and GitHub insights
 
 2. Chat Flow:
    a. Request Processing:
-      - Accepts questions and optional conversation_id
+      - Accepts questions, optional conversation_id and optional repo_url
       - Retrieves relevant context for the question
       - Checks data freshness
    
    b. Response Generation:
       - Uses GPT-4 with context-aware system prompt
-      - Includes conversation history (when available)
+      - Includes conversation history: a running summary of older turns plus the
+        most recent turns that fit CHAT_HISTORY_TOKEN_BUDGET (utils/conversation_store.py)
+      - Older turns are summarized in the background after the answer is sent
       - Generates natural language responses
       - Provides suggested actions based on context
    
@@ -32,11 +39,17 @@ Implementation Details:
       - data_fresh: Indicates if analysis data is current
       - suggested_actions: Relevant next steps for the user
 
+   d. Streaming (POST /chat/stream):
+      - Same request body as /chat, answered as server-sent events
+      - `token` events carry answer fragments as GPT-4 generates them
+      - A final `done` event carries conversation_id, data_fresh and suggested_actions
+
 3. Context Updates:
    - Endpoint: POST /update-context
    - Accepts analysis_type and analysis data
-   - Updates dynamic context file
-   - Maintains separate sections for different analysis types
+   - Upserts the analysis section in the context store for (user, repoUrl)
+   - Maintains separate sections for different analysis types, so concurrent
+     updates from different analyses never overwrite each other
    - Preserves historical data while marking stale entries
 
 4. Error Handling:
@@ -94,7 +107,8 @@ Performance Considerations:
 -------------------------
 
 1. Token Usage:
-   - Context is filtered to relevant sections
+   - Context is filtered to relevant sections via embedding retrieval,
+     so prompt size does not grow with scan size
    - System prompt is optimized for clarity
    - Response length is capped at 500 tokens
    - Temperature set to 0.7 for balanced creativity
@@ -103,6 +117,9 @@ Performance Considerations:
    - Async implementation for better scalability
    - Efficient context retrieval
    - Cached base context
+   - Opening questions are answered from an answer cache keyed by context version
+     and normalized question, with an embedding-similarity tier for paraphrases
+     (utils/answer_cache.py); new analysis data invalidates it
    - Optimized prompt structure
 
 3. Resource Management:
@@ -130,30 +147,39 @@ Future Improvements:
 -------------------
 
 1. Planned Features:
-   - Conversation history persistence
-   - Context-aware follow-up questions
-   - Multi-repository support
    - Custom analysis types
 
 2. Technical Debt:
-   - Implement conversation history
    - Add rate limiting
    - Improve error messages
    - Add context compression
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncIterator
+from dataclasses import dataclass
+from functools import partial
+import asyncio
+import json
 from ..utils.context_manager import context_manager
-from openai import AsyncOpenAI
+from ..utils.conversation_store import Conversation, conversation_store
+from ..utils.answer_cache import CacheLookup, answer_cache
+from ..utils.openai_client import get_openai_client
+from ..utils.vector_store import embed_texts
 from ..core.config import settings
+from ..core.security import get_optional_user
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
     question: str
     conversation_id: Optional[str] = None
+    repo_url: Optional[str] = None  # Defaults to the user's most recently analyzed repo
 
 class ChatResponse(BaseModel):
     answer: str
@@ -161,51 +187,158 @@ class ChatResponse(BaseModel):
     data_fresh: bool
     suggested_actions: Optional[list[str]] = None
 
+@dataclass
+class _PreparedChat:
+    messages: list[dict]
+    context: str
+    is_data_fresh: bool
+    conversation: Conversation
+    cache_lookup: Optional[CacheLookup] = None
+
+    @property
+    def cached_answer(self) -> Optional[str]:
+        return self.cache_lookup.answer if self.cache_lookup else None
+
+# Keeps fire-and-forget summarization tasks alive until they finish
+_background_tasks: set[asyncio.Task] = set()
+
+# Cached answers are dropped as soon as a repository's analysis data changes
+context_manager.add_update_listener(answer_cache.invalidate)
+
+async def _prepare_chat(request: ChatRequest, user: dict, client: "AsyncOpenAI") -> _PreparedChat:
+    """Build the prompt messages for a chat request and report data freshness.
+
+    Opening questions (no earlier turns) are looked up in the answer cache first;
+    on a hit no context is retrieved and no messages are built.
+    """
+    repo_url = await context_manager.resolve_repo(user["id"], request.repo_url)
+    is_data_fresh = await context_manager.is_data_fresh(user["id"], repo_url)
+    conversation = await conversation_store.get_or_create(request.conversation_id, user["id"], repo_url)
+
+    # Follow-up answers depend on the history, so only opening questions are cached
+    cache_lookup = None
+    if not conversation.turns:
+        version = await context_manager.get_version(user["id"], repo_url)
+        cache_lookup = await answer_cache.lookup(
+            (user["id"], repo_url, version),
+            request.question,
+            embedder=partial(embed_texts, client, settings.EMBEDDING_MODEL)
+        )
+        if cache_lookup.answer is not None:
+            return _PreparedChat([], "", is_data_fresh, conversation, cache_lookup)
+
+    # Get context for the question from the user's repository, reusing the cache lookup's embedding
+    context = await context_manager.get_context_for_question(
+        request.question, user["id"], repo_url,
+        question_vector=cache_lookup.vector if cache_lookup else None
+    )
+
+    # Prepare the conversation: context, then the history window, then the new question
+    messages = [
+        {"role": "system", "content": f"You are a helpful code analysis assistant. Use this context to answer questions:\n\n{context}"},
+        *conversation_store.history_messages(conversation),
+        {"role": "user", "content": request.question}
+    ]
+
+    return _PreparedChat(messages, context, is_data_fresh, conversation, cache_lookup)
+
+async def _record_turn(prepared: _PreparedChat, question: str, answer: str, client: "AsyncOpenAI") -> None:
+    """Store the exchange, cache opening answers and summarize older turns in the background."""
+    if prepared.cache_lookup is not None and prepared.cached_answer is None and answer:
+        answer_cache.put(prepared.cache_lookup, answer)
+    await conversation_store.append(prepared.conversation, question, answer)
+    task = asyncio.create_task(conversation_store.compact(prepared.conversation, client))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
 @router.post("/chat")
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest, user: dict = Depends(get_optional_user),
+               client=Depends(get_openai_client)) -> ChatResponse:
     """Handle chat requests with context-aware responses."""
     try:
-        # Get context for the question
-        context = await context_manager.get_context_for_question(request.question)
-        is_data_fresh = await context_manager.is_data_fresh()
-
-        # Initialize OpenAI client
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-
-        # Prepare the conversation
-        messages = [
-            {"role": "system", "content": f"You are a helpful code analysis assistant. Use this context to answer questions:\n\n{context}"},
-            {"role": "user", "content": request.question}
-        ]
-
-        # Add conversation history if available
-        if request.conversation_id:
-            # TODO: Implement conversation history retrieval
-            pass
-
-        # Get response from OpenAI
-        response = await client.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            max_tokens=500,
-            temperature=0.7
-        )
-
-        answer = response.choices[0].message.content
+        prepared = await _prepare_chat(request, user, client)
+
+        answer = prepared.cached_answer
+        if answer is None:
+            # Get response from OpenAI
+            response = await client.chat.completions.create(
+                model="gpt-4",
+                messages=prepared.messages,
+                max_tokens=500,
+                temperature=0.7
+            )
+            answer = response.choices[0].message.content
+        await _record_turn(prepared, request.question, answer, client)
 
         # Generate suggested actions based on the question and context
-        suggested_actions = await _generate_suggested_actions(request.question, context, is_data_fresh)
+        suggested_actions = await _generate_suggested_actions(request.question, prepared.context, prepared.is_data_fresh)
 
         return ChatResponse(
             answer=answer,
-            conversation_id=request.conversation_id or "new",
-            data_fresh=is_data_fresh,
+            conversation_id=prepared.conversation.id,
+            data_fresh=prepared.is_data_fresh,
             suggested_actions=suggested_actions
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, user: dict = Depends(get_optional_user),
+                      client=Depends(get_openai_client)) -> StreamingResponse:
+    """Stream a chat answer as server-sent events.
+
+    Emits `token` events ({"content": ...}) as the completion is generated, then a
+    single `done` event carrying conversation_id, data_fresh and suggested_actions.
+    Errors after the stream has started are reported as an `error` event.
+    """
+    try:
+        prepared = await _prepare_chat(request, user, client)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            answer_parts = []
+            if prepared.cached_answer is not None:
+                answer_parts.append(prepared.cached_answer)
+                yield _sse_event("token", {"content": prepared.cached_answer})
+            else:
+                stream = await client.chat.completions.create(
+                    model="gpt-4",
+                    messages=prepared.messages,
+                    max_tokens=500,
+                    temperature=0.7,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        answer_parts.append(token)
+                        yield _sse_event("token", {"content": token})
+
+            await _record_turn(prepared, request.question, "".join(answer_parts), client)
+            suggested_actions = await _generate_suggested_actions(request.question, prepared.context, prepared.is_data_fresh)
+            yield _sse_event("done", {
+                "conversation_id": prepared.conversation.id,
+                "data_fresh": prepared.is_data_fresh,
+                "suggested_actions": suggested_actions
+            })
+        except Exception as e:
+            yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 async def _generate_suggested_actions(question: str, context: str, is_data_fresh: bool) -> list[str]:
     """Generate suggested actions based on the question and context."""
     actions = []
@@ -228,10 +361,11 @@ async def _generate_suggested_actions(question: str, context: str, is_data_fresh
     return actions
 
 @router.post("/update-context")
-async def update_context(analysis_type: str, data: Dict[str, Any]) -> Dict[str, str]:
+async def update_context(analysis_type: str, data: Dict[str, Any],
+                         user: dict = Depends(get_optional_user)) -> Dict[str, str]:
     """Update the chatbot context with new analysis data."""
     try:
-        await context_manager.update_context(analysis_type, data)
+        await context_manager.update_context(analysis_type, data, user["id"])
         return {"status": "success", "message": "Context updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -10,6 +10,8 @@ How it works:
     1. Smart Repository Analysis:
         - Clones only the main branch of the provided GitHub repository
         - Uses intelligent file sampling to focus on the most important files
+        - Indexes the checkout once (utils/repo_manifest.py); sampling and duplicate detection
+          read the index instead of walking the tree
         - Processes files in parallel for faster analysis
         - Supports private repositories via Personal Access Token (PAT)
 
@@ -26,19 +28,26 @@ How it works:
             * Files in excluded directories (dist/, build/, node_modules/, etc.)
 
     3. Token-Optimized Analysis Pipeline:
-        - Smart code truncation:
-            * Preserves important parts (imports, class/function definitions, key implementations)
-            * Maximum 800 characters per file
-            * Intelligent truncation that keeps both start and end of files
+        - Syntax-aware code condensation (utils/code_condenser.py):
+            * Keeps lint-flagged and TODO regions, imports, signatures and docstrings
+            * Parses Python with ast, JS/TS with a lightweight tokenizer
+            * Measured with tiktoken against AI_BATCH_TOKEN_BUDGET per OpenAI call
+            * Whole lines only, with an elision marker for each gap
         - Efficient batch processing:
-            * Processes maximum 2 files per API call
+            * Packs as many files per API call as AI_BATCH_TOKEN_BUDGET allows at AI_MIN_FILE_TOKENS
+              each, sharing the budget; openaiBatchSize optionally caps files per call
             * Uses concise prompts and system messages
-            * Optimized token limits (200 for single file, 500 for batch)
+            * Optimized token limit (500 per call)
         - Parallel analysis:
             * Linting (pylint for Python, eslint for JS/TS)
-            * Code complexity metrics
+            * Code complexity metrics (utils/code_metrics.py): per-function cyclomatic complexity,
+              maintainability index and docstring coverage, computed in a process pool and
+              memoized by git blob hash so unchanged files are not re-analyzed
             * Documentation coverage
             * TODO detection
+            * Near-duplicate detection over the whole repository (utils/duplicate_detector.py):
+              MinHash signatures of normalized token shingles with LSH banding, for files and
+              blocks of lines, in roughly linear time
 
     4. AI-Powered Insights:
         - Token-efficient prompts and responses
@@ -66,7 +75,17 @@ Response Structure:
         "issues": {
             "linting": int,                  # Total linting issues
             "todos": int,                    # Total TODO comments
-            "files_without_docs": int        # Files missing documentation
+            "files_without_docs": int,       # Files missing documentation
+            "duplicate_files": List[str],    # Files with a near-duplicate elsewhere in the repo
+            "total_duplicate_files": int,
+            "duplicate_groups": List[dict],  # Clusters of near-duplicate files with similarity
+            "duplicate_blocks": List[dict]   # Copied regions: ["path:start-end", ...], similarity
+        },
+        "complexity": {
+            "average": float,                # Mean cyclomatic complexity per function
+            "maintainability_index": float,  # Mean maintainability index (0-100)
+            "docstring_coverage": float,     # Mean share of documented functions (0-1)
+            "most_complex": List[dict]       # Top 5 functions: file, function, line, complexity
         },
         "top_issues": [                      # AI analysis of top 5 problematic files
             {
@@ -96,12 +115,12 @@ Usage Example:
         "repoUrl": "https://github.com/user/repo",
         "patToken": "optional_github_token",
         "maxFilesPerLanguage": 30,          # Optional: Limit files per language
-        "openaiBatchSize": 2                # Optional: Files per OpenAI call (default: 2)
+        "openaiBatchSize": 2                # Optional: At most this many files per OpenAI call
     }
 
 Performance & Cost Optimization:
     1. Token Usage:
-        - Smart code truncation (800 chars max per file)
+        - Syntax-aware condensation to a per-batch token budget
         - Concise prompts and system messages
         - Optimized batch sizes (max 2 files per call)
         - Efficient response parsing
@@ -111,6 +130,8 @@ Performance & Cost Optimization:
         - Smart sampling reduces analysis time
         - Parallel processing improves throughput
         - Async I/O minimizes waiting time
+        - A scan-scoped FileStore (utils/file_store.py) stats and reads each file once and
+          shares zero-copy views between sampling, metrics and the AI step
         - Early filtering of irrelevant files
 
     3. OpenAI API Usage:
@@ -202,24 +223,31 @@ This FastAPI router provides a robust POST endpoint `/api/scan/code_quality.api`
     - Adjustable timeouts
 
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
 import tempfile
 import shutil
 import os
 import subprocess
 import json
-from openai import AsyncOpenAI
 from ..core.config import settings
+from ..core.monitoring import observe_phases, record_exit, track_scan, track_subprocess
+from ..core.tracing import span
 import math
 import concurrent.futures
 import time
 import asyncio
 from collections import defaultdict
-import aiofiles
-import backoff
-from functools import lru_cache
+from functools import lru_cache, wraps
+from ..utils.code_condenser import condense_code
+from ..utils.code_metrics import metrics_engine
+from ..utils.file_store import FileStore
+from ..utils.openai_client import get_openai_client
+from ..utils.repo_manifest import FileEntry, RepoManifest, manifest_cache
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 router = APIRouter()
 
@@ -227,7 +255,7 @@ class CodeQualityRequest(BaseModel):
     repoUrl: str
     patToken: Optional[str] = None
     maxFilesPerLanguage: Optional[int] = 30
-    openaiBatchSize: Optional[int] = 2
+    openaiBatchSize: Optional[int] = None  # Upper limit on files per OpenAI call; the token budget decides otherwise
 
 class FileInsight(BaseModel):
     file: str
@@ -257,7 +285,9 @@ class CodeQualityResponse(BaseModel):
 # Helper: Run a subprocess and return output or None
 def run_subprocess(cmd, cwd=None):
     try:
-        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=120)
+        with track_subprocess(os.path.basename(cmd[0])) as current:
+            result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=120)
+            record_exit(current, result.returncode)
         if result.returncode == 0:
             return result.stdout
         else:
@@ -267,63 +297,6 @@ def run_subprocess(cmd, cwd=None):
         print(f"Subprocess error: {e}")
         return None
 
-# Helper: Truncate code for OpenAI
-def truncate_code(code, max_chars=800):
-    """Truncate code to save tokens while preserving important parts."""
-    if len(code) <= max_chars:
-        return code
-    
-    # Try to keep the first part (usually imports and class/function definitions)
-    # and the last part (usually important implementation)
-    first_part = code[:max_chars//2]
-    last_part = code[-max_chars//2:]
-    
-    # Find a good breaking point in the middle
-    mid_point = max_chars//2
-    while mid_point < len(code) - max_chars//2 and code[mid_point] != '\n':
-        mid_point += 1
-    
-    return first_part + "\n# ... (code truncated) ...\n" + last_part
-
-# Helper: Call OpenAI for file insight
-async def get_openai_insight(client, file_path, code, category):
-    # More concise prompt
-    prompt = f"Review {file_path} for {category}. Give:\n1. 1-line summary\n2. 2 key suggestions\n3. Code fix if needed\n\nCode:\n{truncate_code(code, 800)}"
-    try:
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Code reviewer. Be concise."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=200,  # Reduced from 300
-            temperature=0.2
-        )
-        text = response.choices[0].message.content
-        summary, suggestions, before, after = None, [], None, None
-        for line in text.split('\n'):
-            if line.lower().startswith(('summary:', '1.')):
-                summary = line.split(':',1)[1].strip() if ':' in line else line[2:].strip()
-            elif line.lower().startswith(('suggestion', '2.')):
-                suggestion = line.split(':',1)[1].strip() if ':' in line else line[2:].strip()
-                if suggestion:
-                    suggestions.append(suggestion)
-            elif line.lower().startswith(('before:', '3.')):
-                before = line.split(':',1)[1].strip() if ':' in line else line[2:].strip()
-            elif line.lower().startswith('after:'):
-                after = line[6:].strip()
-        if not summary:
-            summary = "No summary available."
-        if not suggestions:
-            suggestions = ["No suggestions available."]
-        suggestions = suggestions[:2]
-        if len(suggestions) < 2:
-            suggestions += ["No suggestions available."] * (2 - len(suggestions))
-        return summary, suggestions, before, after
-    except Exception as e:
-        print(f"OpenAI error for {file_path}: {e}")
-        return "No summary available.", ["No suggestions available.", "No suggestions available."], None, None
-
 def score_file_importance(file_path: str, file_size: int) -> float:
     """Score a file based on its importance for analysis."""
     score = 0.0
@@ -346,44 +319,41 @@ def score_file_importance(file_path: str, file_size: int) -> float:
     
     return score
 
-async def get_relevant_files(temp_dir: str, max_files_per_lang: int) -> Dict[str, List[str]]:
+async def get_relevant_files(store: FileStore, manifest: RepoManifest, max_files_per_lang: int) -> Dict[str, List[str]]:
     """Get the most relevant files for analysis using smart sampling."""
     files_by_lang = defaultdict(list)
     
-    async def process_file(root: str, file: str) -> None:
-        if any(skip in root.lower().split(os.sep) for skip in {"dist", "build", ".venv", "node_modules", "vendor", "test", "tests", "migrations"}):
+    def process_file(entry: FileEntry) -> None:
+        rel_path = entry.path
+        if any(skip in rel_path.lower().split("/")[:-1] for skip in {"dist", "build", ".venv", "node_modules", "vendor", "test", "tests", "migrations"}):
             return
             
-        if not file.endswith(('.py', '.js', '.ts')):
+        if not rel_path.endswith(('.py', '.js', '.ts')):
             return
             
-        file_path = os.path.join(root, file)
-        try:
-            # Quick check for file size
-            if os.path.getsize(file_path) > 100_000:
-                return
-                
-            # Check for generated files
-            async with aiofiles.open(file_path, 'r') as f:
-                head = (await f.read(300)).lower()
-                if any(pat in head for pat in {"generated", "// generated by", "// <auto-generated>", "/* auto-generated */"}):
-                    return
-                    
-            rel_path = os.path.relpath(file_path, temp_dir)
-            lang = os.path.splitext(file)[1][1:]  # Get extension without dot
-            score = score_file_importance(rel_path, os.path.getsize(file_path))
-            files_by_lang[lang].append((rel_path, score))
+        # Quick check for file size (from the manifest, no extra stat)
+        if entry.size > 100_000:
+            return
             
-        except Exception:
-            pass
-
-    # Process files concurrently
-    tasks = []
-    for root, _, files in os.walk(temp_dir):
-        for file in files:
-            tasks.append(process_file(root, file))
+        # Check for generated files; the read is kept for the analysis stages
+        if entry.generated:
+            return
+        head = store.head(rel_path, 300)
+        if head is None:
+            return
+        head = str(head, 'utf-8', 'ignore').lower()
+        if any(pat in head for pat in {"generated", "// generated by", "// <auto-generated>", "/* auto-generated */"}):
+            return
+                
+        lang = entry.extension[1:]  # Get extension without dot
+        score = score_file_importance(rel_path.replace("/", os.sep), entry.size)
+        files_by_lang[lang].append((rel_path, score))
+
+    def sample():
+        for entry in manifest.source_files(include_vendored=True):
+            process_file(entry)
     
-    await asyncio.gather(*tasks)
+    await asyncio.to_thread(sample)
     
     # Select top N files per language
     selected_files = {}
@@ -393,25 +363,45 @@ async def get_relevant_files(temp_dir: str, max_files_per_lang: int) -> Dict[str
     
     return selected_files
 
-@backoff.on_exception(backoff.expo, Exception, max_tries=3)
-async def batch_openai_insight(client: AsyncOpenAI, files: List[Tuple[str, str]], category: str) -> List[Dict]:
-    """Get OpenAI insights for multiple files in a single call."""
+def retry_with_backoff(func):
+    """backoff.on_exception(backoff.expo, Exception, max_tries=3), importing backoff on the first call."""
+    retrying = None
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        nonlocal retrying
+        if retrying is None:
+            import backoff
+            retrying = backoff.on_exception(backoff.expo, Exception, max_tries=3)(func)
+        return await retrying(*args, **kwargs)
+    return wrapper
+
+@retry_with_backoff
+async def batch_openai_insight(client: "AsyncOpenAI", files: List[Tuple[str, str]], category: str,
+                               flagged_lines: Optional[Dict[str, List[int]]] = None,
+                               max_batch_size: Optional[int] = None) -> List[Dict]:
+    """Get OpenAI insights for files, packing as many into each call as the token budget allows."""
     if not files:
         return []
+    flagged_lines = flagged_lines or {}
     
     # More concise prompt
     prompt = f"Review these files for {category}. For each file, give:\n1. 1-line summary\n2. 2 key suggestions\n3. Code fix if needed\n\n"
     
-    # Process files in smaller batches to reduce token usage
-    batch_size = min(2, len(files))  # Process max 2 files at a time
+    # Fit as many files per call as the token budget allows at AI_MIN_FILE_TOKENS each
+    batch_size = min(len(files), max(1, settings.AI_BATCH_TOKEN_BUDGET // settings.AI_MIN_FILE_TOKENS))
+    if max_batch_size:
+        batch_size = min(batch_size, max(1, max_batch_size))
     all_insights = []
     
     for i in range(0, len(files), batch_size):
         batch = files[i:i + batch_size]
         batch_prompt = prompt
+        file_budget = settings.AI_BATCH_TOKEN_BUDGET // len(batch)
         
         for file_path, code in batch:
-            batch_prompt += f"\nFile: {file_path}\n{truncate_code(code, 800)}\n---\n"
+            condensed = condense_code(code, file_path, file_budget, flagged_lines.get(file_path, ()))
+            batch_prompt += f"\nFile: {file_path}\n{condensed}\n---\n"
         
         try:
             response = await client.chat.completions.create(
@@ -480,7 +470,7 @@ disable=
     C0115,  # missing-class-docstring
     C0116,  # missing-function-docstring
     R0903,  # too-few-public-methods
-    R0801,  # duplicate-code (enable if you want strict reuse detection)
+    R0801,  # duplicate-code (quadratic; utils/duplicate_detector.py covers it)
 
 [FORMAT]
 max-line-length=100
@@ -513,14 +503,15 @@ dummy-variables-rgx=(_+$|unused_)
     return config_path
 
 @router.post("/scan/code_quality.api")
-async def scan_code_quality(request: CodeQualityRequest):
+@track_scan("code_quality")
+async def scan_code_quality(request: CodeQualityRequest, client=Depends(get_openai_client)):
     temp_dir = None
     repo_dir = None
+    store = None
     try:
         # Create a new parent temporary directory
         temp_dir = tempfile.mkdtemp()
         repo_dir = os.path.join(temp_dir, "repo")
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         
         # Create Pylint config
         pylint_config = create_pylint_config(temp_dir)
@@ -541,26 +532,35 @@ async def scan_code_quality(request: CodeQualityRequest):
         if request.patToken:
             repo_url = repo_url.replace('https://', f'https://{request.patToken}@')
         clone_cmd = ["git", "clone", "--depth", "1", "--single-branch", repo_url, repo_dir]
-        result = await asyncio.to_thread(subprocess.run, clone_cmd, capture_output=True, text=True, timeout=120)
+        with track_subprocess("git", {"process.command": "git clone"}) as current:
+            result = await asyncio.to_thread(subprocess.run, clone_cmd, capture_output=True, text=True, timeout=120)
+            record_exit(current, result.returncode)
         if result.returncode != 0:
             raise HTTPException(status_code=400, detail=f"Failed to clone repository: {result.stderr}")
         timing["repository_clone"] = round(time.time() - clone_start, 2)
 
         # Install JS dependencies if needed
         if os.path.exists(os.path.join(repo_dir, "package-lock.json")):
-            await asyncio.to_thread(subprocess.run, ["npm", "ci"], cwd=repo_dir, capture_output=True, text=True, timeout=180)
+            with track_subprocess("npm", {"process.command": "npm ci"}) as current:
+                result = await asyncio.to_thread(subprocess.run, ["npm", "ci"], cwd=repo_dir, capture_output=True, text=True, timeout=180)
+                record_exit(current, result.returncode)
 
         # Get relevant files using smart sampling
         sampling_start = time.time()
-        selected_files = await get_relevant_files(repo_dir, request.maxFilesPerLanguage)
-        all_files = [f for files in selected_files.values() for f in files]
-        files_analyzed = len(all_files)
+        # One store per scan: every stage shares its stats and file reads
+        store = FileStore(repo_dir)
+        with span("file_sampling") as current:
+            manifest = await manifest_cache.get(repo_dir)
+            selected_files = await get_relevant_files(store, manifest, request.maxFilesPerLanguage)
+            all_files = [f for files in selected_files.values() for f in files]
+            files_analyzed = len(all_files)
+            current.set_attributes({"repo.files": len(manifest.files), "files.selected": files_analyzed})
         timing["file_sampling"] = round(time.time() - sampling_start, 2)
 
         # Prepare for parallel analysis
         analysis_start = time.time()
+        lint_lines: Dict[str, List[int]] = {}
         async def analyze_linting():
-            lint_issues = {}
             async def run_linter(file_path):
                 abs_path = os.path.join(repo_dir, file_path)
                 if file_path.endswith('.py'):
@@ -573,34 +573,41 @@ async def scan_code_quality(request: CodeQualityRequest):
                 if result:
                     try:
                         issues = json.loads(result)
-                        count = len(issues) if file_path.endswith('.py') else len(issues[0]['messages'])
-                        return (file_path, count)
+                        messages = issues if file_path.endswith('.py') else issues[0]['messages']
+                        # Remember where the issues are so the AI prompt keeps those lines
+                        lint_lines[file_path] = [m.get('line', 0) for m in messages if m.get('line')]
+                        return (file_path, len(messages))
                     except Exception:
                         return (file_path, 0)
                 return (file_path, 0)
-            tasks = [run_linter(f) for f in all_files]
-            results = await asyncio.gather(*tasks)
+            with span("lint", {"files.count": len(all_files)}):
+                tasks = [run_linter(f) for f in all_files]
+                results = await asyncio.gather(*tasks)
             return dict(results)
         async def analyze_complexity_and_docs():
-            metrics = defaultdict(dict)
-            async def analyze_file(file_path):
-                abs_path = os.path.join(repo_dir, file_path)
-                try:
-                    async with aiofiles.open(abs_path, 'r') as f:
-                        code = await f.read()
-                        metrics[file_path] = {
-                            'todos': code.count('TODO') + code.count('todo'),
-                            'has_docs': any(line.strip().startswith(('#', '//')) for line in code.splitlines()),
-                            'complexity': len(code.split('\n'))  # Simple complexity metric
-                        }
-                except Exception:
-                    metrics[file_path] = {'todos': 0, 'has_docs': False, 'complexity': 0}
-            tasks = [analyze_file(f) for f in all_files]
-            await asyncio.gather(*tasks)
+            with span("complexity_metrics") as current:
+                # Sampling usually loaded these already, but a miss would read on the event loop
+                contents = await asyncio.to_thread(lambda: [(f, store.read(f)) for f in all_files])
+                contents = [(f, data) for f, data in contents if data is not None]
+                current.set_attributes({"files.count": len(contents), "files.bytes": sum(len(d) for _, d in contents)})
+                metrics = await metrics_engine.analyze(contents)
+            for file_path in all_files:
+                metrics.setdefault(file_path, {'todos': 0, 'has_docs': False, 'complexity': 0})
             return metrics
-        lint_results, complexity_results = await asyncio.gather(
+        async def detect_duplicates():
+            # numpy-backed; imported on first scan rather than at startup
+            from ..utils.duplicate_detector import candidate_files, find_duplicates
+
+            # Duplicate detection covers the whole repository, not just the sample
+            paths = candidate_files(manifest)
+            with span("duplicate_detection", {"files.count": len(paths)}):
+                return await asyncio.get_running_loop().run_in_executor(
+                    metrics_engine.executor, find_duplicates, repo_dir, paths
+                )
+        lint_results, complexity_results, duplicates = await asyncio.gather(
             analyze_linting(),
-            analyze_complexity_and_docs()
+            analyze_complexity_and_docs(),
+            detect_duplicates()
         )
         timing["static_analysis"] = round(time.time() - analysis_start, 2)
         # Prepare files for OpenAI analysis
@@ -609,41 +616,40 @@ async def scan_code_quality(request: CodeQualityRequest):
             issues = lint_results.get(file_path, 0)
             complexity = complexity_results.get(file_path, {})
             issues += complexity.get('todos', 0)
-            if not complexity.get('has_docs', False):
+            if not complexity.get('has_docs', False) and 'parse_error' not in complexity:
                 issues += 1
             top_issues.append((file_path, issues))
         top_issues.sort(key=lambda x: x[1], reverse=True)
         top_files = [f[0] for f in top_issues[:5]]
         # Batch OpenAI analysis
         ai_start = time.time()
-        async def get_file_contents(file_paths):
-            contents = []
-            for path in file_paths:
-                try:
-                    async with aiofiles.open(os.path.join(repo_dir, path), 'r') as f:
-                        code = await f.read()
-                        contents.append((path, code))
-                except Exception:
-                    continue
-            return contents
-        file_contents = await get_file_contents(top_files)
-        insights = []
-        for i in range(0, len(file_contents), request.openaiBatchSize):
-            batch = file_contents[i:i + request.openaiBatchSize]
-            batch_insights = await batch_openai_insight(client, batch, "code quality issues")
-            insights.extend(batch_insights)
+        file_contents = await asyncio.to_thread(lambda: [(path, store.text(path)) for path in top_files])
+        file_contents = [(path, code) for path, code in file_contents if code is not None]
+        with span("ai_analysis", {"files.count": len(file_contents)}):
+            insights = await batch_openai_insight(client, file_contents, "code quality issues", lint_lines,
+                                                  max_batch_size=request.openaiBatchSize)
         timing["ai_analysis"] = round(time.time() - ai_start, 2)
         # Calculate metrics
         total_linting_issues = sum(lint_results.values())
         total_todos = sum(r.get('todos', 0) for r in complexity_results.values())
-        files_without_docs = [f for f, r in complexity_results.items() if not r.get('has_docs', False)]
+        # Files that failed to parse have unknown docs and complexity; they are listed separately
+        parse_errors = {f: r['parse_error'] for f, r in complexity_results.items() if 'parse_error' in r}
+        files_without_docs = [f for f, r in complexity_results.items()
+                              if not r.get('has_docs', False) and f not in parse_errors]
         todos_files = [f for f, r in complexity_results.items() if r.get('todos', 0) > 0]
-        duplicate_files = []  # Placeholder: implement duplicate detection if needed
+        duplicate_files = duplicates["duplicate_files"]
+        measured = [r for r in complexity_results.values() if 'maintainability_index' in r]
+        most_complex = sorted(
+            ({"file": f, "function": fn["name"], "line": fn["line"], "complexity": fn["complexity"]}
+             for f, r in complexity_results.items() for fn in r.get('functions', [])),
+            key=lambda x: x["complexity"], reverse=True
+        )[:5]
         quality_score = max(1.0, 10.0 - ((total_linting_issues + total_todos + len(files_without_docs)) / max(1, files_analyzed)))
         # Calculate other operations time
         total_time = time.time() - start_time
         timing["other"] = round(total_time - sum(timing.values()), 2)
         timing["total_seconds"] = round(total_time, 2)
+        observe_phases("code_quality", timing)
         return {
             "files_analyzed": {
                 "total": files_analyzed,
@@ -655,13 +661,25 @@ async def scan_code_quality(request: CodeQualityRequest):
                 "files_without_docs": len(files_without_docs),
                 "todos_files": todos_files,
                 "duplicate_files": duplicate_files,
+                "total_duplicate_files": len(duplicate_files),
+                "duplicate_groups": duplicates["duplicate_groups"],
+                "duplicate_blocks": duplicates["duplicate_blocks"],
                 "files_without_docs_list": files_without_docs
             },
+            "complexity": {
+                "average": round(sum(r['complexity'] for r in measured) / max(1, len(measured)), 2),
+                "maintainability_index": round(sum(r['maintainability_index'] for r in measured) / max(1, len(measured)), 2),
+                "docstring_coverage": round(sum(r['docstring_coverage'] for r in measured) / max(1, len(measured)), 2),
+                "most_complex": most_complex,
+                "parse_errors": parse_errors
+            },
             "top_issues": insights,
             "quality_score": round(quality_score, 2),
             "timing": timing
         }
     finally:
+        if store is not None:
+            store.close()
         if temp_dir and os.path.exists(temp_dir):
             try:
                 shutil.rmtree(temp_dir, ignore_errors=True)
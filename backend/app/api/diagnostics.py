@@ -0,0 +1,49 @@
+"""
+Diagnostics API (Startup)
+
+Purpose:
+    This API shows how quickly the backend starts and what it loads while doing so.
+
+How it works:
+    1. Reports the startup milestones of this process (app imported, lifespan ready).
+    2. Lists which heavy SDKs (OpenAI, FAISS, numpy, ...) this process has loaded so far;
+       they are imported on first use, so right after startup they should all be absent.
+    3. Imports the app in a fresh interpreter with `python -X importtime` and returns the
+       slowest modules by cumulative and self time (cached; pass refresh=true to re-run, at
+       most once per DIAGNOSTICS_REFRESH_INTERVAL_SECONDS).
+    The endpoint is off unless DIAGNOSTICS_ENABLED is set and needs a logged-in user: it
+    starts child processes and reveals the app's module layout.
+
+Intention:
+    The goal is to keep cold starts fast for autoscaled instances and `reload=True` dev
+    loops, and to make it obvious which import made them slow again.
+"""
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..core import startup
+from ..core.config import settings
+from ..core.security import get_current_user
+
+router = APIRouter()
+
+@router.get("/startup")
+async def startup_diagnostics(refresh: bool = False, top: int = Query(15, ge=1, le=100),
+                              user: dict = Depends(get_current_user)):
+    """Startup milestones, loaded heavy SDKs and an -X importtime profile of the app."""
+    interval = settings.DIAGNOSTICS_REFRESH_INTERVAL_SECONDS
+    age = startup.profile_age()
+    if refresh and age is not None and age < interval:
+        retry_after = math.ceil(interval - age)
+        raise HTTPException(status_code=429, detail=f"Import profile refreshed {int(age)}s ago; retry in {retry_after}s",
+                            headers={"Retry-After": str(retry_after)})
+    try:
+        profile = await startup.profile_imports(top=top, refresh=refresh, min_interval=interval)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "timings": startup.timings(),
+        "heavy_modules_loaded": startup.loaded_heavy_modules(),
+        "import_profile": profile,
+    }
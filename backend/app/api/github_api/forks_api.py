@@ -15,8 +15,8 @@ Intention:
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
 from urllib.parse import urlparse
-import httpx
 from ...core.config import settings
+from ...core.monitoring import instrumented_client
 
 router = APIRouter()
 
@@ -62,7 +62,7 @@ async def get_forks(data: RepoRequest):
         "Authorization": f"Bearer {data.pat_token}",
         "Content-Type": "application/json"
     }
-    async with httpx.AsyncClient() as client:
+    async with instrumented_client("github_graphql") as client:
         response = await client.post(
             settings.GITHUB_GRAPHQL_URL,
             json={"query": query, "variables": variables},
@@ -15,9 +15,9 @@ Intention:
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
 from urllib.parse import urlparse
-import httpx
 from datetime import datetime, timedelta
 from ...core.config import settings
+from ...core.monitoring import instrumented_client
 
 router = APIRouter()
 
@@ -70,7 +70,7 @@ async def get_issues(data: RepoRequest):
         "Content-Type": "application/json"
     }
     all_issues = []
-    async with httpx.AsyncClient() as client:
+    async with instrumented_client("github_graphql") as client:
         while True:
             response = await client.post(
                 settings.GITHUB_GRAPHQL_URL,
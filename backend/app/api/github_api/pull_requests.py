@@ -19,6 +19,7 @@ import httpx
 from datetime import datetime, timedelta
 from typing import List, Optional
 from ...core.config import settings
+from ...core.monitoring import instrumented_client
 
 router = APIRouter()
 
@@ -101,7 +102,7 @@ async def get_pull_requests(data: RepoRequest):
 
     all_prs = []
     MAX_PRS = 300
-    async with httpx.AsyncClient() as client:
+    async with instrumented_client("github_graphql") as client:
         while True:
             try:
                 response = await client.post(
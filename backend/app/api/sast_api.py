@@ -6,12 +6,25 @@ Purpose:
 
 How it works:
     1. You provide a link to a code repository (like a GitHub project) and a personal access token (PAT) for access.
-    2. The API downloads the code and automatically detects what programming language is used (Python or JavaScript).
+    2. The API downloads the code and indexes it once (utils/repo_manifest.py), which tells it every supported
+       language in use (Python, JavaScript, TypeScript) and every dependency manifest; mixed-language repositories
+       get all the scanners they need.
     3. It runs several tools:
-        - Semgrep: Looks for security vulnerabilities and risky code patterns.
-        - Gitleaks: Searches for secrets (like passwords or API keys) accidentally left in the code.
-        - Dependency Audit: Checks if any libraries used in the project have known security problems (CVEs).
-    4. The API collects all the results, counts the number of issues, and calculates easy-to-understand scores:
+        - Semgrep: Looks for security vulnerabilities and risky code patterns, using rule packs for the detected
+          language that are pinned to local files (utils/semgrep_rules.py), so no rules are downloaded during a scan.
+          Findings are cached by commit and rule-pack hash.
+        - Gitleaks: Searches for secrets (like passwords or API keys) accidentally left in the code, across the full git
+          history. The first scan covers all history using a local mirror; later scans only cover commits added since the
+          last scanned commit, and previously found leaks are kept in a findings store (utils/secret_scanner.py).
+        - Dependency Audit: Checks if any libraries used in the project have known security problems (CVEs). Every
+          requirements file, pyproject project and npm package in the repository is audited, identical ones only once,
+          with a bounded number running at the same time; CVEs are reported per manifest path.
+    4. Tool output is parsed as a stream (utils/tool_output.py): findings are aggregated as they are read, and each
+       tool has an output size cap; past it, the findings read so far are kept and the tool is listed in
+       "truncated_tools" instead of the scan failing. A tool that could not run at all (e.g. Semgrep with no rule
+       packs installed) is listed in "skipped_tools"; either list sets "degraded", so a partial scan never reads as a
+       clean one. The API counts the number of issues and calculates
+       easy-to-understand scores:
         - Vulnerability Score: Shows how many problems were found (higher is better).
         - Remediation Score: Shows how well the project is doing in fixing known issues (higher is better).
     5. The results are returned in a simple format, showing the types and numbers of issues, the most risky files, and the scores.
@@ -24,14 +37,21 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
 from pathlib import Path
 from enum import Enum
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import asyncio
-import aiofiles
-import aiohttp
 from functools import lru_cache
 import hashlib
+import shlex
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import time
+from ..utils.semgrep_rules import rule_packs
+from ..utils.secret_scanner import secret_scanner
+from ..utils.repo_manifest import RepoManifest, manifest_cache
+from ..core.config import settings
+from ..core.monitoring import observe_phases, record_cache, record_exit, track_scan, track_subprocess
+from ..core.tracing import span
+from ..utils.tool_output import ToolRun
 
 router = APIRouter()
 
@@ -49,6 +69,9 @@ class CacheEntry:
 # In-memory cache for dependency audit results
 dependency_cache: Dict[str, CacheEntry] = {}
 
+# In-memory cache for Semgrep findings, keyed by commit and rule-pack hash
+semgrep_cache: Dict[str, CacheEntry] = {}
+
 class SeverityLevel(str, Enum):
     CRITICAL = "CRITICAL"
     HIGH = "HIGH"
@@ -68,6 +91,8 @@ SEVERITY_MAP = {
     "low": SeverityLevel.LOW,
     "INFO": SeverityLevel.INFO,
     "info": SeverityLevel.INFO,
+    "MODERATE": SeverityLevel.MEDIUM,
+    "moderate": SeverityLevel.MEDIUM,
     "WARNING": SeverityLevel.LOW,
     "warning": SeverityLevel.LOW,
 }
@@ -83,12 +108,11 @@ def run_cmd(cmd, cwd=None):
     except Exception as e:
         return "", str(e)
 
-def detect_language(repo_path: Path):
-    if any(repo_path.rglob("*.py")):
-        return "python"
-    elif any(repo_path.rglob("package.json")):
-        return "javascript"
-    return "unknown"
+SUPPORTED_LANGUAGES = ["python", "javascript", "typescript"]
+
+def detect_languages(manifest: RepoManifest) -> List[str]:
+    """Supported languages present in the checkout, most files first."""
+    return [lang for lang in manifest.languages if lang in SUPPORTED_LANGUAGES]
 
 def run_semgrep(repo_path, lang):
     config = "p/default"
@@ -123,87 +147,290 @@ def run_dep_audit(repo_path, lang):
 def normalize_severity(severity: str) -> SeverityLevel:
     return SEVERITY_MAP.get(severity.upper(), SeverityLevel.INFO)
 
+class ScanAggregator:
+    """Incremental aggregation of findings as the tools produce them."""
+
+    def __init__(self):
+        self.vuln_total = 0
+        self.vuln_by_file = {}
+        self.static_total = 0
+        self.static_by_file = {}
+        self.secret_total = 0
+        self.secret_by_file = {}
+        self.dep_cves = {}
+        self.top_risky_counter = {}
+        self.truncated_tools = set()  # Tools whose output passed its size cap
+        self.skipped_tools = set()  # Tools that did not run, so their zero counts mean nothing
+        # Severity-based grouping
+        self.severity_groups = {
+            level: {"count": 0, "files": {}} for level in SeverityLevel
+        }
+
+    def _add_to_severity(self, severity: SeverityLevel, f: str, issue: Dict[str, Any]) -> None:
+        self.severity_groups[severity]["count"] += 1
+        self.severity_groups[severity]["files"].setdefault(f, {"count": 0, "issues": []})
+        self.severity_groups[severity]["files"][f]["issues"].append(issue)
+        self.severity_groups[severity]["files"][f]["count"] += 1
+        self.top_risky_counter[f] = self.top_risky_counter.get(f, 0) + 1
+
+    def add_static_issue(self, f: str, line: int, severity: SeverityLevel, message: str) -> None:
+        issue = {
+            "severity": severity,
+            "line": line,
+            "message": message
+        }
+        self._add_to_severity(severity, f, issue)
+        self.vuln_by_file.setdefault(f, {"count": 0, "issues": []})
+        self.vuln_by_file[f]["issues"].append(issue)
+        self.vuln_by_file[f]["count"] += 1
+        self.static_by_file.setdefault(f, {"count": 0, "warnings": []})
+        self.static_by_file[f]["warnings"].append(issue)
+        self.static_by_file[f]["count"] += 1
+        self.vuln_total += 1
+        self.static_total += 1
+
+    def add_secret(self, s: Dict[str, Any]) -> None:
+        f = s.get("file", "unknown")
+        severity = normalize_severity(s.get("severity", "HIGH"))  # Secrets are typically high severity
+        self._add_to_severity(severity, f, {
+            "type": s.get("rule", "Generic Secret"),
+            "line": s.get("line", 0),
+            "description": s.get("description", "Potential secret")
+        })
+        self.secret_by_file.setdefault(f, {"count": 0, "leaks": []})
+        self.secret_by_file[f]["leaks"].append({
+            "type": s.get("rule", "Generic Secret"),
+            "line": s.get("line", 0),
+            "description": s.get("description", "Potential secret"),
+            "commit": s.get("commit")
+        })
+        self.secret_by_file[f]["count"] += 1
+        self.secret_total += 1
+
+    def add_dependency(self, file: str, finding: Dict[str, Any]) -> None:
+        self._add_to_severity(finding["severity"], file, finding)
+        self.dep_cves.setdefault(file, [])
+        self.dep_cves[file].append(finding)
+
 async def run_cmd_async(cmd: str, cwd: str = None) -> tuple[str, str]:
     try:
-        proc = await asyncio.create_subprocess_shell(
-            cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=cwd
-        )
-        stdout, stderr = await proc.communicate()
+        # Only the subcommand is traced; clone URLs carry tokens
+        with track_subprocess(cmd.split(" ", 1)[0], {"process.command": " ".join(cmd.split()[:2])}) as current:
+            proc = await asyncio.create_subprocess_shell(
+                cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd
+            )
+            stdout, stderr = await proc.communicate()
+            record_exit(current, proc.returncode)
         return stdout.decode(), stderr.decode()
     except Exception as e:
         return "", str(e)
 
-def get_cache_key(repo_path: str, lang: str) -> str:
-    """Generate a cache key for dependency audit results"""
-    # Use requirements.txt or package.json hash as cache key
-    if lang == "python":
-        req_file = os.path.join(repo_path, "requirements.txt")
-    else:
-        req_file = os.path.join(repo_path, "package.json")
-    
-    if os.path.exists(req_file):
-        with open(req_file, 'rb') as f:
-            return hashlib.md5(f.read()).hexdigest()
-    return ""
+async def get_commit_sha(repo_path: str) -> str:
+    out, _ = await run_cmd_async("git rev-parse HEAD", cwd=repo_path)
+    return out.strip()
 
-async def run_semgrep_async(repo_path: str, lang: str) -> tuple[dict, float]:
+async def run_semgrep_async(repo_path: str, languages: List[str], aggregator: ScanAggregator) -> tuple[ToolRun, float]:
     start_time = time.time()
-    config = "p/default"
-    cmd = f"semgrep --quiet --json --config={config} {repo_path}"
-    out, _ = await run_cmd_async(cmd)
-    try:
-        result = json.loads(out)
-    except:
-        result = {}
-    execution_time = time.time() - start_time
-    return result, execution_time
-
-async def run_gitleaks_async(repo_path: str) -> tuple[list, float]:
+    with span("semgrep", {"semgrep.languages": languages}) as current:
+        # The manifest is read (and hashed, if packs were added) from disk
+        packs = await asyncio.to_thread(rule_packs.available, rule_packs.packs_for(languages))
+        if not packs:
+            # A fresh deploy has no packs until the refresh or a provisioning step adds them
+            print(f"No Semgrep rule packs in {rule_packs.rules_dir}; skipping Semgrep")
+            aggregator.skipped_tools.add("semgrep")
+            current.set_attribute("semgrep.skipped", True)
+            return None, 0.0
+
+        commit = await get_commit_sha(repo_path)
+        cache_key = f"{commit}:{await asyncio.to_thread(rule_packs.ruleset_hash, packs)}" if commit else ""
+        cache_entry = semgrep_cache.get(cache_key) if cache_key else None
+        record_cache("semgrep", bool(cache_entry and cache_entry.is_valid()))
+        if cache_entry:
+            if cache_entry.is_valid():
+                for issue in cache_entry.data:
+                    aggregator.add_static_issue(*issue)
+                current.set_attribute("cache.hit", True)
+                return None, 0.0  # Cache hit, no execution time
+
+        # Local rule files only; metrics and version checks would reach the network
+        config = " ".join(shlex.quote(arg) for arg in rule_packs.config_args(packs))
+        cmd = f"semgrep --quiet --json --metrics=off --disable-version-check {config} ."
+        run = ToolRun("semgrep", cmd, settings.SEMGREP_MAX_OUTPUT_MB * 1024 * 1024, cwd=repo_path)
+        issues = []
+        # Each result is reduced to what the report needs as soon as it is parsed
+        async for r in run.items("results.item"):
+            issue = (
+                r.get("path", "unknown"),
+                r.get("start", {}).get("line", 0),
+                normalize_severity(r.get("severity", "INFO")),
+                r.get("extra", {}).get("message", "Unknown issue")
+            )
+            aggregator.add_static_issue(*issue)
+            issues.append(issue)
+        if run.truncated:
+            aggregator.truncated_tools.add("semgrep")
+        if run.error:
+            aggregator.skipped_tools.add("semgrep")
+        if cache_key and not run.error and not run.truncated:
+            semgrep_cache[cache_key] = CacheEntry(issues, datetime.now())
+        current.set_attributes({"semgrep.packs": len(packs), "findings.count": len(issues)})
+        return run, time.time() - start_time
+
+async def run_gitleaks_async(repo_url: str, auth_url: str, repo_path: str) -> tuple[dict, float]:
     start_time = time.time()
-    cmd = f"gitleaks detect --no-banner --source={repo_path} --report-format=json"
-    out, _ = await run_cmd_async(cmd)
-    try:
-        result = json.loads(out)
-    except:
-        result = []
+    with span("gitleaks") as current:
+        try:
+            result = await secret_scanner.scan(repo_url, auth_url, checkout=repo_path)
+        except Exception as e:
+            print(f"Secret scan error: {e}")
+            result = {"mode": "failed", "scanned_range": None, "findings": [], "truncated": False}
+        current.set_attributes({"gitleaks.mode": result["mode"], "findings.count": len(result["findings"])})
     execution_time = time.time() - start_time
     return result, execution_time
 
-async def run_dep_audit_async(repo_path: str, lang: str) -> tuple[list, float]:
-    start_time = time.time()
-    cache_key = get_cache_key(repo_path, lang)
-    if cache_key and cache_key in dependency_cache:
-        cache_entry = dependency_cache[cache_key]
-        if cache_entry.is_valid():
-            return cache_entry.data, 0.0  # Cache hit, no execution time
-
-    if lang == "python":
-        out, _ = await run_cmd_async("pip-audit -f json", cwd=repo_path)
-    elif lang == "javascript":
-        await run_cmd_async("npm install --omit=dev", cwd=repo_path)
-        out, _ = await run_cmd_async("npm audit --json", cwd=repo_path)
+@dataclass
+class AuditTarget:
+    ecosystem: str                # "pip" or "npm"
+    path: str                     # Manifest that findings are attributed to
+    files: List[str]              # Files whose content defines the audit
+    key: str = ""                 # Content hash; identical projects share one audit
+
+def discover_audit_targets(repo_path: str, manifest: RepoManifest) -> List[AuditTarget]:
+    """Every auditable project in the checkout: requirements files, pyproject projects and npm packages."""
+    targets = []
+    pip_files = manifest.manifests.get("pip", [])
+    requirement_dirs = {os.path.dirname(p) for p in pip_files if os.path.basename(p).startswith("requirements")}
+    for path in pip_files:
+        name = os.path.basename(path)
+        if name.startswith("requirements") and name.endswith(".txt"):
+            targets.append(AuditTarget("pip", path, [path]))
+        elif name == "pyproject.toml" and os.path.dirname(path) not in requirement_dirs:
+            targets.append(AuditTarget("pip", path, [path]))
+    npm_files = set(manifest.manifests.get("npm", []))
+    for path in sorted(p for p in npm_files if os.path.basename(p) == "package.json"):
+        lockfile = os.path.join(os.path.dirname(path), "package-lock.json")
+        targets.append(AuditTarget("npm", path, [path] + ([lockfile] if lockfile in npm_files else [])))
+
+    for target in targets:
+        digest = hashlib.sha256(target.ecosystem.encode())
+        for rel_path in target.files:
+            digest.update(b"\0" + os.path.basename(rel_path).encode() + b"\0")
+            try:
+                with open(os.path.join(repo_path, rel_path), "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                pass
+        target.key = digest.hexdigest()
+    return targets
+
+def normalize_pip_audit(result: Any) -> List[Dict[str, Any]]:
+    dependencies = result.get("dependencies", []) if isinstance(result, dict) else []
+    findings = []
+    for dep in dependencies:
+        for vuln in dep.get("vulns", []):
+            cve = next((a for a in vuln.get("aliases", []) if a.startswith("CVE-")), vuln.get("id", "unknown"))
+            findings.append({
+                "package": dep.get("name", "unknown"),
+                "version": dep.get("version", "unknown"),
+                "cve": cve,
+                "severity": SeverityLevel.MEDIUM  # pip-audit does not report severity
+            })
+    return findings
+
+def normalize_npm_audit(result: Any) -> List[Dict[str, Any]]:
+    vulnerabilities = result.get("vulnerabilities", {}) if isinstance(result, dict) else {}
+    findings = []
+    for vuln in vulnerabilities.values():
+        # "via" holds advisories, or names of vulnerable dependencies for transitive issues
+        advisory = next((v for v in vuln.get("via", []) if isinstance(v, dict)), None)
+        findings.append({
+            "package": vuln.get("name", "unknown"),
+            "version": vuln.get("range", "unknown"),
+            "cve": (advisory.get("url") or advisory.get("source", "unknown")) if advisory else "via " + ", ".join(map(str, vuln.get("via", []))),
+            "severity": normalize_severity(vuln.get("severity", "MEDIUM"))
+        })
+    return findings
+
+async def run_manifest_audit(repo_path: str, target: AuditTarget) -> Optional[List[Dict[str, Any]]]:
+    """Findings for one project; None when the audit tool failed."""
+    with span("dependency_audit.manifest", {"audit.ecosystem": target.ecosystem, "audit.manifest": target.path}) as current:
+        findings = await _audit_manifest(repo_path, target)
+        current.set_attribute("findings.count", len(findings or []))
+        return findings
+
+async def _audit_manifest(repo_path: str, target: AuditTarget) -> Optional[List[Dict[str, Any]]]:
+    cache_entry = dependency_cache.get(target.key)
+    hit = bool(cache_entry and cache_entry.is_valid())
+    record_cache("dependency_audit", hit)
+    if hit:
+        return cache_entry.data
+
+    project_dir = os.path.join(repo_path, os.path.dirname(target.path))
+    max_bytes = settings.DEP_AUDIT_MAX_OUTPUT_MB * 1024 * 1024
+    findings = []
+    if target.ecosystem == "pip":
+        if target.path.endswith(".txt"):
+            cmd = f"pip-audit -f json --progress-spinner off -r {shlex.quote(os.path.basename(target.path))}"
+        else:
+            cmd = "pip-audit -f json --progress-spinner off ."
+        run = ToolRun("pip-audit", cmd, max_bytes, cwd=project_dir)
+        async for dep in run.items("dependencies.item"):
+            findings.extend(normalize_pip_audit({"dependencies": [dep]}))
     else:
-        return [], 0.0
-
-    try:
-        result = json.loads(out)
-        if cache_key:
-            dependency_cache[cache_key] = CacheEntry(result, datetime.now())
-        execution_time = time.time() - start_time
-        return result, execution_time
-    except:
-        return [], time.time() - start_time
+        if len(target.files) == 1:
+            # Resolve a lockfile without installing packages or running scripts
+            await run_cmd_async("npm install --package-lock-only --omit=dev --ignore-scripts", cwd=project_dir)
+        run = ToolRun("npm", "npm audit --json --package-lock-only --omit=dev", max_bytes, cwd=project_dir)
+        async for name, vuln in run.items("vulnerabilities", kvitems=True):
+            findings.extend(normalize_npm_audit({"vulnerabilities": {name: vuln}}))
+
+    if run.error or run.returncode is None:
+        return None
+    if not run.truncated:
+        dependency_cache[target.key] = CacheEntry(findings, datetime.now())
+    return findings
+
+async def run_dep_audits_async(repo_path: str, manifest: RepoManifest, aggregator: ScanAggregator) -> tuple[Dict[str, List[Dict[str, Any]]], float]:
+    """Audit every unique project concurrently and attribute findings to each manifest path."""
+    start_time = time.time()
+    with span("dependency_audit") as current:
+        targets = await asyncio.to_thread(discover_audit_targets, repo_path, manifest)
+        unique: Dict[str, AuditTarget] = {}
+        for target in targets:
+            unique.setdefault(target.key, target)
+
+        semaphore = asyncio.Semaphore(settings.DEP_AUDIT_CONCURRENCY)
+        async def audit(target: AuditTarget):
+            async with semaphore:
+                return target.key, await run_manifest_audit(repo_path, target)
+        results = dict(await asyncio.gather(*[audit(t) for t in unique.values()]))
+        if any(findings is None for findings in results.values()):
+            aggregator.skipped_tools.add("dependency_audit")
+
+        by_manifest = {t.path: results[t.key] for t in targets if results.get(t.key)}
+        current.set_attributes({"audit.manifests": len(targets), "audit.unique": len(unique)})
+        for file, findings in by_manifest.items():
+            for finding in findings:
+                aggregator.add_dependency(file, finding)
+        return by_manifest, time.time() - start_time
 
 async def clone_repo_async(repo_url: str, temp_dir: str) -> tuple[bool, float]:
     start_time = time.time()
     try:
         clone_cmd = f"git clone --depth=1 --filter=blob:none --sparse {repo_url} {temp_dir}"
         await run_cmd_async(clone_cmd)
-        
-        sparse_cmd = "git sparse-checkout set '*.py' '*.js' '*.json' 'requirements.txt' 'package.json'"
+        if not os.path.isdir(os.path.join(temp_dir, ".git")):
+            # Unknown repository, or no access with the given token (if any)
+            print("Clone error: repository could not be cloned")
+            return False, time.time() - start_time
+
+        # Non-cone mode: cone mode (the default since git 2.37) rejects file patterns
+        sparse_cmd = ("git sparse-checkout set --no-cone '*.py' '*.js' '*.jsx' '*.ts' '*.tsx' '*.json' "
+                      "'requirements*.txt' 'pyproject.toml' 'Pipfile' 'Pipfile.lock' 'poetry.lock' "
+                      "'yarn.lock' 'pnpm-lock.yaml'")
         await run_cmd_async(sparse_cmd, cwd=temp_dir)
         execution_time = time.time() - start_time
         return True, execution_time
@@ -212,6 +439,7 @@ async def clone_repo_async(repo_url: str, temp_dir: str) -> tuple[bool, float]:
         return False, time.time() - start_time
 
 @router.post("/scan")
+@track_scan("sast")
 async def scan_repo(data: ScanRequest):
     total_start_time = time.time()
     temp_dir = tempfile.mkdtemp()
@@ -225,29 +453,34 @@ async def scan_repo(data: ScanRequest):
     }
     
     try:
-        repo_url = str(data.repo_url)
-        token_prefix = f"https://{data.pat_token}@" if data.pat_token else ""
-        repo_url = repo_url.replace("https://", token_prefix)
+        public_url = str(data.repo_url)
+        token_prefix = f"https://{data.pat_token}@" if data.pat_token else "https://"
+        repo_url = public_url.replace("https://", token_prefix)
         
         # Clone repo asynchronously
-        clone_success, clone_time = await clone_repo_async(repo_url, temp_dir)
+        with span("git_clone"):
+            clone_success, clone_time = await clone_repo_async(repo_url, temp_dir)
         timing_info["git_clone_time"] = clone_time
         if not clone_success:
             raise HTTPException(status_code=400, detail="Failed to clone repository")
 
-        lang = detect_language(Path(temp_dir))
-        if lang not in ["python", "javascript"]:
+        # One index of the checkout answers every language and manifest question
+        with span("manifest") as current:
+            manifest = await manifest_cache.get(temp_dir)
+            languages = detect_languages(manifest)
+            current.set_attributes({"repo.files": len(manifest.files), "repo.languages": languages})
+        if not languages:
             raise HTTPException(status_code=400, detail="Unsupported repo language.")
-
-        # Run all security tools in parallel
-        semgrep_task = run_semgrep_async(temp_dir, lang)
-        gitleaks_task = run_gitleaks_async(temp_dir)
-        dep_audit_task = run_dep_audit_async(temp_dir, lang)
-
-        # Wait for all tools to complete
-        semgrep_result, semgrep_time = await semgrep_task
-        gitleaks_result, gitleaks_time = await gitleaks_task
-        dep_result, dep_time = await dep_audit_task
+        lang = languages[0]
+
+        # Run all security tools in parallel; mixed-language repos get every scanner they need.
+        # Findings go straight into the aggregator as each tool's output is parsed.
+        aggregator = ScanAggregator()
+        (_, semgrep_time), (gitleaks_result, gitleaks_time), (_, dep_time) = await asyncio.gather(
+            run_semgrep_async(temp_dir, languages, aggregator),
+            run_gitleaks_async(public_url, repo_url, temp_dir),
+            run_dep_audits_async(temp_dir, manifest, aggregator)
+        )
 
         timing_info["semgrep_time"] = semgrep_time
         timing_info["gitleaks_time"] = gitleaks_time
@@ -257,126 +490,24 @@ async def scan_repo(data: ScanRequest):
         agg_start_time = time.time()
 
         # --- Aggregation ---
-        vuln_total = 0
-        vuln_by_file = {}
-        static_total = 0
-        static_by_file = {}
-        secret_total = 0
-        secret_by_file = {}
-        dep_cves = {}
-        top_risky_counter = {}
-        
-        # New severity-based grouping
-        severity_groups = {
-            level: {"count": 0, "files": {}} for level in SeverityLevel
-        }
-
-        for r in semgrep_result.get("results", []):
-            f = r.get("path", "unknown")
-            line = r.get("start", {}).get("line", 0)
-            severity = normalize_severity(r.get("severity", "INFO"))
-            message = r.get("extra", {}).get("message", "Unknown issue")
-            issue = {
-                "severity": severity,
-                "line": line,
-                "message": message
-            }
-            
-            # Update severity groups
-            severity_groups[severity]["count"] += 1
-            severity_groups[severity]["files"].setdefault(f, {"count": 0, "issues": []})
-            severity_groups[severity]["files"][f]["issues"].append(issue)
-            severity_groups[severity]["files"][f]["count"] += 1
-
-            # Existing aggregation
-            vuln_by_file.setdefault(f, {"count": 0, "issues": []})
-            vuln_by_file[f]["issues"].append(issue)
-            vuln_by_file[f]["count"] += 1
-            static_by_file.setdefault(f, {"count": 0, "warnings": []})
-            static_by_file[f]["warnings"].append(issue)
-            static_by_file[f]["count"] += 1
-            top_risky_counter[f] = top_risky_counter.get(f, 0) + 1
-            vuln_total += 1
-            static_total += 1
-
-        for s in gitleaks_result:
-            f = s.get("file", "unknown")
-            line = s.get("line", 0)
-            desc = s.get("rule", "Secret")
-            severity = normalize_severity(s.get("severity", "HIGH"))  # Secrets are typically high severity
-            
-            # Update severity groups
-            severity_groups[severity]["count"] += 1
-            severity_groups[severity]["files"].setdefault(f, {"count": 0, "issues": []})
-            severity_groups[severity]["files"][f]["issues"].append({
-                "type": s.get("rule", "Generic Secret"),
-                "line": line,
-                "description": s.get("description", "Potential secret")
-            })
-            severity_groups[severity]["files"][f]["count"] += 1
-
-            # Existing aggregation
-            secret_by_file.setdefault(f, {"count": 0, "leaks": []})
-            secret_by_file[f]["leaks"].append({
-                "type": s.get("rule", "Generic Secret"),
-                "line": line,
-                "description": s.get("description", "Potential secret")
-            })
-            secret_by_file[f]["count"] += 1
-            top_risky_counter[f] = top_risky_counter.get(f, 0) + 1
-            secret_total += 1
-
-        if lang == "python" and isinstance(dep_result, list):
-            for v in dep_result:
-                for loc in v.get("location", []):
-                    file = loc.get("file", "requirements.txt")
-                    severity = normalize_severity(v.get("severity", "MEDIUM"))
-                    
-                    # Update severity groups
-                    severity_groups[severity]["count"] += 1
-                    severity_groups[severity]["files"].setdefault(file, {"count": 0, "issues": []})
-                    severity_groups[severity]["files"][file]["issues"].append({
-                        "package": v.get("dependency", {}).get("name", "unknown"),
-                        "version": v.get("dependency", {}).get("version", "unknown"),
-                        "cve": v.get("id", "unknown"),
-                        "severity": severity
-                    })
-                    severity_groups[severity]["files"][file]["count"] += 1
-
-                    # Existing aggregation
-                    dep_cves.setdefault(file, [])
-                    dep_cves[file].append({
-                        "package": v.get("dependency", {}).get("name", "unknown"),
-                        "version": v.get("dependency", {}).get("version", "unknown"),
-                        "cve": v.get("id", "unknown"),
-                        "severity": severity
-                    })
-                    top_risky_counter[file] = top_risky_counter.get(file, 0) + 1
-        elif lang == "javascript" and isinstance(dep_result, dict):
-            file = "package.json"
-            for vuln in dep_result.get("vulnerabilities", {}).values():
-                severity = normalize_severity(vuln.get("severity", "MEDIUM"))
-                
-                # Update severity groups
-                severity_groups[severity]["count"] += 1
-                severity_groups[severity]["files"].setdefault(file, {"count": 0, "issues": []})
-                severity_groups[severity]["files"][file]["issues"].append({
-                    "package": vuln.get("name", "unknown"),
-                    "version": vuln.get("version", "unknown"),
-                    "cve": vuln.get("via", [{}])[0].get("source", "unknown"),
-                    "severity": severity
-                })
-                severity_groups[severity]["files"][file]["count"] += 1
-
-                # Existing aggregation
-                dep_cves.setdefault(file, [])
-                dep_cves[file].append({
-                    "package": vuln.get("name", "unknown"),
-                    "version": vuln.get("version", "unknown"),
-                    "cve": vuln.get("via", [{}])[0].get("source", "unknown"),
-                    "severity": severity
-                })
-                top_risky_counter[file] = top_risky_counter.get(file, 0) + 1
+        if gitleaks_result["mode"] == "failed":
+            aggregator.skipped_tools.add("gitleaks")
+        if gitleaks_result["truncated"]:
+            aggregator.truncated_tools.add("gitleaks")
+        for s in gitleaks_result["findings"]:
+            aggregator.add_secret(s)
+
+        vuln_total = aggregator.vuln_total
+        vuln_by_file = aggregator.vuln_by_file
+        static_total = aggregator.static_total
+        static_by_file = aggregator.static_by_file
+        secret_total = aggregator.secret_total
+        secret_by_file = aggregator.secret_by_file
+        dep_cves = aggregator.dep_cves
+        top_risky_counter = aggregator.top_risky_counter
+        severity_groups = aggregator.severity_groups
+        truncated_tools = sorted(aggregator.truncated_tools)
+        skipped_tools = sorted(aggregator.skipped_tools)
 
         top_risky = sorted(top_risky_counter.items(), key=lambda x: x[1], reverse=True)
         top_risky = [{"file": k, "issue_count": v} for k, v in top_risky[:5]]
@@ -389,9 +520,11 @@ async def scan_repo(data: ScanRequest):
 
         timing_info["aggregation_time"] = time.time() - agg_start_time
         timing_info["total_time"] = time.time() - total_start_time
+        observe_phases("sast", timing_info)
 
         return {
             "language": lang,
+            "languages": languages,
             "severity_summary": {
                 level.value: {
                     "count": data["count"],
@@ -404,7 +537,12 @@ async def scan_repo(data: ScanRequest):
             },
             "secrets": {
                 "total": secret_total,
-                "files": secret_by_file
+                "files": secret_by_file,
+                "history_scan": {
+                    "mode": gitleaks_result["mode"],
+                    "scanned_range": gitleaks_result["scanned_range"],
+                    "truncated": gitleaks_result["truncated"]
+                }
             },
             "static_warnings": {
                 "total": static_total,
@@ -417,6 +555,10 @@ async def scan_repo(data: ScanRequest):
             },
             "vulnerability_score": vulnerability_score,
             "remediation_score": remediation_score,
+            "truncated_tools": truncated_tools,
+            "skipped_tools": skipped_tools,
+            # Incomplete results: a clean report only means something when every tool ran in full
+            "degraded": bool(truncated_tools or skipped_tools),
             "timing": {
                 "total_seconds": round(timing_info["total_time"], 2),
                 "breakdown": {
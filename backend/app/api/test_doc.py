@@ -1,24 +1,72 @@
-from fastapi import FastAPI, HTTPException, Query
+"""
+Test Strategy Document API
+
+Purpose:
+    This API writes a test strategy document for a software repository, so teams get a
+    starting point for what to test, how, and with which tools.
+
+How it works:
+    1. You provide a link to a GitHub repository (and a personal access token for private repos).
+    2. The API makes a shallow clone, indexes it once (utils/repo_manifest.py) and profiles the
+       index: README, folder structure, existing tests and frameworks, CI/CD and build files.
+    3. The profile is summarized and sent to GPT-4o, which writes the strategy in Markdown.
+    4. The document is returned as Markdown or PDF. The response carries an X-Test-Doc-Id
+       header; GET /test-doc/{id}?format=md|pdf downloads the same document again in
+       either format without re-running anything.
+
+    Cloning uses an async subprocess, profiling runs in a worker thread and GPT-4o is called
+    with the async client, so a long generation never blocks other requests. Generated
+    strategies are cached by the hash of the repository summary and shared by both formats:
+    asking for the PDF after the Markdown (or re-running an unchanged repo) skips GPT-4o.
+    PDFs are rendered in a process pool and cached by Markdown hash (utils/pdf_renderer.py).
+
+Intention:
+    The goal is to give teams a tailored, ready-to-edit test plan in seconds instead of
+    writing one from scratch.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
-import tempfile, subprocess, shutil, os, openai
+from typing import TYPE_CHECKING, Dict, Optional
+from datetime import datetime, timedelta
+import asyncio, hashlib, re, shutil, tempfile
+
+from ..core.monitoring import record_cache, record_exit, track_subprocess
+from ..core.tracing import span
+from ..utils.openai_client import get_openai_client
+from ..utils.pdf_renderer import content_hash, pdf_renderer
+from ..utils.repo_profiler import profile_repository
+from ..utils.repo_manifest import manifest_cache
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+router = APIRouter()
+
+# Generated strategies are reused for 24 hours
+CACHE_DURATION = timedelta(hours=24)
+
+class CacheEntry:
+    def __init__(self, data: str, timestamp: datetime):
+        self.data = data
+        self.timestamp = timestamp
 
-from pathlib import Path
-import re, json
-from fpdf import FPDF
+    def is_valid(self) -> bool:
+        return datetime.now() - self.timestamp < CACHE_DURATION
 
-app = FastAPI()
-openai.api_key = os.getenv("OPENAI_API_KEY")
-client = openai.OpenAI()
+# In-memory cache of generated strategies keyed by summary hash
+strategy_cache: Dict[str, CacheEntry] = {}
+# Generations in progress, so concurrent requests for the same repo share one GPT call
+_inflight: Dict[str, asyncio.Task] = {}
 
 # ---------- Request Body Schema ----------
 class RepoRequest(BaseModel):
     repoUrl: str
-    patToken: str = None
+    patToken: Optional[str] = None
 
 
 # ---------- STEP 1: Clone GitHub Repo ----------
-def clone_repo(repo_url: str, pat: str) -> str:
+async def clone_repo(repo_url: str, pat: Optional[str]) -> str:
     temp_dir = tempfile.mkdtemp()
     if pat:
         repo_url = repo_url.replace("https://", f"https://{pat}@")
@@ -26,117 +74,31 @@ def clone_repo(repo_url: str, pat: str) -> str:
     clone_cmd = ["git", "clone", "--depth", "1", "--single-branch", repo_url, temp_dir]
 
     try:
-        result = subprocess.run(clone_cmd, capture_output=True, text=True, timeout=120)
-        if result.returncode != 0:
-            raise HTTPException(status_code=400, detail=f"Git error: {result.stderr}")
+        with track_subprocess("git", {"process.command": "git clone"}) as current:
+            proc = await asyncio.create_subprocess_exec(
+                *clone_cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=120)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise HTTPException(status_code=400, detail="Clone failed: timed out")
+            record_exit(current, proc.returncode)
+        if proc.returncode != 0:
+            raise HTTPException(status_code=400, detail=f"Git error: {stderr.decode(errors='ignore')}")
         return temp_dir
+    except HTTPException:
+        await asyncio.to_thread(shutil.rmtree, temp_dir, ignore_errors=True)
+        raise
     except Exception as e:
+        await asyncio.to_thread(shutil.rmtree, temp_dir, ignore_errors=True)
         raise HTTPException(status_code=400, detail=f"Clone failed: {str(e)}")
 
 
 # ---------- STEP 2: Detailed Repo Analysis ----------
-def analyze_readme(path):
-    readme_path = next(Path(path).rglob("README.md"), None)
-    metadata = {
-        "project_name": Path(path).name,
-        "description": "",
-        "possible_keywords": [],
-        "project_type": "Unknown",
-        "usage": "",
-        "authors": "",
-    }
-    if not readme_path:
-        return metadata
-    with open(readme_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    title_match = re.search(r"# (.+)", content)
-    if title_match:
-        metadata["project_name"] = title_match.group(1).strip()
-    paragraphs = content.split("\n\n")
-    if len(paragraphs) > 1:
-        metadata["description"] = paragraphs[1].strip()
-    usage_match = re.search(r"(?i)##?\s*(usage|how to run).+?\n(.+?)(\n##|\Z)", content, re.DOTALL)
-    if usage_match:
-        metadata["usage"] = usage_match.group(2).strip()
-    author_match = re.search(r"(?i)author[s]?:\s*(.+)", content)
-    if author_match:
-        metadata["authors"] = author_match.group(1).strip()
-    content_lower = content.lower()
-    if "fastapi" in content_lower:
-        metadata["project_type"] = "Backend API"
-    return metadata
-
-def analyze_code_structure(path):
-    structure = {"folders": {}, "entry_points": [], "notable_files": []}
-    def describe_folder(folder_name):
-        mapping = {
-            "routes": "API endpoints",
-            "controllers": "Request handlers",
-            "models": "Schemas or ORM models",
-            "services": "Business logic",
-            "tests": "Testing logic",
-            "config": "App settings",
-        }
-        for key, desc in mapping.items():
-            if key in folder_name.lower():
-                return desc
-        return "Uncategorized"
-    for root, dirs, files in os.walk(path):
-        if len(Path(root).relative_to(path).parts) <= 2:
-            rel = str(Path(root).relative_to(path))
-            structure["folders"][rel] = {
-                "description": describe_folder(rel),
-                "file_count": len(files),
-                "files": files[:5]
-            }
-        for file in files:
-            if file in ["main.py", "index.ts", "app.ts", "server.ts"]:
-                structure["entry_points"].append(os.path.join(root, file))
-            if file.lower() in ["dockerfile", "package.json", "pyproject.toml"]:
-                structure["notable_files"].append(file)
-    return structure
-
-def analyze_tests(path):
-    tests = {"test_files": [], "test_types": set(), "frameworks": set(), "mocking": [], "fixtures_found": False}
-    for root, _, files in os.walk(path):
-        for file in files:
-            if "test" in file or file.endswith((".spec.ts", ".spec.js")):
-                tests["test_files"].append(os.path.join(root, file))
-            fpath = os.path.join(root, file)
-            if file.endswith(".py"):
-                with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
-                    c = f.read()
-                    if "pytest" in c:
-                        tests["frameworks"].add("pytest")
-                    if "unittest" in c:
-                        tests["frameworks"].add("unittest")
-            if file.endswith((".ts", ".js")):
-                with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
-                    c = f.read()
-                    if "jest" in c:
-                        tests["frameworks"].add("jest")
-                    if "mocha" in c:
-                        tests["frameworks"].add("mocha")
-            if "fixtures" in fpath:
-                tests["fixtures_found"] = True
-            if "unit" in root.lower():
-                tests["test_types"].add("Unit")
-            if "integration" in root.lower():
-                tests["test_types"].add("Integration")
-            if "e2e" in root.lower():
-                tests["test_types"].add("E2E")
-    return tests
-
-def analyze_ci_cd(path):
-    ci_cd = {"tools": [], "workflows": [], "build_files": []}
-    for f in [".github/workflows", "Jenkinsfile", ".gitlab-ci.yml"]:
-        if any(Path(path).rglob(f)):
-            ci_cd["tools"].append(f.split("/")[0])
-            ci_cd["workflows"].append(f)
-    for f in ["Makefile", "build.sh", "docker-compose.yml"]:
-        if any(Path(path).rglob(f)):
-            ci_cd["build_files"].append(f)
-    return ci_cd
+# README, structure, test and CI/CD facts are collected from the repository manifest by
+# utils/repo_profiler.profile_repository.
 
 def generate_summary(readme, structure, tests, ci_cd):
     lines = [f"# Repo Summary: {readme['project_name']}",
@@ -147,8 +109,8 @@ def generate_summary(readme, structure, tests, ci_cd):
         lines.append(f"- `{folder}`: {info['description']} ({info['file_count']} files)")
     lines.append("## Entry Points\n" + "\n".join(structure["entry_points"]))
     lines.append("\n## Tests")
-    lines.append(f"- Frameworks: {', '.join(tests['frameworks'])}")
-    lines.append(f"- Types: {', '.join(tests['test_types'])}")
+    lines.append(f"- Frameworks: {', '.join(sorted(tests['frameworks']))}")
+    lines.append(f"- Types: {', '.join(sorted(tests['test_types']))}")
     lines.append(f"- Fixtures: {tests['fixtures_found']}")
     lines.append("\n## CI/CD & Build")
     lines.append(f"- CI Tools: {', '.join(ci_cd['tools'])}")
@@ -158,7 +120,7 @@ def generate_summary(readme, structure, tests, ci_cd):
 
 
 # ---------- STEP 3: Call GPT-4o ----------
-def get_test_strategy_from_gpt(summary: str) -> str:
+async def get_test_strategy_from_gpt(client: "AsyncOpenAI", summary: str) -> str:
     prompt = f"""
 You are a senior QA engineer.
 
@@ -178,57 +140,81 @@ Include:
 --- SUMMARY END ---
 """
 
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.4,
         max_tokens=2000
     )
 
-    return response['choices'][0]['message']['content']
-
-def save_pdf_from_text(text: str, output_path: str):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-
-    pdf.set_font("Arial", size=12)
-    lines = text.splitlines()
-    for line in lines:
-        if line.strip().startswith("#"):
-            level = line.count("#")
-            title = line.replace("#", "").strip()
-            font_size = max(16 - level * 2, 10)
-            pdf.set_font("Arial", 'B', size=font_size)
-            pdf.cell(200, 10, txt=title, ln=True)
-            pdf.set_font("Arial", size=12)
-        else:
-            pdf.multi_cell(0, 10, txt=line)
-    pdf.output(output_path)
-
+    return response.choices[0].message.content
+
+async def get_test_strategy(client: "AsyncOpenAI", summary: str) -> str:
+    """Return the cached strategy for this summary, generating it at most once."""
+    key = hashlib.sha256(summary.encode("utf-8")).hexdigest()
+    entry = strategy_cache.get(key)
+    hit = bool(entry and entry.is_valid())
+    record_cache("test_strategy", hit)
+    if hit:
+        return entry.data
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(get_test_strategy_from_gpt(client, summary))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    test_doc = await asyncio.shield(task)
+    strategy_cache[key] = CacheEntry(test_doc, datetime.now())
+    return test_doc
 
 # ---------- FASTAPI Endpoint ----------
-@app.post("/generate-test-doc/")
-async def generate_test_doc(request: RepoRequest, format: str = Query("md", enum=["md", "pdf"])):
-    temp_dir = clone_repo(request.repoUrl, request.patToken)
+async def _document_response(test_doc: str, format: str) -> FileResponse:
+    """Serve the document from the render cache in the requested format."""
+    doc_id = content_hash(test_doc)
+    headers = {"X-Test-Doc-Id": doc_id}
+    if format == "pdf":
+        with span("pdf_render", {"document.chars": len(test_doc)}):
+            output_path = await pdf_renderer.render(test_doc)
+        return FileResponse(output_path, media_type="application/pdf", filename="Test_Strategy.pdf", headers=headers)
+    output_path = await pdf_renderer.store_markdown(test_doc)
+    return FileResponse(output_path, media_type="text/markdown", filename="Test_Strategy.md", headers=headers)
+
+@router.post("/generate-test-doc/")
+async def generate_test_doc(request: RepoRequest, format: str = Query("md", enum=["md", "pdf"]),
+                            client=Depends(get_openai_client)):
+    temp_dir = await clone_repo(request.repoUrl, request.patToken)
     try:
-        readme = analyze_readme(temp_dir)
-        structure = analyze_code_structure(temp_dir)
-        tests = analyze_tests(temp_dir)
-        ci_cd = analyze_ci_cd(temp_dir)
-        summary = generate_summary(readme, structure, tests, ci_cd)
-
-        test_doc = get_test_strategy_from_gpt(summary)
-
-        if format == "pdf":
-            output_path = os.path.join(temp_dir, "Test_Strategy.pdf")
-            save_pdf_from_text(test_doc, output_path)
-            return FileResponse(output_path, media_type="application/pdf", filename="Test_Strategy.pdf")
-        else:
-            output_path = os.path.join(temp_dir, "Test_Strategy.md")
-            with open(output_path, "w") as f:
-                f.write(test_doc)
-            return FileResponse(output_path, media_type="text/markdown", filename="Test_Strategy.md")
-
+        project_name = request.repoUrl.rstrip("/").split("/")[-1].removesuffix(".git")
+        with span("repo_profile") as current:
+            manifest = await manifest_cache.get(temp_dir)
+            profile = await asyncio.to_thread(profile_repository, manifest, project_name)
+            current.set_attribute("repo.files", len(manifest.files))
     finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
\ No newline at end of file
+        await asyncio.to_thread(shutil.rmtree, temp_dir, ignore_errors=True)
+
+    summary = generate_summary(profile["readme"], profile["structure"], profile["tests"], profile["ci_cd"])
+    try:
+        with span("test_strategy", {"summary.chars": len(summary)}):
+            test_doc = await get_test_strategy(client, summary)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Test strategy generation failed: {str(e)}")
+
+    return await _document_response(test_doc, format)
+
+@router.get("/test-doc/{doc_id}")
+async def get_test_doc(doc_id: str, format: str = Query("md", enum=["md", "pdf"])):
+    """Download a previously generated document (see the X-Test-Doc-Id header) in either format."""
+    if not re.fullmatch(r"[0-9a-f]{64}", doc_id):
+        raise HTTPException(status_code=400, detail="Invalid document id")
+    markdown_path = pdf_renderer.cached_path(doc_id, "md")
+    if markdown_path is None:
+        raise HTTPException(status_code=404, detail="Document not found; generate it again")
+    if format == "pdf":
+        pdf_path = pdf_renderer.cached_path(doc_id, "pdf")
+        if pdf_path is None:
+            import aiofiles
+
+            async with aiofiles.open(markdown_path, "r", encoding="utf-8") as f:
+                pdf_path = await pdf_renderer.render(await f.read())
+        return FileResponse(pdf_path, media_type="application/pdf", filename="Test_Strategy.pdf")
+    return FileResponse(markdown_path, media_type="text/markdown", filename="Test_Strategy.md")
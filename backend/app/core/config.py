@@ -1,6 +1,7 @@
 """Configuration management for the application."""
 import os
-from typing import List
+from pathlib import Path
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -19,11 +20,64 @@ class Settings(BaseSettings):
     
     # Environment
     ENV: str = os.getenv("ENV", "development")
+    DATA_DIR: str = str(Path(__file__).resolve().parents[2] / "data")  # Local SQLite stores and caches
+
+    # Tracing (see core/tracing.py)
+    TRACING_EXPORTER: str = "none"  # none, console, file, otlp or "module:factory"
+    TRACING_FILE: str = str(Path(__file__).resolve().parents[2] / "data" / "traces.jsonl")
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    # Startup diagnostics (GET /api/v1/diagnostics/startup, see core/startup.py)
+    DIAGNOSTICS_ENABLED: bool = False  # Requires a logged-in user; refresh spawns a Python interpreter
+    DIAGNOSTICS_REFRESH_INTERVAL_SECONDS: int = 300  # Minimum age of the import profile before a refresh
+
+    # Code quality AI analysis
+    AI_BATCH_TOKEN_BUDGET: int = 1600  # Code tokens per OpenAI call, shared by the files in it
+    AI_MIN_FILE_TOKENS: int = 400  # Smallest useful share of the budget per file
+    METRICS_WORKERS: int = 2  # Processes computing complexity metrics
+    DUPLICATE_MAX_BUCKET: int = 50  # LSH bucket size above which duplicate candidates are sampled
+
+    # Test strategy document rendering
+    PDF_CACHE_DIR: str = str(Path(__file__).resolve().parents[2] / "data" / "documents")
+    PDF_RENDER_WORKERS: int = 2
+    PDF_CACHE_MAX_FILES: int = 500
+
+    # SAST scanning
+    SEMGREP_RULES_DIR: str = str(Path(__file__).resolve().parents[2] / "data" / "semgrep-rules")
+    SEMGREP_RULES_URL: str = "https://semgrep.dev/c/p/{pack}"
+    SEMGREP_RULES_REFRESH_HOURS: int = 24
+    SEMGREP_RULES_AUTO_REFRESH: bool = False  # Off: provision SEMGREP_RULES_DIR; on, packs are fetched from SEMGREP_RULES_URL
+    DEP_AUDIT_CONCURRENCY: int = 4  # Dependency audits (pip-audit / npm audit) running at once
+    SEMGREP_MAX_OUTPUT_MB: int = 256  # Output caps; findings past the cap are dropped, not the scan
+    GITLEAKS_MAX_OUTPUT_MB: int = 64
+    DEP_AUDIT_MAX_OUTPUT_MB: int = 32
+    SECRETS_MIRROR_DIR: str = str(Path(__file__).resolve().parents[2] / "data" / "mirrors")  # Bare clones for history scans
+    SECRETS_MIRROR_MAX_COUNT: int = 200  # Least recently scanned mirrors beyond this are removed
     
     # API Keys
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint (proxy, local stand-in); None uses api.openai.com
     GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")  # Default token for backend operations
 
+    # OpenAI client: one pooled client per process (see utils/openai_client.py)
+    OPENAI_MAX_CONNECTIONS: int = 50
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20  # Idle connections kept open for reuse
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    OPENAI_TIMEOUT_SECONDS: float = 120.0  # Read/write/pool timeout per request
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    OPENAI_MAX_RETRIES: int = 2  # The SDK retries connection errors, 408, 409, 429 and 5xx with backoff
+
+    # Chatbot context retrieval
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    CHAT_CONTEXT_TOP_K: int = 8
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 2000  # Max context tokens sent per question
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500  # Max conversation history tokens sent per question
+    CHAT_SUMMARY_MODEL: str = "gpt-4o-mini"  # Summarizes turns that leave the history window
+    CONVERSATION_CACHE_SIZE: int = 1024  # Conversations kept in memory
+    ANSWER_CACHE_SIZE: int = 512
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_SIMILARITY: float = 0.95  # Cosine similarity for paraphrase hits; 0 disables
+
     # JWT (used by /api/v1/auth/login)
     SECRET_KEY: str = "change-me-in-production"
     ALGORITHM: str = "HS256"
@@ -0,0 +1,26 @@
+"""SQLite helpers for the backend's local stores."""
+import os
+import sqlite3
+
+from .config import settings
+
+
+def db_path(name: str) -> str:
+    """Return the path of a database file inside DATA_DIR."""
+    return os.path.join(settings.DATA_DIR, name)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a SQLite connection configured for concurrent readers and writers.
+
+    WAL mode lets readers proceed while a writer holds the lock, and the busy
+    timeout makes writers from other workers wait instead of failing.
+    Connections are cheap, so callers open one per operation (usually inside
+    asyncio.to_thread) rather than sharing one across threads.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
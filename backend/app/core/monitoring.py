@@ -0,0 +1,189 @@
+"""Prometheus metrics for scans, subprocesses, caches and upstream APIs.
+
+Everything is exported at GET /metrics:
+
+    reviewmate_phase_duration_seconds{scan, phase}      Histogram of each timed scan phase
+    reviewmate_scans_in_flight{scan}                    Scans currently running
+    reviewmate_scans_total{scan, outcome}               Finished scans by outcome (ok/error)
+    reviewmate_subprocesses_running{tool}               Analyzer/git subprocesses running
+    reviewmate_subprocess_duration_seconds{tool}        Histogram of subprocess wall time
+    reviewmate_cache_requests_total{cache, result}      Cache lookups (hit/miss); ratio in PromQL
+    reviewmate_upstream_request_duration_seconds{service, operation}
+    reviewmate_upstream_requests_total{service, operation, status}
+
+With several uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before starting the server. Every worker then writes its samples
+there, and /metrics aggregates all of them, whichever worker serves the request.
+Gauges are summed over live workers.
+
+The same hooks open tracing spans (core/tracing.py): one per scan, subprocess and
+upstream request.
+"""
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import httpx
+from opentelemetry.propagate import inject
+from opentelemetry.trace import Span, SpanKind
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+
+from .tracing import set_error, span
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Scan phases range from milliseconds (aggregation) to minutes (clones, Semgrep, GPT)
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+PHASE_SECONDS = Histogram(
+    "reviewmate_phase_duration_seconds", "Duration of a scan phase",
+    ["scan", "phase"], buckets=PHASE_BUCKETS
+)
+SCANS_IN_FLIGHT = Gauge(
+    "reviewmate_scans_in_flight", "Scans currently running",
+    ["scan"], multiprocess_mode="livesum"
+)
+SCANS_TOTAL = Counter("reviewmate_scans_total", "Finished scans", ["scan", "outcome"])
+SUBPROCESSES_RUNNING = Gauge(
+    "reviewmate_subprocesses_running", "Subprocesses currently running",
+    ["tool"], multiprocess_mode="livesum"
+)
+SUBPROCESS_SECONDS = Histogram(
+    "reviewmate_subprocess_duration_seconds", "Subprocess wall time",
+    ["tool"], buckets=PHASE_BUCKETS
+)
+CACHE_REQUESTS = Counter("reviewmate_cache_requests_total", "Cache lookups", ["cache", "result"])
+UPSTREAM_SECONDS = Histogram(
+    "reviewmate_upstream_request_duration_seconds", "Upstream API latency (to response headers)",
+    ["service", "operation"], buckets=UPSTREAM_BUCKETS
+)
+UPSTREAM_REQUESTS = Counter(
+    "reviewmate_upstream_requests_total", "Upstream API requests",
+    ["service", "operation", "status"]
+)
+
+
+def observe_phases(scan: str, timing: Dict[str, float]) -> None:
+    """Record a scan's timing dict; "_time"/"_seconds" suffixes are dropped from phase names."""
+    for name, seconds in timing.items():
+        phase = name.removesuffix("_time").removesuffix("_seconds")
+        PHASE_SECONDS.labels(scan, phase).observe(seconds)
+
+
+def track_scan(scan: str):
+    """Decorator for scan endpoints: in-flight gauge plus an outcome counter."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            outcome = "error"
+            with SCANS_IN_FLIGHT.labels(scan).track_inprogress(), span(f"scan {scan}", {"scan.type": scan}):
+                try:
+                    result = await func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    SCANS_TOTAL.labels(scan, outcome).inc()
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def track_subprocess(tool: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+    """Count a running subprocess, time it and trace it; usable from threads too.
+
+    Yields the span so callers can add e.g. record_exit(span, returncode).
+    """
+    start = time.perf_counter()
+    SUBPROCESSES_RUNNING.labels(tool).inc()
+    try:
+        with span(f"subprocess {tool}", {"process.executable.name": tool, **(attributes or {})}) as current:
+            yield current
+    finally:
+        SUBPROCESSES_RUNNING.labels(tool).dec()
+        SUBPROCESS_SECONDS.labels(tool).observe(time.perf_counter() - start)
+
+
+def record_exit(current: Span, returncode) -> None:
+    """Attach a subprocess exit code to its span; non-zero codes mark it failed."""
+    if returncode is None or not current.is_recording():
+        return
+    current.set_attribute("process.exit_code", returncode)
+    if returncode != 0:
+        set_error(current, f"exit code {returncode}")
+
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    if count:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records latency and status of every request it sends.
+
+    Each request also gets a client span, and when tracing is on the W3C trace
+    context is injected into the request headers.
+    """
+
+    def __init__(self, service: str, transport: httpx.AsyncBaseTransport):
+        self.service = service
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        operation = request.url.path or "/"
+        status = "error"
+        start = time.perf_counter()
+        with span(f"{self.service} {request.method} {operation}", kind=SpanKind.CLIENT) as current:
+            if current.is_recording():
+                current.set_attributes({
+                    "http.request.method": request.method,
+                    "server.address": request.url.host,
+                    "url.path": operation,
+                    "http.request.body.size": int(request.headers.get("content-length", 0)),
+                })
+                inject(request.headers)
+            try:
+                response = await self.transport.handle_async_request(request)
+                status = str(response.status_code)
+                current.set_attribute("http.response.status_code", response.status_code)
+                if response.status_code >= 400:
+                    set_error(current, f"HTTP {response.status_code}")
+                return response
+            except httpx.TimeoutException:
+                status = "timeout"
+                raise
+            finally:
+                UPSTREAM_SECONDS.labels(self.service, operation).observe(time.perf_counter() - start)
+                UPSTREAM_REQUESTS.labels(self.service, operation, status).inc()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def instrumented_client(service: str, limits: Optional[httpx.Limits] = None, **kwargs) -> httpx.AsyncClient:
+    """httpx.AsyncClient whose requests are recorded under the given service label.
+
+    limits sizes the connection pool; it belongs to the transport, so it has to be
+    given here rather than passed through to the client.
+    """
+    transport = httpx.AsyncHTTPTransport(limits=limits) if limits else httpx.AsyncHTTPTransport()
+    return httpx.AsyncClient(transport=InstrumentedTransport(service, transport), **kwargs)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition payload and content type, aggregated across workers in multiprocess mode."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
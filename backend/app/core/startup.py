@@ -0,0 +1,108 @@
+"""Startup diagnostics: how long the app took to start and what it imported.
+
+Heavy SDKs (openai, faiss, numpy, aiohttp, backoff, aiofiles, jose, tiktoken, fpdf) are
+imported where they are first used rather than at module level, so the server starts
+accepting requests before they load. loaded_heavy_modules() shows which of them this
+process has loaded so far; one showing up right after startup means a module-level
+import crept back in.
+
+mark() records milestones relative to this module's import, which main.py does first:
+"imported" once the app object is built, "ready" when the lifespan startup finishes.
+
+profile_imports() imports the app in a child interpreter under `python -X importtime`
+and summarizes the report: total import time and the modules with the largest
+cumulative and self times. The child costs about a second, so the result is cached
+per process until refreshed, and a refresh is ignored while the cached one is younger
+than min_interval seconds.
+"""
+import asyncio
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+HEAVY_MODULES = ("openai", "faiss", "numpy", "aiohttp", "backoff", "aiofiles", "jose", "tiktoken", "fpdf")
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|( *)(\S+)\s*$")
+
+_started = time.perf_counter()
+_marks: Dict[str, float] = {}
+_profiles: Dict[str, Dict[str, Any]] = {}  # module -> raw report and when it was taken
+_profile_lock = asyncio.Lock()
+
+
+def mark(milestone: str) -> None:
+    """Record a startup milestone (first occurrence only)."""
+    _marks.setdefault(milestone, round(time.perf_counter() - _started, 4))
+
+
+def timings() -> Dict[str, float]:
+    """Seconds from the start of the app import to each milestone."""
+    return dict(_marks)
+
+
+def loaded_heavy_modules() -> Dict[str, bool]:
+    return {name: name in sys.modules for name in HEAVY_MODULES}
+
+
+def parse_importtime(report: str, module: str = "app.main", top: int = 15) -> Dict[str, Any]:
+    """Summarize `-X importtime` output (microsecond self/cumulative times per module)."""
+    entries = []
+    for line in report.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            entries.append((name, int(own) / 1e6, int(cumulative) / 1e6, len(indent) // 2))
+    target = next((e for e in entries if e[0] == module), None)
+
+    def ranked(index: int) -> List[Dict[str, Any]]:
+        ordered = sorted(entries, key=lambda e: e[index], reverse=True)[:top]
+        return [{"module": e[0], "seconds": round(e[index], 4)} for e in ordered]
+
+    return {
+        "module": module,
+        "module_seconds": round(target[2], 4) if target else None,
+        # Top-level entries include the interpreter's own (site, encodings)
+        "total_seconds": round(sum(e[2] for e in entries if e[3] == 0), 4),
+        "modules": len(entries),
+        "heavy_modules": {name: round(next((e[2] for e in entries if e[0] == name), 0.0), 4)
+                          for name in HEAVY_MODULES if any(e[0] == name for e in entries)},
+        "top_cumulative": ranked(2),
+        "top_self": ranked(1),
+    }
+
+
+def profile_age(module: str = "app.main") -> Optional[float]:
+    """Seconds since the cached import profile was taken, or None if there is none."""
+    entry = _profiles.get(module)
+    return time.time() - entry["profiled_at"] if entry else None
+
+
+async def profile_imports(module: str = "app.main", top: int = 15, refresh: bool = False,
+                          min_interval: float = 0) -> Dict[str, Any]:
+    """Import module in a fresh interpreter under -X importtime and summarize it (cached)."""
+    # Not imported at module level, so _started precedes the rest of the app's imports
+    from .monitoring import record_exit, track_subprocess
+
+    async with _profile_lock:
+        # Checked under the lock, so concurrent refreshes start one interpreter
+        age = profile_age(module)
+        if age is None or (refresh and age >= min_interval):
+            with track_subprocess("python", {"process.command": "python -X importtime"}) as current:
+                proc = await asyncio.create_subprocess_exec(
+                    sys.executable, "-X", "importtime", "-c", f"import {module}",
+                    cwd=str(BACKEND_DIR), env=os.environ.copy(),
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+                )
+                _, stderr = await proc.communicate()
+                record_exit(current, proc.returncode)
+            report = stderr.decode(errors="replace")
+            if proc.returncode != 0:
+                last_line = (report.strip().splitlines() or ["no output"])[-1]
+                raise RuntimeError(f"Import profile of {module} failed: {last_line}")
+            _profiles[module] = {"report": report, "profiled_at": time.time()}
+    summary = parse_importtime(_profiles[module]["report"], module, top)
+    summary["profiled_at"] = _profiles[module]["profiled_at"]
+    return summary
@@ -0,0 +1,125 @@
+"""OpenTelemetry tracing for scan pipelines.
+
+Code creates spans with span() below, on the OpenTelemetry API. Until
+configure_tracing() installs an SDK provider, span() hands out the invalid
+(non-recording) span without touching the context, so a disabled span costs about
+one generator step.
+
+TRACING_EXPORTER selects where finished spans go:
+
+    none     Tracing disabled (default); the SDK is never imported
+    console  One JSON document per span on stdout
+    file     One JSON line per span appended to TRACING_FILE, for offline use
+    otlp     OTLP/HTTP, configured with the standard OTEL_EXPORTER_OTLP_* variables
+             (needs opentelemetry-exporter-otlp-proto-http)
+
+Other exporters are plugged in with register_exporter(name, factory), or by setting
+TRACING_EXPORTER to "package.module:factory"; the factory returns a SpanExporter.
+
+FastAPI's built-in telemetry opens the server span of each request (continuing an
+incoming W3C traceparent) on the same global provider, so stage, subprocess and
+upstream spans nest under it. The current span lives in a context variable, so
+asyncio.create_task and asyncio.to_thread carry it into background work.
+Thread-pool executors do not copy context; use to_thread, or wrap the callable
+with contextvars.copy_context().run.
+"""
+import importlib
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from opentelemetry import trace
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+
+from .config import settings
+
+tracer = trace.get_tracer("reviewmate")
+
+_exporters: Dict[str, Callable[[], Any]] = {}
+_provider = None
+
+
+def register_exporter(name: str, factory: Callable[[], Any]) -> None:
+    """Make a SpanExporter factory selectable as TRACING_EXPORTER=name."""
+    _exporters[name] = factory
+
+
+def _console_exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    return ConsoleSpanExporter()
+
+
+def _file_exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    os.makedirs(os.path.dirname(settings.TRACING_FILE) or ".", exist_ok=True)
+    # Line-buffered appends keep lines from several workers intact
+    out = open(settings.TRACING_FILE, "a", buffering=1, encoding="utf-8")
+    return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+
+
+def _otlp_exporter():
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter()
+
+
+register_exporter("console", _console_exporter)
+register_exporter("file", _file_exporter)
+register_exporter("otlp", _otlp_exporter)
+
+
+def configure_tracing() -> None:
+    """Install the SDK provider and the configured exporter; no-op when disabled."""
+    global _provider
+    name = settings.TRACING_EXPORTER
+    if name == "none" or _provider is not None:
+        return
+    try:
+        if ":" in name:
+            module, attr = name.split(":", 1)
+            factory = getattr(importlib.import_module(module), attr)
+        else:
+            factory = _exporters[name]
+        exporter = factory()
+    except Exception as e:
+        print(f"Tracing disabled, exporter {name!r} unavailable: {e}")
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.PROJECT_NAME, "service.version": settings.VERSION}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans."""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None,
+         kind: SpanKind = SpanKind.INTERNAL) -> Iterator[Span]:
+    """Start a child span of the current one; exceptions mark it as failed."""
+    if _provider is None:
+        yield trace.INVALID_SPAN
+        return
+    with tracer.start_as_current_span(name, kind=kind, record_exception=True,
+                                      set_status_on_exception=True) as current:
+        if attributes and current.is_recording():
+            current.set_attributes({k: v for k, v in attributes.items() if v is not None})
+        yield current
+
+
+def set_error(current: Span, description: str) -> None:
+    """Mark a span as failed without an exception (e.g. a non-zero exit code)."""
+    current.set_status(Status(StatusCode.ERROR, description))
@@ -1,13 +1,36 @@
-from fastapi import FastAPI
+from .core import startup  # First, so startup timings cover the whole app import
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .api import chatbot, auth, code_quality, sast_api
+from .core.monitoring import mark_process_dead, render_metrics
+from .core.tracing import configure_tracing, shutdown_tracing
+from .api import chatbot, auth, code_quality, diagnostics, sast_api, test_doc
 from .api.github_api import forks_api, contributors_api, issues_api, pull_requests
+from .utils.pdf_renderer import pdf_renderer
+from .utils.code_metrics import metrics_engine
+from .utils.openai_client import openai_provider
+from .utils.semgrep_rules import rule_packs
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_tracing()
+    rule_packs.start_refresh()
+    startup.mark("ready")
+    yield
+    await rule_packs.stop_refresh()
+    # Stop worker pools owned by the app
+    pdf_renderer.shutdown()
+    metrics_engine.shutdown()
+    await openai_provider.aclose()
+    mark_process_dead()
+    shutdown_tracing()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set up CORS
@@ -28,7 +51,18 @@ app.include_router(contributors_api.router, prefix="/api/v1/github", tags=["gith
 app.include_router(issues_api.router, prefix="/api/v1/github", tags=["github"])
 app.include_router(pull_requests.router, prefix="/api/v1/github", tags=["github"])
 app.include_router(sast_api.router, prefix="/api/v1/sast", tags=["sast"])
+app.include_router(test_doc.router, prefix=f"{settings.API_V1_STR}", tags=["testing"])
+if settings.DIAGNOSTICS_ENABLED:
+    app.include_router(diagnostics.router, prefix=f"{settings.API_V1_STR}/diagnostics", tags=["diagnostics"])
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (see core/monitoring.py)."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to ReviewMate API"} 
\ No newline at end of file
+    return {"message": "Welcome to ReviewMate API"} 
+
+startup.mark("imported")
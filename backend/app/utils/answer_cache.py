@@ -0,0 +1,123 @@
+"""
+Answer Cache for Chatbot
+
+Caches chatbot answers so repeated questions about the same analysis come back
+without a completion call. Entries are keyed by (user, repo, context version,
+normalized question); the context version changes whenever new analysis data is
+stored, so stale answers can never be served, and ContextManager also purges a
+repository's entries as soon as it is updated.
+
+An optional similarity tier embeds the question and reuses an answer whose question
+embedding is at least ANSWER_CACHE_SIMILARITY similar, so paraphrases hit too.
+Entries are evicted least-recently-used beyond ANSWER_CACHE_SIZE and expire after
+ANSWER_CACHE_TTL_SECONDS.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.monitoring import record_cache
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Embedder = Callable[[List[str]], Awaitable["np.ndarray"]]
+VersionKey = Tuple[str, str, Tuple[int, int]]  # (user_id, repo_url, context version)
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+@dataclass
+class _Entry:
+    answer: str
+    created_at: float
+    vector: Optional["np.ndarray"] = None
+
+
+@dataclass
+class CacheLookup:
+    answer: Optional[str]
+    key: Tuple[VersionKey, str]
+    vector: Optional["np.ndarray"] = None
+
+
+class AnswerCache:
+    """LRU/TTL cache of chatbot answers with an optional embedding-similarity tier."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 similarity_threshold: Optional[float] = None):
+        self.max_entries = max_entries or settings.ANSWER_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds or settings.ANSWER_CACHE_TTL_SECONDS
+        self.similarity_threshold = (settings.ANSWER_CACHE_SIMILARITY
+                                     if similarity_threshold is None else similarity_threshold)
+        self._entries: "OrderedDict[Tuple[VersionKey, str], _Entry]" = OrderedDict()
+
+    def _expired(self, entry: _Entry) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl_seconds
+
+    def _get(self, key: Tuple[VersionKey, str]) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def lookup(self, version_key: VersionKey, question: str,
+                     embedder: Optional[Embedder] = None) -> CacheLookup:
+        """Find a cached answer by exact normalized question, then by similarity."""
+        key = (version_key, normalize_question(question))
+        entry = self._get(key)
+        if entry is not None:
+            record_cache("answer", True)
+            return CacheLookup(entry.answer, key, entry.vector)
+
+        if embedder is None or not self.similarity_threshold:
+            record_cache("answer", False)
+            return CacheLookup(None, key)
+        candidates = [(k, e) for k, e in self._entries.items()
+                      if k[0] == version_key and e.vector is not None and not self._expired(e)]
+        try:
+            vector = (await embedder([question]))[0]
+        except Exception as e:
+            print(f"Answer cache embedding error: {e}")
+            record_cache("answer", False)
+            return CacheLookup(None, key)
+        if candidates:
+            import numpy as np
+
+            scores = np.stack([e.vector for _, e in candidates]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                best_key, best_entry = candidates[best]
+                self._entries.move_to_end(best_key)
+                record_cache("answer", True)
+                return CacheLookup(best_entry.answer, key, vector)
+        record_cache("answer", False)
+        return CacheLookup(None, key, vector)
+
+    def put(self, lookup: CacheLookup, answer: str) -> None:
+        """Store the answer for a lookup that missed."""
+        self._entries[lookup.key] = _Entry(answer, time.monotonic(), lookup.vector)
+        self._entries.move_to_end(lookup.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, repo_url: str) -> None:
+        """Drop every cached answer for a repository."""
+        for key in [k for k in self._entries if k[0][:2] == (user_id, repo_url)]:
+            del self._entries[key]
+
+
+# Create a singleton instance
+answer_cache = AnswerCache()
@@ -0,0 +1,186 @@
+"""
+Code Condenser for AI Prompts
+
+Shrinks source files to a token budget while keeping the parts a reviewer needs:
+the lines flagged by linters or TODO/FIXME markers (with a little surrounding
+context), imports, class and function signatures, and the first lines of their
+docstrings. Python is parsed with `ast`; JavaScript/TypeScript use a lightweight
+tokenizer that blanks out strings and comments and tracks brace depth to find
+declarations. Sizes are measured with tiktoken (utils/tokens.py).
+
+Lines are kept whole and in their original order; each gap is replaced by a single
+elision marker, so the model never sees mid-token fragments.
+"""
+
+import ast
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .tokens import count_tokens
+
+FLAG_CONTEXT_LINES = 2
+DOCSTRING_LINES = 3
+TODO_PATTERN = re.compile(r"\b(TODO|FIXME|XXX|HACK)\b", re.IGNORECASE)
+
+# Segment priorities: lower is kept first
+PRIORITY_FLAGGED = 0
+PRIORITY_SIGNATURE = 1
+PRIORITY_IMPORT = 2
+PRIORITY_DOCSTRING = 3
+
+JS_DECLARATION = re.compile(
+    r"^\s*(export\s+)?(default\s+)?(async\s+)?(function\b|class\b|interface\b|type\s+\w+\s*=|enum\b"
+    r"|(const|let|var)\s+\w+\s*=\s*(async\s+)?(\([^)]*\)|\w+)\s*=>"
+    r"|(public|private|protected|static|async|get|set|\s)*\w+\s*\([^)]*\)\s*(:\s*[^{]+)?\{)"
+)
+JS_IMPORT = re.compile(r"^\s*(import\b|export\s+\*|export\s+\{.*\}\s+from\b|(const|let|var)\s+.+=\s*require\()")
+JS_CONTROL = re.compile(r"^\s*(if|for|while|switch|catch|return|else)\b")
+
+Segment = Tuple[int, int, int]  # (priority, first line, last line), 1-based inclusive
+
+
+def comment_prefix(file_path: str) -> str:
+    return "#" if file_path.endswith(".py") else "//"
+
+
+def _python_segments(code: str) -> Optional[List[Segment]]:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    segments: List[Segment] = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            segments.append((PRIORITY_IMPORT, node.lineno, node.end_lineno or node.lineno))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+            body_start = node.body[0].lineno if node.body else node.lineno + 1
+            segments.append((PRIORITY_SIGNATURE, start, max(node.lineno, body_start - 1)))
+            doc = node.body[0] if node.body else None
+            if (isinstance(doc, ast.Expr) and isinstance(doc.value, ast.Constant)
+                    and isinstance(doc.value.value, str)):
+                segments.append((PRIORITY_DOCSTRING, doc.lineno,
+                                 min(doc.end_lineno or doc.lineno, doc.lineno + DOCSTRING_LINES - 1)))
+    if tree.body:
+        doc = tree.body[0]
+        if isinstance(doc, ast.Expr) and isinstance(doc.value, ast.Constant) and isinstance(doc.value.value, str):
+            segments.append((PRIORITY_DOCSTRING, doc.lineno,
+                             min(doc.end_lineno or doc.lineno, doc.lineno + DOCSTRING_LINES - 1)))
+    return segments
+
+
+def strip_js_line(line: str, in_block_comment: bool) -> Tuple[str, bool]:
+    """Blank out string literals and comments so braces can be counted."""
+    out = []
+    i = 0
+    quote = None
+    while i < len(line):
+        ch = line[i]
+        nxt = line[i + 1] if i + 1 < len(line) else ""
+        if in_block_comment:
+            if ch == "*" and nxt == "/":
+                in_block_comment = False
+                i += 1
+        elif quote:
+            if ch == "\\":
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch == "/" and nxt == "/":
+            break
+        elif ch == "/" and nxt == "*":
+            in_block_comment = True
+            i += 1
+        elif ch in "'\"`":
+            quote = ch
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out), in_block_comment
+
+
+def _js_segments(code: str) -> List[Segment]:
+    segments: List[Segment] = []
+    lines = code.splitlines()
+    depth = 0
+    in_block_comment = False
+    doc_start = None
+    for n, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if stripped.startswith("/**"):
+            doc_start = n
+        if doc_start is not None and "*/" in stripped:
+            segments.append((PRIORITY_DOCSTRING, doc_start, min(n, doc_start + DOCSTRING_LINES - 1)))
+            doc_start = None
+
+        code_part, in_block_comment = strip_js_line(line, in_block_comment)
+        if depth <= 2 and code_part.strip():
+            if JS_IMPORT.match(code_part):
+                segments.append((PRIORITY_IMPORT, n, n))
+            elif JS_DECLARATION.match(code_part) and not JS_CONTROL.match(code_part):
+                segments.append((PRIORITY_SIGNATURE, n, n))
+        depth = max(0, depth + code_part.count("{") - code_part.count("}"))
+    return segments
+
+
+def _flagged_segments(lines: List[str], flagged_lines: Iterable[int]) -> List[Segment]:
+    flagged: Set[int] = {n for n in flagged_lines if 0 < n <= len(lines)}
+    flagged.update(n for n, line in enumerate(lines, start=1) if TODO_PATTERN.search(line))
+    return [(PRIORITY_FLAGGED, max(1, n - FLAG_CONTEXT_LINES), min(len(lines), n + FLAG_CONTEXT_LINES))
+            for n in sorted(flagged)]
+
+
+def condense_code(code: str, file_path: str, max_tokens: int,
+                  flagged_lines: Iterable[int] = ()) -> str:
+    """Condense code to at most max_tokens, keeping flagged regions and structure."""
+    if count_tokens(code) <= max_tokens:
+        return code
+
+    lines = code.splitlines()
+    if file_path.endswith(".py"):
+        structural = _python_segments(code)
+        if structural is None:
+            structural = _js_segments(code)
+    else:
+        structural = _js_segments(code)
+    segments = sorted(_flagged_segments(lines, flagged_lines) + structural)
+
+    marker = f"{comment_prefix(file_path)} ..."
+    marker_tokens = count_tokens(marker) + 1
+    line_tokens: Dict[int, int] = {}
+    kept: Set[int] = set()
+    used = 0
+    for _, first, last in segments:
+        new_lines = [n for n in range(first, last + 1) if n not in kept]
+        if not new_lines:
+            continue
+        cost = 0
+        for n in new_lines:
+            if n not in line_tokens:
+                line_tokens[n] = count_tokens(lines[n - 1]) + 1
+            cost += line_tokens[n]
+        # Every kept block may need one elision marker
+        if used + cost + marker_tokens > max_tokens:
+            continue
+        kept.update(new_lines)
+        used += cost + marker_tokens
+
+    if not kept:
+        # Nothing structural fits: keep the head of the file
+        for n, line in enumerate(lines, start=1):
+            cost = count_tokens(line) + 1
+            if used + cost + marker_tokens > max_tokens:
+                break
+            kept.add(n)
+            used += cost
+
+    output: List[str] = []
+    previous = 0
+    for n in sorted(kept):
+        if n != previous + 1:
+            output.append(marker)
+        output.append(lines[n - 1])
+        previous = n
+    if previous < len(lines):
+        output.append(marker)
+    return "\n".join(output)
@@ -3,17 +3,67 @@ Context Manager for Chatbot
 
 This module manages the dynamic context updates for the chatbot based on localStorage data.
 It provides functions to update, validate, and combine context data.
+
+Analysis results are kept per (user, repository) in the ContextStore, one row per
+analysis type, so users analyzing different repositories at the same time never see
+or overwrite each other's data. DynamicContext.md is the markdown template the
+results are rendered into; rendering happens lazily, only when a prompt needs it,
+and the rendered text is cached against the store's version counter.
+
+The base context, the template and each repository's version are kept in memory.
+Files are re-read when their mtime changes and versions are re-checked against the
+store at most every `refresh_interval` seconds, so answering a question does no
+disk I/O in the steady state.
 """
 
+import asyncio
 import json
 import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-import aiofiles
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Tuple
 from pathlib import Path
+from ..core.config import settings
+from .context_store import ContextHead, ContextStore
+from .vector_store import EmbeddingCache, VectorStore
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_USER = "anonymous"
+
+@dataclass
+class _CachedFile:
+    content: str
+    mtime_ns: int
+
+@dataclass
+class _RepoContext:
+    head: ContextHead
+    checked_at: float
+    rendered: Optional[str] = None
+    rendered_key: Optional[Tuple[int, int]] = None
+    vector_store: Optional[VectorStore] = None
+    indexed_key: Optional[Tuple[int, int]] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+def _mtime_ns(path: str) -> int:
+    return os.stat(path).st_mtime_ns
+
+def normalize_repo_url(repo_url: Optional[str]) -> str:
+    """Normalize a repository URL into a context key ("" when unknown)."""
+    if not repo_url:
+        return ""
+    repo_url = str(repo_url).strip().rstrip("/")
+    if repo_url.endswith(".git"):
+        repo_url = repo_url[:-4]
+    return repo_url
 
 class ContextManager:
-    def __init__(self, context_file_path: str = None):
+    def __init__(self, context_file_path: str = None, store: Optional[ContextStore] = None,
+                 max_cached_repos: int = 256):
         base_dir = Path(__file__).parent.parent.parent  # Points to the 'backend' directory
         if context_file_path is None:
             self.context_file_path = str(base_dir / "context" / "DynamicContext.md")
@@ -21,21 +71,100 @@ class ContextManager:
             self.context_file_path = context_file_path
         self.base_context_path = str(base_dir / "context" / "Context.md")
         self.data_freshness_hours = 24
+        self.refresh_interval = 5.0  # Seconds between checks for external changes
+        self.max_cached_repos = max_cached_repos
+        self.store = store or ContextStore()
+        self.files_version = 0  # Bumped whenever the base context or template changes
+        self._files: Dict[str, _CachedFile] = {}
+        self._files_checked_at = 0.0
+        self._files_lock = asyncio.Lock()
+        self._repos: "OrderedDict[Tuple[str, str], _RepoContext]" = OrderedDict()
+        self._latest_repos: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # user -> (repo, checked_at)
+        self._embedding_cache = EmbeddingCache()
+        self._update_listeners: List[Callable[[str, str], None]] = []
 
-    async def update_context(self, analysis_type: str, data: Dict[str, Any]) -> None:
-        """Update the dynamic context with new analysis data."""
-        try:
-            # Read current context
-            async with aiofiles.open(self.context_file_path, 'r') as f:
-                content = await f.read()
+    def add_update_listener(self, listener: Callable[[str, str], None]) -> None:
+        """Call listener(user_id, repo_url) whenever a repository's context is updated."""
+        self._update_listeners.append(listener)
+
+    async def _read_file(self, path: str) -> _CachedFile:
+        import aiofiles
+
+        async with aiofiles.open(path, 'r') as f:
+            content = await f.read()
+        return _CachedFile(content, await asyncio.to_thread(_mtime_ns, path))
+
+    async def _load_files(self) -> None:
+        """Refresh the base context and template if missing or changed on disk."""
+        if self._files and time.monotonic() - self._files_checked_at < self.refresh_interval:
+            return
+        async with self._files_lock:
+            changed = False
+            for path in (self.base_context_path, self.context_file_path):
+                cached = self._files.get(path)
+                if cached is not None and await asyncio.to_thread(_mtime_ns, path) == cached.mtime_ns:
+                    continue
+                self._files[path] = await self._read_file(path)
+                changed = True
+            if changed:
+                self.files_version += 1
+            self._files_checked_at = time.monotonic()
+
+    @property
+    def base_context(self) -> str:
+        return self._files[self.base_context_path].content
+
+    @property
+    def template(self) -> str:
+        return self._files[self.context_file_path].content
+
+    async def _get_repo(self, user_id: str, repo_url: str) -> _RepoContext:
+        """Return the cached state for a (user, repo) pair, re-checking its version when due."""
+        key = (user_id, repo_url)
+        state = self._repos.get(key)
+        if state is None:
+            state = _RepoContext(head=await self.store.get_head(user_id, repo_url), checked_at=time.monotonic())
+            self._repos[key] = state
+            while len(self._repos) > self.max_cached_repos:
+                self._repos.popitem(last=False)
+        elif time.monotonic() - state.checked_at >= self.refresh_interval:
+            head = await self.store.get_head(user_id, repo_url)
+            if head.version != state.head.version:
+                state.head = head
+            state.checked_at = time.monotonic()
+        self._repos.move_to_end(key)
+        return state
+
+    async def resolve_repo(self, user_id: str, repo_url: Optional[str]) -> str:
+        """Use the given repository, or the one the user analyzed most recently."""
+        repo_url = normalize_repo_url(repo_url)
+        if repo_url:
+            return repo_url
+        # Served from memory; re-checked like repository heads, for writes by other workers
+        cached = self._latest_repos.get(user_id)
+        if cached is not None and time.monotonic() - cached[1] < self.refresh_interval:
+            self._latest_repos.move_to_end(user_id)
+            return cached[0]
+        latest = await self.store.latest_repo(user_id) or ""
+        self._remember_latest_repo(user_id, latest)
+        return latest
+
+    def _remember_latest_repo(self, user_id: str, repo_url: str) -> None:
+        self._latest_repos[user_id] = (repo_url, time.monotonic())
+        self._latest_repos.move_to_end(user_id)
+        while len(self._latest_repos) > self.max_cached_repos:
+            self._latest_repos.popitem(last=False)
 
-            # Update repository information
-            repo_info = {
-                "repoUrl": data.get("repoUrl"),
-                "lastAnalyzed": datetime.now().isoformat(),
-                "analysisType": analysis_type
-            }
+    async def get_version(self, user_id: str = DEFAULT_USER, repo_url: Optional[str] = None) -> Tuple[int, int]:
+        """Return the (files, repository) version pair the rendered context is based on."""
+        await self._load_files()
+        state = await self._get_repo(user_id, normalize_repo_url(repo_url))
+        return self.files_version, state.head.version
 
+    async def update_context(self, analysis_type: str, data: Dict[str, Any],
+                             user_id: str = DEFAULT_USER) -> None:
+        """Update the dynamic context with new analysis data."""
+        try:
             # Update specific analysis section
             if analysis_type == "code_quality":
                 section_data = self._format_code_quality_data(data)
@@ -46,45 +175,51 @@ class ContextManager:
             else:
                 raise ValueError(f"Unknown analysis type: {analysis_type}")
 
-            # Update the context file
-            updated_content = self._update_context_section(content, analysis_type, section_data)
-            updated_content = self._update_repo_info(updated_content, repo_info)
+            # Atomic per-section upsert; other sections are left untouched
+            repo_url = normalize_repo_url(data.get("repoUrl"))
+            version, analyzed_at = await self.store.upsert_section(
+                user_id, repo_url, analysis_type, section_data, analysis_type
+            )
 
-            # Write back to file
-            async with aiofiles.open(self.context_file_path, 'w') as f:
-                await f.write(updated_content)
+            self._remember_latest_repo(user_id, repo_url)
+            state = await self._get_repo(user_id, repo_url)
+            if version > state.head.version:
+                state.head = ContextHead(version, analyzed_at, analysis_type)
+                state.checked_at = time.monotonic()
+            for listener in self._update_listeners:
+                listener(user_id, repo_url)
 
         except Exception as e:
             print(f"Error updating context: {e}")
             raise
 
-    def _format_code_quality_data(self, data: Dict[str, Any]) -> str:
+    def _format_code_quality_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Format code quality data for context update."""
-        return json.dumps({
+        return {
             "files_analyzed": data.get("files_analyzed", {}),
             "issues": data.get("issues", {}),
             "top_issues": data.get("top_issues", []),
             "quality_score": data.get("quality_score"),
             "timing": data.get("timing", {})
-        }, indent=4)
+        }
 
-    def _format_security_data(self, data: Dict[str, Any]) -> str:
+    def _format_security_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Format security analysis data for context update."""
-        return json.dumps({
+        return {
             "vulnerabilities": data.get("vulnerabilities", {}),
             "secrets_found": data.get("secrets_found"),
             "dependency_issues": data.get("dependency_issues"),
             "top_risky_files": data.get("top_risky_files", [])
-        }, indent=4)
+        }
 
-    def _format_github_data(self, data: Dict[str, Any]) -> str:
+    def _format_github_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Format GitHub insights data for context update."""
-        return json.dumps({
+        return {
             "forks": data.get("forks"),
             "contributors": data.get("contributors", []),
             "issues": data.get("issues", {}),
             "pull_requests": data.get("pull_requests", {})
-        }, indent=4)
+        }
 
     def _update_context_section(self, content: str, analysis_type: str, section_data: str) -> str:
         """Update a specific section in the context file."""
@@ -112,7 +247,7 @@ class ContextManager:
         """Update repository information in the context file."""
         start_marker = "### Repository Information"
         end_marker = "### Code Quality Analysis"
-        
+
         start_idx = content.find(start_marker)
         end_idx = content.find(end_marker)
 
@@ -122,56 +257,112 @@ class ContextManager:
         new_section = f"{start_marker}\n```json\n{json.dumps(repo_info, indent=4)}\n```\n"
         return content[:start_idx] + new_section + content[end_idx:]
 
-    async def is_data_fresh(self) -> bool:
+    async def _render(self, user_id: str, repo_url: str, state: _RepoContext) -> str:
+        """Render the stored sections into the markdown template, reusing the cached view."""
+        key = (self.files_version, state.head.version)
+        if state.rendered is not None and state.rendered_key == key:
+            return state.rendered
+        async with state.lock:
+            key = (self.files_version, state.head.version)
+            if state.rendered is not None and state.rendered_key == key:
+                return state.rendered
+
+            content = self.template
+            if state.head.version:
+                snapshot = await self.store.get_snapshot(user_id, repo_url)
+                for analysis_type, section_data in snapshot.sections.items():
+                    content = self._update_context_section(content, analysis_type, json.dumps(section_data, indent=4))
+                content = self._update_repo_info(content, {
+                    "repoUrl": repo_url or None,
+                    "lastAnalyzed": snapshot.head.last_analyzed.isoformat(),
+                    "analysisType": snapshot.head.analysis_type
+                })
+                if snapshot.head.version > state.head.version:
+                    state.head = snapshot.head
+                key = (self.files_version, snapshot.head.version)
+
+            state.rendered, state.rendered_key = content, key
+            return content
+
+    async def is_data_fresh(self, user_id: str = DEFAULT_USER, repo_url: Optional[str] = None) -> bool:
         """Check if the current context data is fresh."""
         try:
-            async with aiofiles.open(self.context_file_path, 'r') as f:
-                content = await f.read()
-
-            # Extract lastAnalyzed timestamp
-            start_marker = '"lastAnalyzed": "'
-            end_marker = '"'
-            start_idx = content.find(start_marker)
-            if start_idx == -1:
+            state = await self._get_repo(user_id, normalize_repo_url(repo_url))
+            last_analyzed = state.head.last_analyzed
+            if last_analyzed is None:
                 return False
-
-            start_idx += len(start_marker)
-            end_idx = content.find(end_marker, start_idx)
-            if end_idx == -1:
-                return False
-
-            last_analyzed = datetime.fromisoformat(content[start_idx:end_idx])
             return datetime.now() - last_analyzed < timedelta(hours=self.data_freshness_hours)
 
         except Exception:
             return False
 
-    async def get_combined_context(self) -> str:
+    async def get_combined_context(self, user_id: str = DEFAULT_USER, repo_url: Optional[str] = None) -> str:
         """Combine base context with dynamic context."""
         try:
-            async with aiofiles.open(self.base_context_path, 'r') as f:
-                base_context = await f.read()
-            async with aiofiles.open(self.context_file_path, 'r') as f:
-                dynamic_context = await f.read()
+            await self._load_files()
+            repo_url = normalize_repo_url(repo_url)
+            state = await self._get_repo(user_id, repo_url)
+            dynamic_context = await self._render(user_id, repo_url, state)
 
             # Add dynamic context after the base context
-            return f"{base_context}\n\n## Current Analysis Context\n\n{dynamic_context}"
+            return f"{self.base_context}\n\n## Current Analysis Context\n\n{dynamic_context}"
 
         except Exception as e:
             print(f"Error combining contexts: {e}")
-            return base_context  # Fallback to base context only
+            cached = self._files.get(self.base_context_path)
+            return cached.content if cached else ""  # Fallback to base context only
+
+    async def get_relevant_context(self, question: str, user_id: str = DEFAULT_USER,
+                                   repo_url: Optional[str] = None,
+                                   question_vector: Optional["np.ndarray"] = None) -> str:
+        """Retrieve the context chunks most relevant to a question within the token budget.
+
+        Pass question_vector when the question is already embedded so it is not embedded twice.
+        """
+        await self._load_files()
+        repo_url = normalize_repo_url(repo_url)
+        state = await self._get_repo(user_id, repo_url)
+        dynamic_context = await self._render(user_id, repo_url, state)
+
+        # Rebuild the repository's index if the rendered context moved on
+        if state.vector_store is None:
+            state.vector_store = VectorStore(embedding_cache=self._embedding_cache)
+        if state.indexed_key != state.rendered_key:
+            key = state.rendered_key
+            await state.vector_store.rebuild({"base": self.base_context, "analysis": dynamic_context})
+            state.indexed_key = key
+
+        chunks = await state.vector_store.search(
+            question,
+            top_k=settings.CHAT_CONTEXT_TOP_K,
+            token_budget=settings.CHAT_CONTEXT_TOKEN_BUDGET,
+            pinned_headings=("Repository Information",),
+            query_vector=question_vector
+        )
+        if not chunks:
+            raise ValueError("No context chunks retrieved")
+
+        base_chunks = [c.text for c in chunks if c.source == "base"]
+        analysis_chunks = [c.text for c in chunks if c.source == "analysis"]
+        return "\n\n".join(base_chunks) + "\n\n## Current Analysis Context\n\n" + "\n\n".join(analysis_chunks)
 
-    async def get_context_for_question(self, question: str) -> str:
+    async def get_context_for_question(self, question: str, user_id: str = DEFAULT_USER,
+                                       repo_url: Optional[str] = None,
+                                       question_vector: Optional["np.ndarray"] = None) -> str:
         """Get relevant context for a specific question."""
         try:
-            combined_context = await self.get_combined_context()
+            try:
+                context = await self.get_relevant_context(question, user_id, repo_url, question_vector)
+            except Exception as e:
+                print(f"Context retrieval unavailable, using full context: {e}")
+                context = await self.get_combined_context(user_id, repo_url)
             # Check data freshness
-            if not await self.is_data_fresh():
-                combined_context += "\n\nNote: The following data may be stale, but it is the latest available. Please re-run analysis for the most up-to-date information. Still, always use the numbers and details below to answer the user's question."
-            return combined_context
+            if not await self.is_data_fresh(user_id, repo_url):
+                context += "\n\nNote: The following data may be stale, but it is the latest available. Please re-run analysis for the most up-to-date information. Still, always use the numbers and details below to answer the user's question."
+            return context
         except Exception as e:
             print(f"Error getting context for question: {e}")
-            return await self.get_combined_context()  # Fallback to full context
+            return await self.get_combined_context(user_id, repo_url)  # Fallback to full context
 
 # Create a singleton instance
-context_manager = ContextManager() 
\ No newline at end of file
+context_manager = ContextManager()
@@ -0,0 +1,174 @@
+"""
+Context Store for Chatbot
+
+Stores analysis results per (user, repository) in SQLite instead of splicing them
+into one shared markdown file. Every analysis type is its own row, written with an
+atomic upsert, so concurrent updates from different analyses (or different workers)
+never overwrite each other. Each (user, repository) pair carries a version number
+that is bumped in the same transaction, which lets readers cache rendered context
+and only reload it when the version moves.
+
+Section data is stored as compact JSON; the markdown view the chatbot needs is
+rendered by ContextManager only when a prompt asks for it.
+"""
+
+import asyncio
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.database import connect, db_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS context_heads (
+    user_id TEXT NOT NULL,
+    repo_url TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    last_analyzed TEXT NOT NULL,
+    analysis_type TEXT NOT NULL,
+    PRIMARY KEY (user_id, repo_url)
+);
+CREATE TABLE IF NOT EXISTS context_sections (
+    user_id TEXT NOT NULL,
+    repo_url TEXT NOT NULL,
+    section TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, repo_url, section)
+);
+CREATE INDEX IF NOT EXISTS idx_context_heads_user ON context_heads (user_id, last_analyzed);
+"""
+
+
+@dataclass
+class ContextHead:
+    version: int
+    last_analyzed: Optional[datetime]
+    analysis_type: Optional[str] = None
+
+
+@dataclass
+class ContextSnapshot:
+    head: ContextHead
+    sections: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+class ContextStore:
+    """Per-(user, repo) analysis sections with atomic upserts and a version counter."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or db_path("context.db")
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect(self.path)
+        if not self._initialized:
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _upsert_section(self, user_id: str, repo_url: str, section: str,
+                        data: Dict[str, Any], analysis_type: str, analyzed_at: datetime) -> int:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """INSERT INTO context_sections (user_id, repo_url, section, data, updated_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (user_id, repo_url, section)
+                   DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at""",
+                (user_id, repo_url, section, _dumps(data), analyzed_at.isoformat())
+            )
+            conn.execute(
+                """INSERT INTO context_heads (user_id, repo_url, version, last_analyzed, analysis_type)
+                   VALUES (?, ?, 1, ?, ?)
+                   ON CONFLICT (user_id, repo_url)
+                   DO UPDATE SET version = version + 1,
+                                 last_analyzed = excluded.last_analyzed,
+                                 analysis_type = excluded.analysis_type""",
+                (user_id, repo_url, analyzed_at.isoformat(), analysis_type)
+            )
+            version = conn.execute(
+                "SELECT version FROM context_heads WHERE user_id = ? AND repo_url = ?",
+                (user_id, repo_url)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+            return version
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _get_head(self, user_id: str, repo_url: str) -> ContextHead:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT version, last_analyzed, analysis_type FROM context_heads WHERE user_id = ? AND repo_url = ?",
+                (user_id, repo_url)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return ContextHead(version=0, last_analyzed=None)
+        return ContextHead(row[0], datetime.fromisoformat(row[1]), row[2])
+
+    def _get_snapshot(self, user_id: str, repo_url: str) -> ContextSnapshot:
+        conn = self._connect()
+        try:
+            # Read head and sections from one snapshot so they agree on the version
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT version, last_analyzed, analysis_type FROM context_heads WHERE user_id = ? AND repo_url = ?",
+                (user_id, repo_url)
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT section, data FROM context_sections WHERE user_id = ? AND repo_url = ?",
+                (user_id, repo_url)
+            ).fetchall()
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if row is None:
+            return ContextSnapshot(ContextHead(version=0, last_analyzed=None))
+        head = ContextHead(row[0], datetime.fromisoformat(row[1]), row[2])
+        return ContextSnapshot(head, {section: json.loads(data) for section, data in rows})
+
+    def _latest_repo(self, user_id: str) -> Optional[str]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT repo_url FROM context_heads WHERE user_id = ? ORDER BY last_analyzed DESC LIMIT 1",
+                (user_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    async def upsert_section(self, user_id: str, repo_url: str, section: str,
+                             data: Dict[str, Any], analysis_type: str,
+                             analyzed_at: Optional[datetime] = None) -> Tuple[int, datetime]:
+        """Atomically replace one section and bump the version. Returns (version, analyzed_at)."""
+        analyzed_at = analyzed_at or datetime.now()
+        version = await asyncio.to_thread(
+            self._upsert_section, user_id, repo_url, section, data, analysis_type, analyzed_at
+        )
+        return version, analyzed_at
+
+    async def get_head(self, user_id: str, repo_url: str) -> ContextHead:
+        """Return the version and last analysis time for a (user, repo) pair."""
+        return await asyncio.to_thread(self._get_head, user_id, repo_url)
+
+    async def get_snapshot(self, user_id: str, repo_url: str) -> ContextSnapshot:
+        """Return the head and all sections for a (user, repo) pair."""
+        return await asyncio.to_thread(self._get_snapshot, user_id, repo_url)
+
+    async def latest_repo(self, user_id: str) -> Optional[str]:
+        """Return the repository the user analyzed most recently."""
+        return await asyncio.to_thread(self._latest_repo, user_id)
@@ -0,0 +1,237 @@
+"""
+Conversation Store for Chatbot
+
+Keeps chat history so follow-up questions are answered with the earlier turns in
+mind. Conversations live in an in-memory LRU backed by SQLite, so active
+conversations are served from memory and survive restarts and other workers.
+
+Prompts never grow without limit: each request gets the most recent turns that fit
+CHAT_HISTORY_TOKEN_BUDGET, and turns that fall out of that window are folded into a
+running summary by a small completion call that runs after the answer is sent.
+"""
+
+import asyncio
+import sqlite3
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.database import connect, db_path
+from .tokens import count_tokens, truncate_to_tokens
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    repo_url TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_turns INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversation_turns (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+);
+"""
+
+SUMMARY_MAX_TOKENS = 200
+
+
+@dataclass
+class Turn:
+    role: str
+    content: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    id: str
+    user_id: str
+    repo_url: str
+    summary: str = ""
+    summarized_turns: int = 0  # Turns [0, summarized_turns) are covered by the summary
+    turns: List[Turn] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ConversationStore:
+    """LRU of active conversations in front of a SQLite history table."""
+
+    def __init__(self, path: Optional[str] = None, max_cached: Optional[int] = None):
+        self.path = path or db_path("conversations.db")
+        self.max_cached = max_cached or settings.CONVERSATION_CACHE_SIZE
+        self._cache: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect(self.path)
+        if not self._initialized:
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT user_id, repo_url, summary, summarized_turns FROM conversations WHERE id = ?",
+                (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            turns = conn.execute(
+                "SELECT role, content, tokens FROM conversation_turns WHERE conversation_id = ? ORDER BY seq",
+                (conversation_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return Conversation(conversation_id, row[0], row[1], row[2], row[3],
+                            [Turn(role, content, tokens) for role, content, tokens in turns])
+
+    def _save_turns(self, conversation: Conversation, turns: List[Turn]) -> None:
+        """Append turns; seq is assigned in the transaction, so workers never overwrite each other."""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """INSERT INTO conversations (id, user_id, repo_url, updated_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (id) DO UPDATE SET updated_at = excluded.updated_at""",
+                (conversation.id, conversation.user_id, conversation.repo_url, now)
+            )
+            first_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM conversation_turns WHERE conversation_id = ?",
+                (conversation.id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO conversation_turns VALUES (?, ?, ?, ?, ?, ?)",
+                [(conversation.id, first_seq + i, t.role, t.content, t.tokens, now) for i, t in enumerate(turns)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _save_summary(self, conversation_id: str, summary: str, summarized_turns: int) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE conversations SET summary = ?, summarized_turns = ? WHERE id = ?",
+                (summary, summarized_turns, conversation_id)
+            )
+        finally:
+            conn.close()
+
+    def _remember(self, conversation: Conversation) -> None:
+        self._cache[conversation.id] = conversation
+        self._cache.move_to_end(conversation.id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    async def get_or_create(self, conversation_id: Optional[str], user_id: str, repo_url: str) -> Conversation:
+        """Return the user's conversation about repo_url, or start a new one.
+
+        An id that is unknown, or belongs to another user or repository, starts a new
+        conversation rather than mixing histories.
+        """
+        conversation = None
+        if conversation_id and conversation_id != "new":
+            conversation = self._cache.get(conversation_id)
+            if conversation is None:
+                conversation = await asyncio.to_thread(self._load, conversation_id)
+        if conversation is None or conversation.user_id != user_id or conversation.repo_url != repo_url:
+            conversation = Conversation(uuid.uuid4().hex, user_id, repo_url)
+        self._remember(conversation)
+        return conversation
+
+    async def append(self, conversation: Conversation, question: str, answer: str) -> None:
+        """Record a question/answer exchange."""
+        turns = [Turn("user", question, count_tokens(question)),
+                 Turn("assistant", answer, count_tokens(answer))]
+        async with conversation.lock:
+            conversation.turns.extend(turns)
+        await asyncio.to_thread(self._save_turns, conversation, turns)
+
+    def history_window(self, conversation: Conversation, token_budget: Optional[int] = None) -> Tuple[str, List[Turn], int]:
+        """Return (summary, recent turns, index of first recent turn) within the token budget.
+
+        The summary is counted against the budget first; then turns are added from the
+        newest backwards until the next one would not fit.
+        """
+        budget = token_budget if token_budget is not None else settings.CHAT_HISTORY_TOKEN_BUDGET
+        summary = truncate_to_tokens(conversation.summary, SUMMARY_MAX_TOKENS * 2)
+        used = count_tokens(summary)
+        start = len(conversation.turns)
+        while start > conversation.summarized_turns:
+            turn = conversation.turns[start - 1]
+            if used + turn.tokens > budget:
+                break
+            used += turn.tokens
+            start -= 1
+        return summary, conversation.turns[start:], start
+
+    def history_messages(self, conversation: Conversation) -> List[Dict[str, str]]:
+        """Build the chat messages carrying the conversation so far."""
+        summary, turns, _ = self.history_window(conversation)
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        messages.extend({"role": t.role, "content": t.content} for t in turns)
+        return messages
+
+    async def compact(self, conversation: Conversation, client: "AsyncOpenAI") -> None:
+        """Fold turns that no longer fit the history window into the running summary.
+
+        The lock is only held to snapshot the overflow and to swap the summary in, not
+        during the model call, so new turns can be appended meanwhile. The summary is
+        discarded if another compaction moved the summary on first.
+        """
+        async with conversation.lock:
+            _, _, window_start = self.history_window(conversation)
+            summarized_turns, previous_summary = conversation.summarized_turns, conversation.summary
+            if window_start <= summarized_turns:
+                return
+            overflow = conversation.turns[summarized_turns:window_start]
+        transcript = "\n".join(f"{t.role}: {t.content}" for t in overflow)
+        prompt = (
+            "Update the running summary of a conversation about code analysis results. "
+            "Keep repository names, numbers and open questions.\n\n"
+            f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        try:
+            response = await client.chat.completions.create(
+                model=settings.CHAT_SUMMARY_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=SUMMARY_MAX_TOKENS,
+                temperature=0.2
+            )
+            summary = response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Conversation summary error: {e}")
+            # Keep the prompt bounded even without a summary: drop the oldest turns
+            summary = previous_summary
+        async with conversation.lock:
+            # Turns are append-only, so an unchanged summary means an unchanged prefix
+            if (conversation.summarized_turns, conversation.summary) != (summarized_turns, previous_summary):
+                return
+            conversation.summary = summary
+            conversation.summarized_turns = window_start
+        await asyncio.to_thread(self._save_summary, conversation.id, summary, window_start)
+
+
+# Create a singleton instance
+conversation_store = ConversationStore()
@@ -0,0 +1,265 @@
+"""
+Near-Duplicate Code Detector
+
+Finds copied and lightly edited code across a whole repository in roughly linear
+time, replacing pylint's quadratic duplicate-code check.
+
+    1. Each source file is reduced to a normalized token stream: comments are dropped,
+       identifiers become ID, numbers NUM and string literals STR, so renamed copies
+       still match. Keywords and operators are kept as they are.
+    2. Overlapping k-token shingles are hashed to 32 bits, for the whole file and for
+       fixed windows of lines (blocks).
+    3. MinHash signatures are computed with NumPy, all permutations at once.
+    4. Signatures are split into LSH bands; only documents that share a band bucket
+       are compared, and candidates are kept if their estimated Jaccard similarity
+       reaches the threshold. Boilerplate (license headers, generated or vendored code)
+       can put hundreds of blocks in one bucket; past DUPLICATE_MAX_BUCKET members each
+       one is only compared with the next DUPLICATE_MAX_BUCKET, which keeps the cost
+       linear and still chains identical copies into one group.
+
+DuplicateIndex holds signatures for any number of documents, so the same index can
+be fed files from several repositories for cross-repo copy detection.
+"""
+
+import os
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from .repo_manifest import RepoManifest
+
+SOURCE_EXTENSIONS = (".py", ".js", ".ts", ".jsx", ".tsx")
+MAX_FILE_BYTES = 1_000_000
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: candidate pairs start around 0.7 similarity
+THRESHOLD = 0.8
+MIN_FILE_TOKENS = 50
+BLOCK_LINES = 20
+BLOCK_STEP = 10
+MIN_BLOCK_TOKENS = 60
+
+_PRIME = np.uint64(4294967311)  # Smallest prime above 2**32
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+
+TOKEN_PATTERN = re.compile(
+    r"(?P<comment>#[^\n]*|//[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>\"\"\".*?\"\"\"|'''.*?'''|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)"
+    r"|(?P<number>\b\d[\w.]*)"
+    r"|(?P<name>[A-Za-z_$][\w$]*)"
+    r"|(?P<op>[^\s\w])",
+    re.DOTALL,
+)
+KEYWORDS = {
+    # Python
+    "def", "class", "return", "if", "elif", "else", "for", "while", "try", "except", "finally",
+    "with", "as", "import", "from", "lambda", "yield", "async", "await", "raise", "pass", "break",
+    "continue", "in", "is", "not", "and", "or", "None", "True", "False", "self",
+    # JavaScript / TypeScript
+    "function", "const", "let", "var", "new", "this", "switch", "case", "default", "catch",
+    "throw", "typeof", "instanceof", "export", "extends", "interface", "type", "null",
+    "undefined", "true", "false",
+}
+
+
+@dataclass
+class DocumentSpan:
+    path: str
+    start_line: int
+    end_line: int
+
+
+def normalize_tokens(code: str) -> List[Tuple[str, int]]:
+    """Normalized (token, line) pairs with comments removed and names abstracted."""
+    tokens: List[Tuple[str, int]] = []
+    line = 1
+    position = 0
+    for match in TOKEN_PATTERN.finditer(code):
+        line += code.count("\n", position, match.start())
+        position = match.start()
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "string":
+            tokens.append(("STR", line))
+        elif kind == "number":
+            tokens.append(("NUM", line))
+        elif kind == "name":
+            tokens.append((text if text in KEYWORDS else "ID", line))
+        elif kind == "op":
+            tokens.append((text, line))
+    return tokens
+
+
+def shingle_hashes(tokens: List[str], k: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of every k-token shingle, deduplicated."""
+    if len(tokens) < k:
+        return np.empty(0, dtype=np.uint64)
+    hashes = {zlib.crc32(" ".join(tokens[i:i + k]).encode()) for i in range(len(tokens) - k + 1)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """MinHash signature over all permutations in one vectorized pass."""
+    # a < 2**31 and x < 2**32 keep a * x + b inside uint64
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+class DuplicateIndex:
+    """MinHash signatures of documents with LSH banding for candidate search."""
+
+    def __init__(self, bands: int = BANDS, threshold: float = THRESHOLD, max_bucket: Optional[int] = None):
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.threshold = threshold
+        self.max_bucket = max_bucket or settings.DUPLICATE_MAX_BUCKET
+        self.capped_buckets = 0  # Buckets above max_bucket in the last candidate_pairs() run
+        self.spans: List[DocumentSpan] = []
+        self._signatures: List[np.ndarray] = []
+
+    def add(self, span: DocumentSpan, hashes: np.ndarray) -> None:
+        if hashes.size:
+            self.spans.append(span)
+            self._signatures.append(minhash(hashes))
+
+    def add_source(self, path: str, code: str) -> None:
+        """Index a file as a whole and as overlapping blocks of lines."""
+        tokens = normalize_tokens(code)
+        if len(tokens) < MIN_FILE_TOKENS:
+            return
+        last_line = tokens[-1][1]
+        self.add(DocumentSpan(path, 0, 0), shingle_hashes([t for t, _ in tokens]))
+        if last_line <= BLOCK_LINES:
+            return
+        by_line: Dict[int, List[str]] = defaultdict(list)
+        for token, line in tokens:
+            by_line[line].append(token)
+        for start in range(1, last_line - BLOCK_LINES + 2, BLOCK_STEP):
+            end = start + BLOCK_LINES - 1
+            block = [t for n in range(start, end + 1) for t in by_line.get(n, ())]
+            if len(block) >= MIN_BLOCK_TOKENS:
+                self.add(DocumentSpan(path, start, end), shingle_hashes(block))
+
+    def candidate_pairs(self) -> Iterable[Tuple[int, int, float]]:
+        """Yield (i, j, estimated similarity) for documents above the threshold."""
+        if not self._signatures:
+            return
+        signatures = np.vstack(self._signatures)
+        seen = set()
+        self.capped_buckets = 0
+        for band in range(self.bands):
+            rows = np.ascontiguousarray(signatures[:, band * self.rows:(band + 1) * self.rows])
+            buckets: Dict[bytes, List[int]] = defaultdict(list)
+            for i, key in enumerate(rows.view(f"V{rows.shape[1] * rows.itemsize}").ravel()):
+                buckets[key.tobytes()].append(i)
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                # All pairs in small buckets; a sliding window in oversized ones
+                window = len(members)
+                if window > self.max_bucket:
+                    window = self.max_bucket
+                    self.capped_buckets += 1
+                for x, i in enumerate(members):
+                    for j in members[x + 1:x + 1 + window]:
+                        if (i, j) in seen:
+                            continue
+                        seen.add((i, j))
+                        similarity = float(np.mean(signatures[i] == signatures[j]))
+                        if similarity >= self.threshold:
+                            yield i, j, similarity
+
+
+def _group(pairs: List[Tuple[str, str]]) -> List[List[str]]:
+    """Union-find over duplicate file pairs."""
+    parent: Dict[str, str] = {}
+
+    def find(x: str) -> str:
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        parent[find(a)] = find(b)
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for x in parent:
+        groups[find(x)].append(x)
+    return sorted(sorted(g) for g in groups.values())
+
+
+def _merge_blocks(blocks: List[Tuple[DocumentSpan, DocumentSpan, float]]) -> List[Dict]:
+    """Collapse overlapping windows of the same copied region into one entry."""
+    merged: List[List] = []
+    for a, b, similarity in sorted(blocks, key=lambda x: (x[0].path, x[1].path, x[0].start_line, x[1].start_line)):
+        last = merged[-1] if merged else None
+        if (last and last[0].path == a.path and last[1].path == b.path
+                and a.start_line <= last[0].end_line + 1 and last[1].start_line <= b.start_line <= last[1].end_line + 1):
+            last[0] = DocumentSpan(a.path, last[0].start_line, max(last[0].end_line, a.end_line))
+            last[1] = DocumentSpan(b.path, last[1].start_line, max(last[1].end_line, b.end_line))
+            last[2] = min(last[2], similarity)
+        else:
+            merged.append([a, b, similarity])
+    merged.sort(key=lambda x: (x[0].end_line - x[0].start_line, x[2]), reverse=True)
+    return [
+        {"files": [f"{a.path}:{a.start_line}-{a.end_line}", f"{b.path}:{b.start_line}-{b.end_line}"],
+         "similarity": round(similarity, 2)}
+        for a, b, similarity in merged
+    ]
+
+
+def candidate_files(manifest: RepoManifest) -> List[str]:
+    """First-party source files from the repository manifest worth indexing."""
+    return [f.path for f in manifest.source_files()
+            if f.extension in SOURCE_EXTENSIONS and f.size <= MAX_FILE_BYTES]
+
+
+def find_duplicates(repo_dir: str, paths: List[str], index: Optional[DuplicateIndex] = None) -> Dict[str, list]:
+    """Index the given source files (relative paths) and report near-duplicate files and blocks."""
+    index = index or DuplicateIndex()
+    for rel_path in paths:
+        try:
+            with open(os.path.join(repo_dir, rel_path), "r", encoding="utf-8", errors="ignore") as f:
+                code = f.read()
+        except OSError:
+            continue
+        index.add_source(rel_path, code)
+
+    file_pairs: List[Tuple[str, str]] = []
+    similarities: Dict[frozenset, float] = {}
+    blocks = []
+    for i, j, similarity in index.candidate_pairs():
+        a, b = index.spans[i], index.spans[j]
+        if a.path == b.path:
+            continue
+        if a.start_line == 0 and b.start_line == 0:
+            file_pairs.append((a.path, b.path))
+            similarities[frozenset((a.path, b.path))] = similarity
+        elif a.start_line and b.start_line:
+            if a.path > b.path:
+                a, b = b, a
+            blocks.append((a, b, similarity))
+
+    groups = _group(file_pairs)
+    duplicated = {path for group in groups for path in group}
+    # Blocks inside files that are already whole-file duplicates add nothing
+    blocks = _merge_blocks([x for x in blocks if not (x[0].path in duplicated and x[1].path in duplicated)])
+    return {
+        "duplicate_files": sorted(duplicated),
+        "duplicate_groups": [
+            {"files": group,
+             "similarity": round(max(similarities.get(frozenset((a, b)), 0.0)
+                                     for a in group for b in group if a != b), 2)}
+            for group in groups
+        ],
+        "duplicate_blocks": blocks[:50],
+    }
@@ -0,0 +1,100 @@
+"""
+Scan File Store
+
+A scan-scoped view of a checkout that stats and reads each file at most once and
+hands every analysis stage the same bytes.
+
+    - stat() results are cached per path, so size checks are free after the first.
+    - Small files are read with a single read(); files above MMAP_THRESHOLD are
+      memory-mapped, so only the pages a stage touches are ever loaded.
+    - read() and head() return memoryviews over the cached buffer (zero-copy);
+      text() decodes on demand.
+    - close() drops the cache and unmaps large files when the scan finishes.
+
+Stores are not shared between scans; create one per checkout and close it (or use
+it as a context manager) before the checkout is removed.
+"""
+
+import mmap
+import os
+from typing import Dict, Optional, Union
+
+MMAP_THRESHOLD = 64 * 1024
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class FileStore:
+    """Read-once cache of file stats and contents under a root directory."""
+
+    def __init__(self, root: str, mmap_threshold: int = MMAP_THRESHOLD):
+        self.root = root
+        self.mmap_threshold = mmap_threshold
+        self._stats: Dict[str, Optional[os.stat_result]] = {}
+        self._buffers: Dict[str, Buffer] = {}
+        self.reads = 0
+
+    def __enter__(self) -> "FileStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def path(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path)
+
+    def stat(self, rel_path: str) -> Optional[os.stat_result]:
+        if rel_path not in self._stats:
+            try:
+                self._stats[rel_path] = os.stat(self.path(rel_path))
+            except OSError:
+                self._stats[rel_path] = None
+        return self._stats[rel_path]
+
+    def size(self, rel_path: str) -> int:
+        st = self.stat(rel_path)
+        return st.st_size if st else 0
+
+    def _load(self, rel_path: str) -> Optional[Buffer]:
+        buffer = self._buffers.get(rel_path)
+        if buffer is not None:
+            return buffer
+        st = self.stat(rel_path)
+        if st is None:
+            return None
+        try:
+            with open(self.path(rel_path), "rb") as f:
+                if st.st_size >= self.mmap_threshold:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    buffer = f.read()
+        except (OSError, ValueError):
+            return None
+        self.reads += 1
+        self._buffers[rel_path] = buffer
+        return buffer
+
+    def read(self, rel_path: str) -> Optional[memoryview]:
+        """Zero-copy view of the whole file, or None if it cannot be read."""
+        buffer = self._load(rel_path)
+        return memoryview(buffer) if buffer is not None else None
+
+    def head(self, rel_path: str, n: int) -> Optional[memoryview]:
+        """Zero-copy view of the first n bytes."""
+        view = self.read(rel_path)
+        return view[:n] if view is not None else None
+
+    def text(self, rel_path: str) -> Optional[str]:
+        view = self.read(rel_path)
+        return str(view, "utf-8", "ignore") if view is not None else None
+
+    def close(self) -> None:
+        """Release cached contents and unmap large files."""
+        for buffer in self._buffers.values():
+            if isinstance(buffer, mmap.mmap):
+                try:
+                    buffer.close()
+                except BufferError:
+                    pass  # A stage still holds a view; the map is freed with it
+        self._buffers.clear()
+        self._stats.clear()
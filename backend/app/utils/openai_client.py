@@ -0,0 +1,68 @@
+"""
+Shared OpenAI Client
+
+One AsyncOpenAI client per process, shared by every caller: chat, code quality
+insights, test strategies, context embeddings and conversation summaries. Its
+connection pool keeps connections to the API alive between requests, so a call
+reuses an open TLS session instead of building a new client, pool and handshake.
+
+The client is created on first use, so the SDK is still not imported at startup
+(core/startup.py), and the app's lifespan closes it on shutdown. Pool size,
+keep-alive, timeouts and retries come from the OPENAI_* settings, and OPENAI_BASE_URL
+points it at a proxy or the local benchmark stand-in. Requests go through
+instrumented_client("openai"), so they are counted and traced (core/monitoring.py).
+
+Endpoints receive it as a dependency: `client=Depends(get_openai_client)`.
+"""
+
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+from ..core.config import settings
+from ..core.monitoring import instrumented_client
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+class OpenAIClientProvider:
+    """Application-scoped AsyncOpenAI client, created on first use."""
+
+    def __init__(self):
+        self._client: Optional["AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            limits = httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+            )
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                # The SDK passes these on every request, overriding the http_client's own
+                timeout=httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS),
+                max_retries=settings.OPENAI_MAX_RETRIES,
+                http_client=instrumented_client("openai", limits=limits)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pool; the next use creates a new client."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.close()
+
+
+def get_openai_client() -> "AsyncOpenAI":
+    """FastAPI dependency returning the shared client."""
+    return openai_provider.client
+
+
+# Create a singleton instance
+openai_provider = OpenAIClientProvider()
@@ -0,0 +1,154 @@
+"""
+PDF Render Service
+
+Renders Markdown documents to PDF in a process pool, so FPDF's line-by-line layout
+never runs on the event loop or competes with request handling for the GIL.
+
+Rendered files are cached in PDF_CACHE_DIR under the SHA-256 of the Markdown, and
+written atomically (render to a temp name, then rename), so any worker can serve a
+document another worker rendered. The cache keeps the PDF_CACHE_MAX_FILES most
+recently used files of each format: every hit touches the file's mtime, so eviction
+follows last access rather than when the file was written. Markdown documents are stored alongside under
+the same hash, so a document can be downloaded again in either format by its hash.
+"""
+
+import asyncio
+import glob
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..core.monitoring import record_cache
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def save_pdf_from_text(text: str, output_path: str):
+    from fpdf import FPDF  # Only worker processes render
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    pdf.set_font("Arial", size=12)
+    # The core PDF fonts only cover latin-1
+    lines = text.encode("latin-1", "replace").decode("latin-1").splitlines()
+    for line in lines:
+        if line.strip().startswith("#"):
+            level = line.count("#")
+            title = line.replace("#", "").strip()
+            font_size = max(16 - level * 2, 10)
+            pdf.set_font("Arial", 'B', size=font_size)
+            pdf.cell(200, 10, txt=title, ln=True)
+            pdf.set_font("Arial", size=12)
+        else:
+            pdf.multi_cell(0, 10, txt=line)
+    pdf.output(output_path)
+
+
+def _touch(path: str) -> bool:
+    """Mark a cached file as just used; False if it does not exist (or was just pruned)."""
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+def _render_to_cache(text: str, output_path: str) -> str:
+    """Render in a worker process and atomically move the result into place."""
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    save_pdf_from_text(text, tmp_path)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class PdfRenderService:
+    """Process-pool PDF renderer with a content-addressed file cache."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_files: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.PDF_CACHE_DIR
+        self.max_workers = max_workers or settings.PDF_RENDER_WORKERS
+        self.max_files = max_files or settings.PDF_CACHE_MAX_FILES
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def path_for(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    def cached_path(self, key: str, extension: str) -> Optional[str]:
+        """Return the cached artifact for a content hash, if it exists."""
+        path = self.path_for(key, extension)
+        return path if _touch(path) else None
+
+    async def store_markdown(self, text: str) -> str:
+        """Write the Markdown next to its PDF so either format can be served by hash."""
+        key = content_hash(text)
+        path = self.path_for(key, "md")
+        if not _touch(path):
+            def write():
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+            await asyncio.to_thread(write)
+            asyncio.get_running_loop().run_in_executor(None, self.prune)
+        return path
+
+    async def render(self, text: str) -> str:
+        """Return the path of the PDF for this Markdown, rendering it at most once."""
+        key = content_hash(text)
+        path = self.path_for(key, "pdf")
+        hit = _touch(path)
+        record_cache("pdf", hit)
+        if hit:
+            return path
+
+        future = self._inflight.get(key)
+        if future is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, _render_to_cache, text, path)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            future.add_done_callback(lambda _: loop.run_in_executor(None, self.prune))
+        return await asyncio.shield(future)
+
+    def prune(self) -> None:
+        """Drop the least recently used artifacts beyond max_files per format."""
+        for extension in ("pdf", "md"):
+            files = []
+            for path in glob.glob(os.path.join(self.cache_dir, f"*.{extension}")):
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue  # Removed by another worker's prune since the listing
+            if len(files) <= self.max_files:
+                continue
+            files.sort(reverse=True)
+            for _, stale in files[self.max_files:]:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Create a singleton instance
+pdf_renderer = PdfRenderService()
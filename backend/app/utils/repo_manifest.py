@@ -0,0 +1,187 @@
+"""
+Repository Manifest
+
+One index of a checkout, built in a single directory walk and shared by every
+analyzer (code quality, duplicate detection, SAST, test-strategy profiling).
+
+Each file is recorded with its relative path, size, extension, language and
+vendored/generated flags, and dependency manifests and lockfiles are collected on
+the way, so language detection and manifest discovery become dictionary lookups.
+Heavy directories that never hold first-party code (.git, node_modules, virtualenvs,
+caches) are pruned before they are descended into.
+
+Manifests are cached by commit SHA plus the checkout's sparse-checkout patterns, so
+two checkouts of the same commit with the same patterns share one index.
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional
+
+from ..core.monitoring import record_cache, track_subprocess
+
+PRUNED_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__", ".tox",
+               ".mypy_cache", ".pytest_cache", "site-packages", ".next", ".idea"}
+VENDORED_DIRS = {"vendor", "third_party", "thirdparty", "external", "dist", "build", "bower_components"}
+GENERATED_SUFFIXES = ("_pb2.py", "_pb2_grpc.py", ".min.js", ".min.css", ".bundle.js", ".map")
+GENERATED_MARKERS = (".generated.", ".g.dart", "_generated.")
+
+LANGUAGE_BY_EXTENSION = {
+    ".py": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".go": "go", ".java": "java", ".kt": "kotlin", ".rb": "ruby", ".rs": "rust",
+    ".php": "php", ".cs": "csharp", ".c": "c", ".h": "c", ".cpp": "cpp", ".swift": "swift",
+}
+MANIFEST_FILES = {
+    "requirements.txt": "pip", "pyproject.toml": "pip", "setup.py": "pip", "setup.cfg": "pip",
+    "Pipfile": "pip", "Pipfile.lock": "pip", "poetry.lock": "pip",
+    "package.json": "npm", "package-lock.json": "npm", "yarn.lock": "npm", "pnpm-lock.yaml": "npm",
+    "go.mod": "go", "go.sum": "go", "Cargo.toml": "cargo", "Cargo.lock": "cargo",
+    "pom.xml": "maven", "build.gradle": "gradle", "Gemfile": "bundler", "Gemfile.lock": "bundler",
+    "composer.json": "composer", "composer.lock": "composer",
+}
+
+
+@dataclass
+class FileEntry:
+    path: str  # Relative to the checkout root, "/"-separated
+    size: int
+    extension: str
+    language: Optional[str]
+    vendored: bool = False
+    generated: bool = False
+
+    @property
+    def first_party(self) -> bool:
+        return not (self.vendored or self.generated)
+
+
+@dataclass
+class RepoManifest:
+    root: str
+    commit: str
+    files: List[FileEntry] = field(default_factory=list)
+    manifests: Dict[str, List[str]] = field(default_factory=dict)  # Ecosystem -> manifest paths
+    languages: Dict[str, int] = field(default_factory=dict)  # First-party source files per language
+
+    def __post_init__(self):
+        self._by_path = {f.path: f for f in self.files}
+
+    def get(self, path: str) -> Optional[FileEntry]:
+        return self._by_path.get(path)
+
+    def has_language(self, language: str) -> bool:
+        return language in self.languages
+
+    @property
+    def primary_language(self) -> str:
+        return max(self.languages, key=self.languages.get) if self.languages else "unknown"
+
+    def source_files(self, languages: Optional[Iterable[str]] = None,
+                     include_vendored: bool = False) -> List[FileEntry]:
+        wanted = set(languages) if languages is not None else None
+        return [f for f in self.files
+                if f.language and (wanted is None or f.language in wanted)
+                and (include_vendored or f.first_party)]
+
+    def abspath(self, path: str) -> str:
+        return os.path.join(self.root, *path.split("/"))
+
+
+def _classify(rel_path: str, name: str, size: int, vendored: bool) -> FileEntry:
+    extension = os.path.splitext(name)[1].lower()
+    lower = name.lower()
+    generated = lower.endswith(GENERATED_SUFFIXES) or any(m in lower for m in GENERATED_MARKERS)
+    return FileEntry(rel_path, size, extension, LANGUAGE_BY_EXTENSION.get(extension), vendored, generated)
+
+
+def build_manifest(root: str, commit: str = "") -> RepoManifest:
+    """Walk the checkout once and index every file."""
+    files: List[FileEntry] = []
+    manifests: Dict[str, List[str]] = {}
+    stack = [("", False)]
+    while stack:
+        rel_dir, vendored = stack.pop()
+        try:
+            entries = sorted(os.scandir(os.path.join(root, rel_dir)), key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in PRUNED_DIRS:
+                        stack.append((rel_path, vendored or entry.name.lower() in VENDORED_DIRS))
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+            files.append(_classify(rel_path, entry.name, size, vendored))
+            ecosystem = MANIFEST_FILES.get(entry.name)
+            if ecosystem is None and entry.name.startswith("requirements") and entry.name.endswith(".txt"):
+                ecosystem = "pip"
+            if ecosystem and not vendored:
+                manifests.setdefault(ecosystem, []).append(rel_path)
+
+    files.sort(key=lambda f: f.path)
+    languages = Counter(f.language for f in files if f.language and f.first_party)
+    for paths in manifests.values():
+        paths.sort()
+    return RepoManifest(root=root, commit=commit, files=files, manifests=manifests,
+                        languages=dict(languages.most_common()))
+
+
+async def checkout_key(root: str) -> str:
+    """Commit SHA plus a hash of the sparse-checkout patterns ("" outside git)."""
+    with track_subprocess("git"):
+        proc = await asyncio.create_subprocess_exec(
+            "git", "rev-parse", "HEAD", cwd=root,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await proc.communicate()
+    commit = stdout.decode().strip() if proc.returncode == 0 else ""
+    if not commit:
+        return ""
+    sparse = os.path.join(root, ".git", "info", "sparse-checkout")
+    if os.path.exists(sparse):
+        with open(sparse, "rb") as f:
+            commit += ":" + hashlib.sha1(f.read()).hexdigest()[:12]
+    return commit
+
+
+class ManifestCache:
+    """LRU of manifests keyed by checkout key; unversioned trees are always rebuilt."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, RepoManifest]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, root: str) -> RepoManifest:
+        key = await checkout_key(root)
+        cached = self._cache.get(key) if key else None
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            record_cache("manifest", True)
+            # Same tree, different location
+            return replace(cached, root=root)
+        self.misses += 1
+        record_cache("manifest", False)
+        manifest = await asyncio.to_thread(build_manifest, root, key.split(":")[0])
+        if key:
+            self._cache[key] = manifest
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return manifest
+
+
+# Create a singleton instance
+manifest_cache = ManifestCache()
@@ -0,0 +1,176 @@
+"""
+Repository Profiler
+
+Collects the README, code structure, test and CI/CD facts the test-strategy
+generator needs from the checkout's manifest (utils/repo_manifest.py), without
+walking the tree again. Vendored and build directories are skipped, and file
+contents are only sampled with bounded head reads (README, test files and test
+configuration), never read in full.
+
+The returned dictionaries keep the shape generate_summary expects:
+    {"readme": {...}, "structure": {...}, "tests": {...}, "ci_cd": {...}}
+Paths are relative to the repository root so the summary does not depend on where
+the checkout lives.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from .repo_manifest import RepoManifest
+
+README_HEAD_BYTES = 64 * 1024
+TEST_HEAD_BYTES = 8 * 1024
+
+ENTRY_POINTS = {"main.py", "index.ts", "app.ts", "server.ts"}
+NOTABLE_FILES = {"dockerfile", "package.json", "pyproject.toml"}
+CI_FILES = {"Jenkinsfile": "Jenkinsfile", ".gitlab-ci.yml": ".gitlab-ci.yml"}
+BUILD_FILES = ["Makefile", "build.sh", "docker-compose.yml"]
+TEST_CONFIG_FILES = {"conftest.py", "pytest.ini", "tox.ini", "setup.cfg", "package.json",
+                     "jest.config.js", "jest.config.ts", ".mocharc.json", ".mocharc.yml"}
+FRAMEWORK_MARKERS = {
+    ".py": {"pytest": "pytest", "unittest": "unittest"},
+    ".ini": {"pytest": "pytest"},
+    ".cfg": {"pytest": "pytest"},
+    ".js": {"jest": "jest", "mocha": "mocha"},
+    ".ts": {"jest": "jest", "mocha": "mocha"},
+    ".json": {"jest": "jest", "mocha": "mocha"},
+    ".yml": {"mocha": "mocha"},
+}
+FOLDER_DESCRIPTIONS = {
+    "routes": "API endpoints",
+    "controllers": "Request handlers",
+    "models": "Schemas or ORM models",
+    "services": "Business logic",
+    "tests": "Testing logic",
+    "config": "App settings",
+}
+
+
+def read_head(path: str, max_bytes: int) -> str:
+    """Read at most max_bytes from the start of a file."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(max_bytes).decode("utf-8", errors="ignore")
+    except OSError:
+        return ""
+
+
+def describe_folder(folder_name: str) -> str:
+    for key, desc in FOLDER_DESCRIPTIONS.items():
+        if key in folder_name.lower():
+            return desc
+    return "Uncategorized"
+
+
+def parse_readme(content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill README-derived project metadata."""
+    title_match = re.search(r"# (.+)", content)
+    if title_match:
+        metadata["project_name"] = title_match.group(1).strip()
+    paragraphs = content.split("\n\n")
+    if len(paragraphs) > 1:
+        metadata["description"] = paragraphs[1].strip()
+    usage_match = re.search(r"(?i)##?\s*(usage|how to run).+?\n(.+?)(\n##|\Z)", content, re.DOTALL)
+    if usage_match:
+        metadata["usage"] = usage_match.group(2).strip()
+    author_match = re.search(r"(?i)author[s]?:\s*(.+)", content)
+    if author_match:
+        metadata["authors"] = author_match.group(1).strip()
+    if "fastapi" in content.lower():
+        metadata["project_type"] = "Backend API"
+    return metadata
+
+
+def is_test_file(file: str) -> bool:
+    return "test" in file or file.endswith((".spec.ts", ".spec.js"))
+
+
+def profile_repository(manifest: RepoManifest, project_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Collect README, structure, test and CI/CD facts from the repository manifest."""
+    path = manifest.root
+    readme = {
+        "project_name": project_name or os.path.basename(os.path.normpath(path)),
+        "description": "",
+        "possible_keywords": [],
+        "project_type": "Unknown",
+        "usage": "",
+        "authors": "",
+    }
+    structure = {"folders": {}, "entry_points": [], "notable_files": []}
+    tests = {"test_files": [], "test_types": set(), "frameworks": set(), "mocking": [], "fixtures_found": False}
+    ci_cd = {"tools": [], "workflows": [], "build_files": []}
+
+    readme_path = None
+    found_ci = set()
+    found_build = set()
+
+    # Group first-party files by directory, keeping directories that only hold subdirectories
+    files_by_dir: Dict[str, List[str]] = {".": []}
+    for entry in manifest.files:
+        if entry.vendored:
+            continue
+        parts = entry.path.split("/")
+        for depth in range(1, len(parts)):
+            files_by_dir.setdefault(os.path.join(*parts[:depth]), [])
+        files_by_dir[os.path.join(*parts[:-1]) if len(parts) > 1 else "."].append(parts[-1])
+
+    for rel_root in sorted(files_by_dir, key=lambda d: (d != ".", d)):
+        files = files_by_dir[rel_root]
+        root = os.path.join(path, rel_root)
+        depth = 0 if rel_root == "." else len(rel_root.split(os.sep))
+        lower_root = rel_root.lower()
+
+        if depth <= 2:
+            structure["folders"][rel_root] = {
+                "description": describe_folder(rel_root),
+                "file_count": len(files),
+                "files": files[:5]
+            }
+        if rel_root.replace(os.sep, "/").endswith(".github/workflows"):
+            found_ci.add(".github/workflows")
+        if files:
+            if "unit" in lower_root:
+                tests["test_types"].add("Unit")
+            if "integration" in lower_root:
+                tests["test_types"].add("Integration")
+            if "e2e" in lower_root:
+                tests["test_types"].add("E2E")
+            if "fixtures" in lower_root:
+                tests["fixtures_found"] = True
+
+        for file in files:
+            rel_path = os.path.normpath(os.path.join(rel_root, file))
+            if readme_path is None and file == "README.md":
+                readme_path = os.path.join(root, file)
+            if file in ENTRY_POINTS:
+                structure["entry_points"].append(rel_path)
+            if file.lower() in NOTABLE_FILES:
+                structure["notable_files"].append(file)
+            if file in CI_FILES:
+                found_ci.add(CI_FILES[file])
+            if file in BUILD_FILES:
+                found_build.add(file)
+            if "fixtures" in file:
+                tests["fixtures_found"] = True
+
+            test_file = is_test_file(file)
+            if test_file:
+                tests["test_files"].append(rel_path)
+            if test_file or file in TEST_CONFIG_FILES:
+                markers = FRAMEWORK_MARKERS.get(os.path.splitext(file)[1], {})
+                if markers and not all(m in tests["frameworks"] for m in markers.values()):
+                    head = read_head(os.path.join(root, file), TEST_HEAD_BYTES)
+                    for needle, framework in markers.items():
+                        if needle in head:
+                            tests["frameworks"].add(framework)
+
+    if readme_path:
+        parse_readme(read_head(readme_path, README_HEAD_BYTES), readme)
+    for f in [".github/workflows", "Jenkinsfile", ".gitlab-ci.yml"]:
+        if f in found_ci:
+            ci_cd["tools"].append(f.split("/")[0])
+            ci_cd["workflows"].append(f)
+    ci_cd["build_files"] = [f for f in BUILD_FILES if f in found_build]
+
+    return {"readme": readme, "structure": structure, "tests": tests, "ci_cd": ci_cd}
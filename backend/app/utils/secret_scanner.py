@@ -0,0 +1,290 @@
+"""
+Secret Scanner
+
+Scans a repository's full git history for secrets once, then only the commits added
+since the last scan.
+
+    - Each repository gets a bare mirror (branches and tags) in SECRETS_MIRROR_DIR. The first scan clones
+      it; later scans fetch into it, so only new objects cross the network and Gitleaks
+      never triggers lazy blob fetches.
+    - The last scanned commit of the default branch is stored per repository (the
+      watermark). Later scans pass `--log-opts=<watermark>..<head>` to Gitleaks, and a
+      rewritten history (watermark no longer an ancestor) falls back to a full scan.
+      A report cut off at GITLEAKS_MAX_OUTPUT_MB keeps its findings but leaves the
+      watermark where it was, so the unreported range is scanned again next time.
+    - Findings are kept in SQLite by Gitleaks fingerprint, so a leak found in an old
+      commit stays reported even though later scans never look at that commit again.
+
+Credentials are only passed on the command line for clone/fetch; the mirror's stored
+remote URL never contains the token. Stored findings are only returned after the
+caller's own credentials fetched the repository: a failed fetch (e.g. a private
+repository requested without a token) never serves what an earlier caller's token
+found. Mirrors beyond SECRETS_MIRROR_MAX_COUNT are evicted least recently used first.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.database import connect, db_path
+from ..core.monitoring import record_exit, track_subprocess
+from ..core.tracing import span
+from .tool_output import JsonReport
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS secret_watermarks (
+    repo_key TEXT PRIMARY KEY,
+    repo_url TEXT NOT NULL,
+    last_commit TEXT NOT NULL,
+    scanned_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS secret_findings (
+    repo_key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    file TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    rule TEXT NOT NULL,
+    description TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    found_at TEXT NOT NULL,
+    PRIMARY KEY (repo_key, fingerprint)
+);
+"""
+
+
+def strip_credentials(repo_url: str) -> str:
+    url = repo_url.strip().rstrip("/")
+    if "://" in url and "@" in url.split("://", 1)[1].split("/", 1)[0]:
+        scheme, rest = url.split("://", 1)
+        url = f"{scheme}://{rest.split('@', 1)[1]}"
+    return url
+
+
+def repo_key(repo_url: str) -> str:
+    """Credential-free, normalized key for a repository URL."""
+    url = strip_credentials(repo_url)
+    if url.endswith(".git"):
+        url = url[:-4]
+    return url.lower()
+
+
+def normalize_finding(leak: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a Gitleaks report entry onto the fields the SAST aggregation uses."""
+    fingerprint = leak.get("Fingerprint") or hashlib.sha1(
+        f"{leak.get('Commit')}:{leak.get('File')}:{leak.get('RuleID')}:{leak.get('StartLine')}".encode()
+    ).hexdigest()
+    return {
+        "fingerprint": fingerprint,
+        "file": leak.get("File", "unknown"),
+        "line": leak.get("StartLine", 0),
+        "rule": leak.get("RuleID", "Generic Secret"),
+        "description": leak.get("Description", "Potential secret"),
+        "commit": leak.get("Commit", ""),
+        "severity": "HIGH",  # Secrets are typically high severity
+    }
+
+
+async def _git(*args: str, cwd: Optional[str] = None, timeout: int = 600) -> Tuple[int, str]:
+    with track_subprocess("git", {"process.command": f"git {args[0]}"}) as current:
+        proc = await asyncio.create_subprocess_exec(
+            "git", *args, cwd=cwd,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return -1, "timed out"
+        record_exit(current, proc.returncode)
+    return proc.returncode, (stdout if proc.returncode == 0 else stderr).decode(errors="ignore").strip()
+
+
+class SecretScanner:
+    """Incremental Gitleaks history scans over per-repository mirrors."""
+
+    def __init__(self, path: Optional[str] = None, mirror_dir: Optional[str] = None):
+        self.path = path or db_path("secrets.db")
+        self.mirror_dir = mirror_dir or settings.SECRETS_MIRROR_DIR
+        self._initialized = False
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect(self.path)
+        if not self._initialized:
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _get_watermark(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT last_commit FROM secret_watermarks WHERE repo_key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def _record_scan(self, key: str, repo_url: str, head: Optional[str], findings: List[Dict[str, Any]]) -> None:
+        """Store findings and move the watermark to head (left in place when head is None)."""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                """INSERT OR IGNORE INTO secret_findings
+                   (repo_key, fingerprint, file, line, rule, description, commit_sha, severity, found_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(key, f["fingerprint"], f["file"], f["line"], f["rule"], f["description"],
+                  f["commit"], f["severity"], now) for f in findings]
+            )
+            if head is not None:
+                conn.execute(
+                    """INSERT INTO secret_watermarks (repo_key, repo_url, last_commit, scanned_at)
+                       VALUES (?, ?, ?, ?)
+                       ON CONFLICT (repo_key)
+                       DO UPDATE SET last_commit = excluded.last_commit, scanned_at = excluded.scanned_at""",
+                    (key, repo_url, head, now)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _get_findings(self, key: str) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """SELECT fingerprint, file, line, rule, description, commit_sha, severity
+                   FROM secret_findings WHERE repo_key = ? ORDER BY file, line""",
+                (key,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{"fingerprint": r[0], "file": r[1], "line": r[2], "rule": r[3],
+                 "description": r[4], "commit": r[5], "severity": r[6]} for r in rows]
+
+    async def sync_mirror(self, repo_url: str, auth_url: Optional[str] = None) -> Optional[str]:
+        """Clone or update the bare mirror of a repository; returns its path, or None if
+        this caller's credentials could not fetch it."""
+        auth_url = auth_url or repo_url
+        mirror = os.path.join(self.mirror_dir, hashlib.sha1(repo_key(repo_url).encode()).hexdigest() + ".git")
+        if os.path.isdir(mirror):
+            code, out = await _git("fetch", "--prune", auth_url,
+                                   "+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*", cwd=mirror)
+        else:
+            os.makedirs(self.mirror_dir, exist_ok=True)
+            tmp_mirror = tempfile.mkdtemp(dir=self.mirror_dir, suffix=".tmp")
+            # Branches and tags only; a full --mirror would also pull e.g. GitHub's refs/pull/*
+            code, out = await _git("clone", "--bare", "--quiet", auth_url, tmp_mirror)
+            if code == 0:
+                await _git("remote", "set-url", "origin", strip_credentials(repo_url), cwd=tmp_mirror)
+                os.replace(tmp_mirror, mirror)
+            else:
+                await asyncio.to_thread(shutil.rmtree, tmp_mirror, True)
+        if code != 0:
+            # The existing mirror may hold history this caller has no access to
+            print(f"Secret scan mirror sync failed for {repo_key(repo_url)}: {out}")
+            return None
+        os.utime(mirror)  # Last use, for eviction
+        await asyncio.to_thread(self._evict_mirrors, mirror)
+        return mirror
+
+    def _evict_mirrors(self, keep: str) -> None:
+        """Remove the least recently used mirrors beyond SECRETS_MIRROR_MAX_COUNT."""
+        mirrors = []
+        for name in os.listdir(self.mirror_dir):
+            path = os.path.join(self.mirror_dir, name)
+            if name.endswith(".git") and path != keep:
+                try:
+                    mirrors.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue  # Evicted by another worker
+        mirrors.sort(reverse=True)
+        # The mirror just synced counts against the limit
+        for _, stale in mirrors[max(0, settings.SECRETS_MIRROR_MAX_COUNT - 1):]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    async def _gitleaks(self, source: str, log_opts: Optional[str]) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """Run Gitleaks; returns (findings, truncated), or None if the scan failed.
+
+        Neither a failed nor a truncated scan may advance the watermark.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            report = os.path.join(tmp, "gitleaks.json")
+            cmd = ["gitleaks", "detect", "--no-banner", "--exit-code=0", f"--source={source}",
+                   "--report-format=json", f"--report-path={report}"]
+            cmd.append(f"--log-opts={log_opts}" if log_opts else "--no-git")
+            try:
+                with track_subprocess("gitleaks", {"gitleaks.log_opts": log_opts}) as current:
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+                    )
+                    _, stderr = await proc.communicate()
+                    record_exit(current, proc.returncode)
+            except OSError as e:
+                print(f"Gitleaks error: {e}")
+                return None
+            try:
+                # Stream the report; a capped read keeps the leaks parsed before the cap
+                parsed = JsonReport(report, settings.GITLEAKS_MAX_OUTPUT_MB * 1024 * 1024)
+                return [normalize_finding(leak) for leak in parsed.items("item")], parsed.truncated
+            except (OSError, ValueError):
+                print(f"Gitleaks produced no report: {stderr.decode(errors='ignore')[-500:]}")
+                return None
+
+    async def scan(self, repo_url: str, auth_url: Optional[str] = None,
+                   checkout: Optional[str] = None) -> Dict[str, Any]:
+        """Scan new history since the watermark and return every known leak for the repository."""
+        key = repo_key(repo_url)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            with span("secrets.mirror_sync"):
+                mirror = await self.sync_mirror(repo_url, auth_url)
+            if mirror is None:
+                # No history this caller may see: scan the files of their own checkout only
+                result = await self._gitleaks(checkout, None) if checkout else None
+                findings, truncated = result or ([], False)
+                return {"mode": "working_tree" if result is not None else "failed",
+                        "scanned_range": None, "findings": findings, "truncated": truncated}
+
+            code, head = await _git("rev-parse", "HEAD", cwd=mirror)
+            if code != 0:
+                return {"mode": "failed", "scanned_range": None, "truncated": False, "findings": []}
+
+            last = await asyncio.to_thread(self._get_watermark, key)
+            if last == head:
+                mode, log_opts = "cached", None
+            elif last and (await _git("merge-base", "--is-ancestor", last, head, cwd=mirror))[0] == 0:
+                mode, log_opts = "incremental", f"{last}..{head}"
+            else:
+                mode, log_opts = "full", head
+
+            truncated = False
+            if log_opts:
+                result = await self._gitleaks(mirror, log_opts)
+                if result is None:
+                    mode = "failed"
+                else:
+                    findings, truncated = result
+                    # Leaks past the cap are unreported; keep the watermark so the range is rescanned
+                    await asyncio.to_thread(self._record_scan, key, key, None if truncated else head, findings)
+            return {
+                "mode": mode,
+                "scanned_range": log_opts,
+                "truncated": truncated,
+                "findings": await asyncio.to_thread(self._get_findings, key),
+            }
+
+
+# Create a singleton instance
+secret_scanner = SecretScanner()
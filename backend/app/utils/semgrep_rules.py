@@ -0,0 +1,196 @@
+"""
+Semgrep Rule Pack Manager
+
+Pins Semgrep rule packs to local YAML files so scans never touch the registry.
+
+    - Packs live in SEMGREP_RULES_DIR as <name>.yml, next to a manifest.json recording
+      each pack's SHA-256 and when it was fetched. On air-gapped runners the directory
+      is provisioned by copying the files in; nothing is downloaded at startup.
+    - Scans select packs by detected language (LANGUAGE_PACKS) plus BASE_PACKS, and
+      pass the local files to Semgrep with metrics and version checks disabled.
+    - A background task refreshes the packs from SEMGREP_RULES_URL every
+      SEMGREP_RULES_REFRESH_HOURS when SEMGREP_RULES_AUTO_REFRESH is on (off by default,
+      so nothing reaches the network unless asked to). `python -m app.utils.semgrep_rules`
+      fetches them once, e.g. on a connected machine before copying them over. Files are
+      replaced atomically, so running scans keep the version they started with.
+    - manifest() reads and hashes files; async callers run it in a thread.
+    - ruleset_hash() combines the hashes of the selected packs; findings caches are
+      keyed by it, so a rule update invalidates them and nothing else does.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+BASE_PACKS = ["secrets"]
+LANGUAGE_PACKS = {
+    "python": ["python"],
+    "javascript": ["javascript"],
+    "typescript": ["typescript", "javascript"],
+}
+
+
+def pack_file_name(pack: str) -> str:
+    return pack.replace("/", "_") + ".yml"
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class RulePackManager:
+    """Local, pinned Semgrep rule packs with scheduled refresh."""
+
+    def __init__(self, rules_dir: Optional[str] = None):
+        self.rules_dir = rules_dir or settings.SEMGREP_RULES_DIR
+        self._manifest: Optional[Dict[str, Dict[str, str]]] = None
+        self._manifest_signature: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.rules_dir, "manifest.json")
+
+    def _signature(self) -> Tuple[Tuple[str, int], ...]:
+        """Modification times of the manifest and every pack file; adding or editing a pack changes it."""
+        if not os.path.isdir(self.rules_dir):
+            return ()
+        signature = []
+        for file in sorted(os.listdir(self.rules_dir)):
+            if file.endswith(".yml") or file == "manifest.json":
+                try:
+                    signature.append((file, os.stat(os.path.join(self.rules_dir, file)).st_mtime_ns))
+                except OSError:
+                    continue  # Replaced or removed while listing
+        return tuple(signature)
+
+    def manifest(self) -> Dict[str, Dict[str, str]]:
+        """Pack name -> {"sha256", "fetched_at"}, hashing any pack missing from the manifest.
+
+        Cached until the directory or manifest changes, so packs provisioned by hand
+        after startup are picked up by the next scan.
+        """
+        signature = self._signature()
+        if self._manifest is None or signature != self._manifest_signature:
+            manifest = {}
+            if os.path.exists(self.manifest_path):
+                try:
+                    with open(self.manifest_path, "r") as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring unreadable Semgrep rule manifest: {e}")
+            # Packs copied in by hand have no manifest entry yet
+            if os.path.isdir(self.rules_dir):
+                for file in os.listdir(self.rules_dir):
+                    pack = file[:-4].replace("_", "/") if file.endswith(".yml") else None
+                    if pack and pack not in manifest:
+                        with open(os.path.join(self.rules_dir, file), "rb") as f:
+                            manifest[pack] = {"sha256": hashlib.sha256(f.read()).hexdigest(), "fetched_at": ""}
+            self._manifest = manifest
+            self._manifest_signature = signature
+        return self._manifest
+
+    def packs_for(self, languages: List[str]) -> List[str]:
+        """Rule packs for the detected languages, in a stable order."""
+        packs = list(BASE_PACKS)
+        for lang in languages:
+            packs.extend(LANGUAGE_PACKS.get(lang, []))
+        return sorted(set(packs))
+
+    def available(self, packs: List[str]) -> List[str]:
+        manifest = self.manifest()
+        missing = [p for p in packs if p not in manifest]
+        if missing:
+            print(f"Semgrep rule packs not available locally, skipping: {', '.join(missing)}")
+        return [p for p in packs if p in manifest]
+
+    def config_args(self, packs: List[str]) -> List[str]:
+        """--config arguments pointing at the local pack files."""
+        args = []
+        for pack in packs:
+            args += ["--config", os.path.join(self.rules_dir, pack_file_name(pack))]
+        return args
+
+    def ruleset_hash(self, packs: List[str]) -> str:
+        manifest = self.manifest()
+        digest = hashlib.sha256()
+        for pack in packs:
+            digest.update(f"{pack}:{manifest[pack]['sha256']}\n".encode())
+        return digest.hexdigest()
+
+    async def refresh(self, packs: Optional[List[str]] = None) -> List[str]:
+        """Download packs from the registry and swap them in atomically; returns updated packs."""
+        if packs is None:
+            packs = sorted(set(BASE_PACKS + [p for ps in LANGUAGE_PACKS.values() for p in ps]))
+        import aiohttp
+
+        updated = []
+        async with self._refresh_lock:
+            os.makedirs(self.rules_dir, exist_ok=True)
+            manifest = dict(await asyncio.to_thread(self.manifest))
+            timeout = aiohttp.ClientTimeout(total=60)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                for pack in packs:
+                    try:
+                        async with session.get(settings.SEMGREP_RULES_URL.format(pack=pack)) as response:
+                            response.raise_for_status()
+                            content = await response.read()
+                    except Exception as e:
+                        print(f"Semgrep rule pack refresh failed for {pack}: {e}")
+                        continue
+                    sha = hashlib.sha256(content).hexdigest()
+                    if manifest.get(pack, {}).get("sha256") == sha:
+                        continue
+                    await asyncio.to_thread(_write_atomic, os.path.join(self.rules_dir, pack_file_name(pack)), content)
+                    manifest[pack] = {"sha256": sha, "fetched_at": datetime.now().isoformat()}
+                    updated.append(pack)
+            if updated:
+                content = json.dumps(manifest, indent=2, sort_keys=True).encode()
+                await asyncio.to_thread(_write_atomic, self.manifest_path, content)
+            self._manifest = manifest
+            self._manifest_signature = await asyncio.to_thread(self._signature)
+        return updated
+
+    async def _refresh_loop(self) -> None:
+        interval = settings.SEMGREP_RULES_REFRESH_HOURS * 3600
+        while True:
+            # Wait first: startup never depends on the registry
+            await asyncio.sleep(interval if await asyncio.to_thread(self.manifest) else 0)
+            updated = await self.refresh()
+            if updated:
+                print(f"Updated Semgrep rule packs: {', '.join(updated)}")
+            if not await asyncio.to_thread(self.manifest):
+                await asyncio.sleep(interval)
+
+    def start_refresh(self) -> None:
+        """Start the scheduled refresh if enabled."""
+        if settings.SEMGREP_RULES_AUTO_REFRESH and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+# Create a singleton instance
+rule_packs = RulePackManager()
+
+
+if __name__ == "__main__":
+    # Fetch every pack once into SEMGREP_RULES_DIR
+    fetched = asyncio.run(rule_packs.refresh())
+    print(f"Updated Semgrep rule packs: {', '.join(fetched) or 'none'} ({rule_packs.rules_dir})")
@@ -0,0 +1,51 @@
+"""
+Token Counting Helpers
+
+Shared tiktoken helpers used wherever a prompt has to fit a token budget.
+If the encoding cannot be loaded (e.g. the BPE file cannot be downloaded on an
+offline runner) counts fall back to a ~4 characters per token estimate.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import tiktoken
+
+DEFAULT_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+
+@lru_cache(maxsize=4)
+def get_encoding(name: str = DEFAULT_ENCODING) -> Optional["tiktoken.Encoding"]:
+    """Load (once) and return a tiktoken encoding, or None if unavailable."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        print(f"tiktoken encoding '{name}' unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in text."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN_ESTIMATE]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,177 @@
+"""
+Streaming Tool Output
+
+Runs analyzer subprocesses and parses their JSON output as a stream, so a large
+report never exists in memory as one bytes object, one str and one parsed tree.
+
+    - stdout is read in chunks and fed to ijson, which yields one finding at a time
+      from the given prefix (e.g. "results.item" for Semgrep); callers aggregate each
+      finding and drop it.
+    - Every run has a byte cap. When a tool's output passes it, reading stops, the
+      process is killed and the findings parsed so far are kept; the run is marked
+      truncated instead of failing the scan. Reports a tool writes to disk (JsonReport)
+      are read the same way.
+    - stderr is drained concurrently and only its tail is kept for error messages.
+"""
+
+import asyncio
+import os
+import signal
+from collections import deque
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import ijson
+
+from ..core.monitoring import record_exit, track_subprocess
+
+CHUNK_SIZE = 64 * 1024
+STDERR_TAIL_BYTES = 8 * 1024
+
+
+class CappedReader:
+    """Async file-like view of a stream that reports EOF after max_bytes."""
+
+    def __init__(self, stream: asyncio.StreamReader, max_bytes: int):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+
+    async def read(self, n: int = -1) -> bytes:
+        if n == 0:
+            return b""  # ijson probes the stream type with read(0)
+        remaining = self.max_bytes - self.bytes_read
+        if remaining <= 0:
+            # Only truncated if the tool still had something to say
+            if not self.truncated and await self.stream.read(1):
+                self.truncated = True
+            return b""
+        chunk = await self.stream.read(min(n if n > 0 else CHUNK_SIZE, remaining))
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class CappedFile:
+    """Sync counterpart of CappedReader for reports written to disk."""
+
+    def __init__(self, f, max_bytes: int):
+        self.f = f
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+
+    def read(self, n: int = -1) -> bytes:
+        if n == 0:
+            return b""
+        remaining = self.max_bytes - self.bytes_read
+        if remaining <= 0:
+            self.truncated = self.truncated or bool(self.f.read(1))
+            return b""
+        chunk = self.f.read(min(n if n > 0 else CHUNK_SIZE, remaining))
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class ToolRun:
+    """One analyzer subprocess whose JSON stdout is consumed as a stream."""
+
+    def __init__(self, name: str, cmd: str, max_bytes: int, cwd: Optional[str] = None):
+        self.name = name
+        self.cmd = cmd
+        self.cwd = cwd
+        self.max_bytes = max_bytes
+        self.returncode: Optional[int] = None
+        self.bytes_read = 0
+        self.truncated = False
+        self.error: Optional[str] = None
+        self._stderr_tail: deque = deque()
+        self._stderr_size = 0
+
+    @property
+    def stderr(self) -> str:
+        return b"".join(self._stderr_tail).decode(errors="ignore")
+
+    async def _drain_stderr(self, stream: asyncio.StreamReader) -> None:
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            self._stderr_tail.append(chunk)
+            self._stderr_size += len(chunk)
+            while self._stderr_size - len(self._stderr_tail[0]) >= STDERR_TAIL_BYTES:
+                self._stderr_size -= len(self._stderr_tail.popleft())
+
+    async def items(self, prefix: str, kvitems: bool = False) -> AsyncIterator[Any]:
+        """Yield JSON values under prefix (or (key, value) pairs with kvitems) as they are parsed."""
+        with track_subprocess(self.name) as current:
+            try:
+                proc = await asyncio.create_subprocess_shell(
+                    self.cmd, cwd=self.cwd,
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True
+                )
+            except OSError as e:
+                self.error = str(e)
+                print(f"{self.name} failed to start: {e}")
+                return
+
+            reader = CappedReader(proc.stdout, self.max_bytes)
+            stderr_task = asyncio.create_task(self._drain_stderr(proc.stderr))
+            parse = ijson.kvitems_async if kvitems else ijson.items_async
+            try:
+                async for item in parse(reader, prefix, use_float=True):
+                    yield item
+            except ijson.JSONError as e:
+                if not reader.truncated:
+                    self.error = f"invalid JSON output: {e}"
+            finally:
+                self.bytes_read = reader.bytes_read
+                self.truncated = reader.truncated
+                if reader.truncated:
+                    print(f"{self.name} output exceeded {self.max_bytes} bytes; keeping the findings parsed so far")
+                if proc.returncode is None:
+                    if reader.truncated:
+                        # Kill the whole group: the shell's child holds the pipes open
+                        try:
+                            os.killpg(proc.pid, signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+                    else:
+                        # Discard anything after the parsed document so the tool can exit
+                        while await proc.stdout.read(CHUNK_SIZE):
+                            pass
+                self.returncode = await proc.wait()
+                await stderr_task
+                record_exit(current, self.returncode)
+                if current.is_recording():
+                    current.set_attributes({"tool.output.bytes": self.bytes_read,
+                                            "tool.output.truncated": self.truncated})
+                if self.error:
+                    print(f"{self.name} error: {self.error} {self.stderr[-500:]}")
+
+
+class JsonReport:
+    """A JSON report written to disk, streamed with the same cap as ToolRun output."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.truncated = False
+
+    def items(self, prefix: str) -> Iterator[Any]:
+        """Yield JSON values under prefix; check truncated once the iterator is exhausted."""
+        with open(self.path, "rb") as f:
+            capped = CappedFile(f, self.max_bytes)
+            try:
+                yield from ijson.items(capped, prefix, use_float=True)
+            except ijson.JSONError as e:
+                if not capped.truncated:
+                    raise ValueError(f"invalid JSON report: {e}") from e
+            self.truncated = capped.truncated
+            if capped.truncated:
+                print(f"Report {self.path} exceeded {self.max_bytes} bytes; keeping the findings parsed so far")
+
+
+def iter_json_file(path: str, prefix: str, max_bytes: int) -> Iterator[Any]:
+    """Stream JSON values under prefix from a report file, reading at most max_bytes."""
+    yield from JsonReport(path, max_bytes).items(prefix)
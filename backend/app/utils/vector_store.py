@@ -0,0 +1,211 @@
+"""
+Vector Store for Chatbot Context
+
+Splits the chatbot context (base platform context and the latest analysis results)
+into heading-scoped chunks, embeds them with the OpenAI embeddings API and keeps a
+FAISS inner-product index over the normalized vectors. Questions are answered with
+the top-k most similar chunks packed into a token budget, so the prompt stays the
+same size no matter how large the scan results grow.
+
+Embeddings are cached by chunk hash in an LRU that can be shared between stores,
+so re-indexing after a context update only embeds the chunks whose text actually
+changed, and the base context is embedded once for every repository.
+
+faiss and numpy are imported on first use, not at startup. Embedding calls use the
+shared OpenAI client (openai_client.py).
+"""
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from ..core.config import settings
+from ..core.monitoring import record_cache
+from .openai_client import openai_provider
+from .tokens import count_tokens
+
+if TYPE_CHECKING:
+    import faiss
+    import numpy as np
+    from openai import AsyncOpenAI
+
+EMBEDDING_BATCH_SIZE = 256
+
+
+async def embed_texts(client: "AsyncOpenAI", model: str, texts: List[str]) -> "np.ndarray":
+    """Embed texts and return L2-normalized float32 vectors."""
+    import faiss
+    import numpy as np
+
+    vectors = []
+    for i in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        response = await client.embeddings.create(model=model, input=texts[i:i + EMBEDDING_BATCH_SIZE])
+        vectors.extend(item.embedding for item in response.data)
+    matrix = np.asarray(vectors, dtype="float32")
+    faiss.normalize_L2(matrix)
+    return matrix
+
+
+@dataclass
+class Chunk:
+    source: str
+    position: int
+    heading: str
+    text: str
+    tokens: int
+
+    @property
+    def key(self) -> str:
+        return hashlib.sha1(self.text.encode("utf-8")).hexdigest()
+
+
+def chunk_markdown(text: str, source: str, max_tokens: int = 300) -> List[Chunk]:
+    """Split markdown into chunks scoped by heading, each at most max_tokens long."""
+    sections = []
+    headings: List[str] = []
+    current: List[str] = []
+
+    def flush():
+        body = "\n".join(current).strip()
+        if body:
+            sections.append((" > ".join(headings), body))
+        current.clear()
+
+    in_code_block = False
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            in_code_block = not in_code_block
+        if not in_code_block and line.startswith("#"):
+            flush()
+            level = len(line) - len(line.lstrip("#"))
+            headings[:] = headings[:level - 1] + [line.lstrip("#").strip()]
+            continue
+        current.append(line)
+    flush()
+
+    chunks: List[Chunk] = []
+    for heading, body in sections:
+        prefix = f"{heading}\n" if heading else ""
+        piece: List[str] = []
+        piece_tokens = count_tokens(prefix)
+        for line in body.splitlines():
+            line_tokens = count_tokens(line) + 1
+            if piece and piece_tokens + line_tokens > max_tokens:
+                chunk_text = prefix + "\n".join(piece)
+                chunks.append(Chunk(source, len(chunks), heading, chunk_text, count_tokens(chunk_text)))
+                piece = []
+                piece_tokens = count_tokens(prefix)
+            piece.append(line)
+            piece_tokens += line_tokens
+        if piece:
+            chunk_text = prefix + "\n".join(piece)
+            chunks.append(Chunk(source, len(chunks), heading, chunk_text, count_tokens(chunk_text)))
+    return chunks
+
+
+class EmbeddingCache:
+    """LRU of chunk embeddings keyed by chunk hash."""
+
+    def __init__(self, max_entries: int = 20_000):
+        self.max_entries = max_entries
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def get(self, key: str) -> Optional["np.ndarray"]:
+        vector = self._vectors.get(key)
+        if vector is not None:
+            self._vectors.move_to_end(key)
+        record_cache("embedding", vector is not None)
+        return vector
+
+    def put(self, key: str, vector: "np.ndarray") -> None:
+        self._vectors[key] = vector
+        self._vectors.move_to_end(key)
+        while len(self._vectors) > self.max_entries:
+            self._vectors.popitem(last=False)
+
+
+class VectorStore:
+    """FAISS index over context chunks with an embedding cache keyed by chunk hash."""
+
+    def __init__(self, embedding_model: Optional[str] = None, chunk_tokens: int = 300,
+                 embedding_cache: Optional[EmbeddingCache] = None):
+        self.embedding_model = embedding_model or settings.EMBEDDING_MODEL
+        self.chunk_tokens = chunk_tokens
+        self._chunks: List[Chunk] = []
+        self._index: Optional["faiss.Index"] = None
+        self._embeddings = embedding_cache if embedding_cache is not None else EmbeddingCache()
+        self._lock = asyncio.Lock()
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        return openai_provider.client
+
+    async def embed(self, texts: List[str]) -> "np.ndarray":
+        """Embed texts and return L2-normalized float32 vectors."""
+        return await embed_texts(self.client, self.embedding_model, texts)
+
+    async def rebuild(self, documents: Dict[str, str]) -> None:
+        """Re-chunk the given documents (source -> markdown) and rebuild the index."""
+        import faiss
+        import numpy as np
+
+        chunks = [chunk for source, text in documents.items()
+                  for chunk in chunk_markdown(text, source, self.chunk_tokens)]
+        async with self._lock:
+            vectors: Dict[str, "np.ndarray"] = {}
+            missing: Dict[str, str] = {}
+            for chunk in chunks:
+                vector = self._embeddings.get(chunk.key)
+                if vector is None:
+                    missing[chunk.key] = chunk.text
+                else:
+                    vectors[chunk.key] = vector
+            if missing:
+                embedded = await self.embed(list(missing.values()))
+                for key, vector in zip(missing, embedded):
+                    self._embeddings.put(key, vector)
+                    vectors[key] = vector
+
+            index = None
+            if chunks:
+                matrix = np.stack([vectors[c.key] for c in chunks])
+                index = faiss.IndexFlatIP(matrix.shape[1])
+                index.add(matrix)
+            self._chunks, self._index = chunks, index
+
+    async def search(self, question: str, top_k: int, token_budget: int,
+                     pinned_headings: tuple = (), query_vector: Optional["np.ndarray"] = None) -> List[Chunk]:
+        """Return the top-k chunks for a question that fit the token budget, in document order.
+
+        query_vector is the question's normalized embedding from the same model, if the
+        caller already has one (e.g. from the answer cache); otherwise it is embedded here.
+        """
+        chunks, index = self._chunks, self._index
+        if index is None or not chunks:
+            return []
+
+        selected: List[Chunk] = []
+        used = 0
+        for chunk in chunks:
+            if any(h in chunk.heading for h in pinned_headings) and used + chunk.tokens <= token_budget:
+                selected.append(chunk)
+                used += chunk.tokens
+
+        if query_vector is not None:
+            query = query_vector.reshape(1, -1)
+        else:
+            query = await self.embed([question])
+        _, ids = index.search(query, min(top_k, len(chunks)))
+        for i in ids[0]:
+            if i < 0:
+                continue
+            chunk = chunks[i]
+            if chunk in selected or used + chunk.tokens > token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk.tokens
+
+        order = {source: n for n, source in enumerate(dict.fromkeys(c.source for c in chunks))}
+        return sorted(selected, key=lambda c: (order[c.source], c.position))
@@ -0,0 +1,12 @@
+"""End-to-end benchmarks for the ReviewMate API.
+
+Requests go through the ASGI app in-process, against fixture git repositories served
+over file:// and local stand-ins for the GitHub GraphQL and OpenAI APIs, so results
+depend only on this machine and the code under test.
+
+    python -m benchmarks                          Run every scenario and print timings
+    python -m benchmarks --save-baseline main     Store the results as a baseline
+    python -m benchmarks --baseline main          Compare with it; exit 1 on regressions
+
+Run from the backend directory.
+"""
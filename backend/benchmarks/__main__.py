@@ -0,0 +1,71 @@
+"""Command line entry point: python -m benchmarks --help"""
+import argparse
+import asyncio
+import sys
+
+from .baseline import compare, format_differences, format_summary, load_report, new_report, save_report
+from .fixtures import FIXTURES
+from .harness import BENCH_REPO, SCENARIOS, BenchEnvironment, run_scenarios
+from .stubs import GITHUB_DEFAULTS, OPENAI_DEFAULTS
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    names = [scenario.name for scenario in SCENARIOS]
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="End-to-end API benchmarks")
+    parser.add_argument("--scenario", action="append", choices=names, help="Run only these (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the first is the cold run")
+    parser.add_argument("--fixture", default="sample", choices=sorted(FIXTURES), help="Repository under test")
+    parser.add_argument("--github-latency-ms", type=float, default=GITHUB_DEFAULTS["latency_ms"])
+    parser.add_argument("--github-page-size", type=int, default=GITHUB_DEFAULTS["page_size"])
+    parser.add_argument("--openai-latency-ms", type=float, default=OPENAI_DEFAULTS["latency_ms"])
+    parser.add_argument("--openai-ms-per-token", type=float, default=OPENAI_DEFAULTS["ms_per_token"])
+    parser.add_argument("--embedding-latency-ms", type=float, default=OPENAI_DEFAULTS["embedding_latency_ms"])
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store the report as benchmarks/baselines/NAME.json")
+    parser.add_argument("--baseline", metavar="NAME_OR_PATH", help="Compare with a stored baseline or report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default 0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Slowdowns below this many seconds never count (default 0.05)")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory (fixtures, data)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    github = {**GITHUB_DEFAULTS, "latency_ms": args.github_latency_ms, "page_size": args.github_page_size}
+    openai = {**OPENAI_DEFAULTS, "latency_ms": args.openai_latency_ms,
+              "ms_per_token": args.openai_ms_per_token, "embedding_latency_ms": args.embedding_latency_ms}
+    report = new_report({
+        "fixture": args.fixture,
+        "repeat": args.repeat,
+        "scenarios": [s.name for s in scenarios],
+        "github": github,
+        "openai": openai,
+    })
+
+    with BenchEnvironment({BENCH_REPO: args.fixture}, github, openai, keep=args.keep) as env:
+        if args.keep:
+            print(f"Work directory: {env.work_dir}")
+        report["scenarios"] = asyncio.run(run_scenarios(env, scenarios, args.repeat))
+
+    print(format_summary(report))
+    if args.output:
+        save_report(report, args.output)
+    if args.save_baseline:
+        print(f"Baseline saved to {save_report(report, args.save_baseline)}")
+
+    failed = any(s["summary"]["errors"] for s in report["scenarios"].values())
+    if args.baseline:
+        differences = compare(load_report(args.baseline), report, args.tolerance, args.min_delta)
+        print()
+        print(format_differences(differences))
+        regressions = [d for d in differences if d.regression]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
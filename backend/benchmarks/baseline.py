@@ -0,0 +1,175 @@
+"""Benchmark reports and baseline comparison.
+
+A report is a JSON document:
+
+    {
+      "version": 1,
+      "created_at": "...",
+      "environment": {"python": ..., "platform": ..., "cpus": ..., "tools": {...}},
+      "config": {...},          # Everything that changes what is measured
+      "scenarios": {
+        "<name>": {
+          "runs": [{"status": 200, "phases": {"request": 1.2, ...}, "upstream": {...}}, ...],
+          "summary": {"phases": {"<phase>": {"cold": .., "warm": .., "min": .., "max": ..}},
+                      "upstream": {"<operation>": {"cold": .., "warm": ..}},
+                      "errors": 0}
+        }
+      }
+    }
+
+"cold" is the first run (empty caches), "warm" the median of the remaining runs.
+Baselines are reports saved under benchmarks/baselines/<name>.json. Timings regress
+when they exceed the baseline by more than the relative tolerance and the absolute
+floor; upstream request counts are deterministic and regress on any increase.
+Reports are only comparable when their "config" blocks match; compare() warns
+otherwise.
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+REPORT_VERSION = 1
+TOOLS = ("git", "semgrep", "gitleaks", "pip-audit", "npm", "pylint", "eslint", "radon")
+
+
+def environment() -> Dict[str, Any]:
+    """What the numbers depend on besides the code: interpreter, machine and tools."""
+    git = subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git": git,
+        "tools": {tool: shutil.which(tool) is not None for tool in TOOLS},
+    }
+
+
+def _spread(values: List[float]) -> Dict[str, float]:
+    warm = values[1:] or values
+    return {"cold": values[0], "warm": statistics.median(warm), "min": min(values), "max": max(values)}
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Collapse a scenario's runs into cold/warm figures per phase and upstream operation."""
+    ok = [run for run in runs if run["status"] == 200]
+    phases: Dict[str, List[float]] = {}
+    upstream: Dict[str, List[float]] = {}
+    for run in ok:
+        for phase, seconds in run["phases"].items():
+            phases.setdefault(phase, []).append(seconds)
+        for operation, count in run["upstream"].items():
+            upstream.setdefault(operation, []).append(count)
+    return {
+        "phases": {phase: _spread(values) for phase, values in phases.items()},
+        "upstream": {op: {"cold": v[0], "warm": statistics.median(v[1:] or v)} for op, v in upstream.items()},
+        "errors": len(runs) - len(ok),
+    }
+
+
+def new_report(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": config,
+        "scenarios": {},
+    }
+
+
+def load_report(path_or_name: str) -> Dict[str, Any]:
+    """Load a report from a path, or a baseline by name."""
+    path = Path(path_or_name)
+    if not path.suffix:
+        path = BASELINE_DIR / f"{path_or_name}.json"
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(report: Dict[str, Any], path_or_name: str) -> Path:
+    """Write a report to a path, or as a baseline by name."""
+    path = Path(path_or_name)
+    if not path.suffix:
+        path = BASELINE_DIR / f"{path_or_name}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+@dataclass
+class Difference:
+    scenario: str
+    metric: str      # "<phase> (cold|warm)" or "upstream <operation> (cold|warm)"
+    baseline: float
+    current: float
+    regression: bool
+
+    @property
+    def change(self) -> Optional[float]:
+        if self.baseline:
+            return (self.current - self.baseline) / self.baseline
+        return 0.0 if not self.current else None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            tolerance: float = 0.25, min_delta: float = 0.05) -> List[Difference]:
+    """Compare every figure present in both reports."""
+    if baseline.get("config") != current.get("config"):
+        print("Warning: benchmark configurations differ; timings are not directly comparable")
+    if baseline.get("environment", {}).get("tools") != current.get("environment", {}).get("tools"):
+        print("Warning: installed analyzers differ from the baseline's")
+
+    differences = []
+    for name, scenario in current["scenarios"].items():
+        reference = baseline["scenarios"].get(name)
+        if not reference:
+            continue
+        if scenario["summary"]["errors"] > reference["summary"]["errors"]:
+            differences.append(Difference(name, "errors", reference["summary"]["errors"],
+                                          scenario["summary"]["errors"], True))
+        for phase, figures in scenario["summary"]["phases"].items():
+            old = reference["summary"]["phases"].get(phase)
+            if not old:
+                continue
+            for kind in ("cold", "warm"):
+                slower = figures[kind] - old[kind]
+                regression = slower > min_delta and figures[kind] > old[kind] * (1 + tolerance)
+                differences.append(Difference(name, f"{phase} ({kind})", old[kind], figures[kind], regression))
+        for operation, figures in scenario["summary"]["upstream"].items():
+            old = reference["summary"]["upstream"].get(operation, {"cold": 0, "warm": 0})
+            for kind in ("cold", "warm"):
+                differences.append(Difference(name, f"upstream {operation} ({kind})", old[kind],
+                                              figures[kind], figures[kind] > old[kind]))
+    return differences
+
+
+def format_summary(report) -> str:
+    lines = [f"{'scenario':<22} {'phase':<22} {'cold':>9} {'warm':>9} {'min':>9} {'max':>9}"]
+    for name, scenario in report["scenarios"].items():
+        summary = scenario["summary"]
+        for phase, f in summary["phases"].items():
+            lines.append(f"{name:<22} {phase:<22} {f['cold']:>9.3f} {f['warm']:>9.3f} {f['min']:>9.3f} {f['max']:>9.3f}")
+        upstream = ", ".join(f"{op}={f['cold']:g}/{f['warm']:g}" for op, f in sorted(summary["upstream"].items()))
+        if upstream:
+            lines.append(f"{'':<22} upstream cold/warm: {upstream}")
+        if summary["errors"]:
+            lines.append(f"{'':<22} {summary['errors']} failed run(s)")
+    return "\n".join(lines)
+
+
+def format_differences(differences: List[Difference]) -> str:
+    lines = [f"{'scenario':<22} {'metric':<38} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for d in differences:
+        change = f"{d.change:+.0%}" if d.change is not None else "new"
+        flag = "  REGRESSION" if d.regression else ""
+        lines.append(f"{d.scenario:<22} {d.metric:<38} {d.baseline:>10.3f} {d.current:>10.3f} {change:>8}{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,193 @@
+"""Drive the app end to end against fixture repositories and local stand-ins.
+
+BenchEnvironment builds the fixtures, starts the GitHub and OpenAI stand-ins and points
+the app's settings at them (plus a throwaway DATA_DIR), all before the app is
+imported. run_scenarios() then sends requests through the ASGI app, with its lifespan
+running, and records for every request:
+
+    phases    "request" (wall time seen by the client) plus the phase timings the
+              endpoint reports itself (code quality "timing", SAST "timing.breakdown")
+    upstream  Requests each stand-in served meanwhile, e.g. "github_graphql.issues"
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .baseline import summarize
+from .fixtures import build_fixtures, git_environment
+from .stubs import StubServer
+
+BENCH_TOKEN = "bench-token"
+BENCH_REPO = "bench/sample"
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: str
+    body: Callable[[str, int], Dict[str, Any]]  # (repo URL, iteration) -> JSON body
+    phases: Callable[[Dict[str, Any]], Dict[str, float]] = lambda response: {}
+    setup: Optional[Callable[[httpx.AsyncClient, str], Awaitable[None]]] = None
+
+
+def _github_body(repo_url: str, iteration: int) -> Dict[str, Any]:
+    return {"repo_url": repo_url, "pat_token": BENCH_TOKEN}
+
+
+def _code_quality_phases(response: Dict[str, Any]) -> Dict[str, float]:
+    return {name: seconds for name, seconds in response["timing"].items() if name != "total_seconds"}
+
+
+def _sast_phases(response: Dict[str, Any]) -> Dict[str, float]:
+    breakdown = response["timing"]["breakdown"]
+    return {name.removesuffix("_seconds"): seconds for name, seconds in breakdown.items()}
+
+
+async def _seed_chat_context(client: httpx.AsyncClient, repo_url: str) -> None:
+    """Give the chatbot analysis results to retrieve from, as the dashboard does after a scan."""
+    data = {
+        "repoUrl": repo_url,
+        "files_analyzed": {"total": 6, "by_language": {"python": 4, "javascript": 2}},
+        "issues": {"linting": 14, "todos": 2, "files_without_docs": 4,
+                   "duplicate_files": ["web/api.js", "web/utils.js"]},
+        "top_issues": [{"file": "app/service.py", "summary": "handle() mixes parsing and I/O"}],
+        "quality_score": 6.8,
+    }
+    response = await client.post("/api/v1/chatbot/update-context",
+                                 params={"analysis_type": "code_quality"}, json=data)
+    response.raise_for_status()
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("github_forks", "/api/v1/github/forks", _github_body),
+    Scenario("github_contributors", "/api/v1/github/contributors", _github_body),
+    Scenario("github_issues", "/api/v1/github/issues", _github_body),
+    Scenario("github_pull_requests", "/api/v1/github/pull-requests", _github_body),
+    Scenario("code_quality", "/api/v1/scan/code_quality.api",
+             lambda repo_url, iteration: {"repoUrl": repo_url}, _code_quality_phases),
+    Scenario("sast", "/api/v1/sast/scan", _github_body, _sast_phases),
+    # A new question each run: repeated opening questions would be answer-cache hits
+    Scenario("chat", "/api/v1/chatbot/chat",
+             lambda repo_url, iteration: {"question": f"Which files should we fix first? (run {iteration})",
+                                          "repo_url": repo_url},
+             setup=_seed_chat_context),
+]
+
+
+class BenchEnvironment:
+    """Fixtures, stand-ins and app settings for one benchmark session; a context manager.
+
+    Must be entered before anything imports the app, since settings are read at import.
+    """
+
+    def __init__(self, fixtures: Dict[str, str], github: Optional[Dict[str, Any]] = None,
+                 openai: Optional[Dict[str, Any]] = None, keep: bool = False):
+        self.fixtures = fixtures
+        self.github_config = github or {}
+        self.openai_config = openai or {}
+        self.keep = keep
+        self.work_dir = ""
+        self.urls: Dict[str, str] = {}
+        self._stack = ExitStack()
+        self._saved_env: Dict[str, Optional[str]] = {}
+
+    def __enter__(self) -> "BenchEnvironment":
+        if "app.core.config" in sys.modules:
+            raise RuntimeError("The app was imported before the benchmark environment was set up")
+        self.work_dir = tempfile.mkdtemp(prefix="reviewmate-bench-")
+        try:
+            self.urls = build_fixtures(os.path.join(self.work_dir, "repos"), self.fixtures)
+            self.github = self._stack.enter_context(StubServer("github", self.github_config))
+            self.openai = self._stack.enter_context(StubServer("openai", self.openai_config))
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+
+        data_dir = os.path.join(self.work_dir, "data")
+        self._set_env({
+            **git_environment(os.path.join(self.work_dir, "repos"), BENCH_TOKEN),
+            "GIT_TERMINAL_PROMPT": "0",
+            # npm audits resolve lockfiles against the registry; offline they fail fast instead
+            "npm_config_offline": "true",
+            "GITHUB_GRAPHQL_URL": f"{self.github.url}/graphql",
+            "GITHUB_TOKEN": BENCH_TOKEN,
+            "OPENAI_BASE_URL": f"{self.openai.url}/v1",
+            "OPENAI_API_KEY": "sk-bench",
+            "DATA_DIR": data_dir,
+            "PDF_CACHE_DIR": os.path.join(data_dir, "documents"),
+            "SECRETS_MIRROR_DIR": os.path.join(data_dir, "mirrors"),
+            # Pre-provisioned rule packs can be passed in; nothing is downloaded either way
+            "SEMGREP_RULES_DIR": os.environ.get("SEMGREP_RULES_DIR", os.path.join(data_dir, "semgrep-rules")),
+            "SEMGREP_RULES_AUTO_REFRESH": "false",
+        })
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stack.close()
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        if self.work_dir and not self.keep:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _set_env(self, values: Dict[str, str]) -> None:
+        for key, value in values.items():
+            self._saved_env.setdefault(key, os.environ.get(key))
+            os.environ[key] = value
+
+    def upstream_stats(self) -> Counter:
+        """Requests served by the stand-ins so far, keyed "<service>.<operation>"."""
+        counts = Counter()
+        for service, stub in (("github_graphql", self.github), ("openai", self.openai)):
+            for operation, count in stub.stats().items():
+                counts[f"{service}.{operation}"] = count
+        return counts
+
+
+async def run_scenarios(env: BenchEnvironment, scenarios: List[Scenario], repeat: int,
+                        repo: str = BENCH_REPO) -> Dict[str, Any]:
+    """Run every scenario `repeat` times in order; returns {name: {"runs", "summary"}}."""
+    from app.main import app
+
+    repo_url = env.urls[repo]
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://reviewmate.bench", timeout=None) as client:
+            for scenario in scenarios:
+                if scenario.setup:
+                    await scenario.setup(client, repo_url)
+                runs = []
+                for iteration in range(repeat):
+                    before = env.upstream_stats()
+                    start = time.perf_counter()
+                    response = await client.post(scenario.path, json=scenario.body(repo_url, iteration))
+                    elapsed = time.perf_counter() - start
+                    run = {
+                        "status": response.status_code,
+                        "phases": {"request": round(elapsed, 4)},
+                        "upstream": dict(env.upstream_stats() - before),
+                    }
+                    if response.status_code == 200:
+                        body = response.json()
+                        run["phases"].update(scenario.phases(body))
+                        if isinstance(body, dict) and body.get("degraded"):
+                            # Timings of a partial scan are not comparable with a full one
+                            run["degraded"] = body.get("skipped_tools", []) + body.get("truncated_tools", [])
+                            print(f"{scenario.name}: degraded result ({', '.join(run['degraded'])})")
+                    else:
+                        run["error"] = response.text[:500]
+                        print(f"{scenario.name}: HTTP {response.status_code}: {run['error']}")
+                    runs.append(run)
+                results[scenario.name] = {"runs": runs, "summary": summarize(runs)}
+    return results
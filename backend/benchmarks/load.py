@@ -0,0 +1,371 @@
+"""Concurrent load: dashboard traffic from several users at once.
+
+A fixed, seeded schedule of requests drawn from a weighted mix of the end-to-end
+scenarios (harness.SCENARIOS: the four GitHub calls, code quality, SAST and chat) is
+replayed by `concurrency` clients against the app and the local stand-ins. Each
+client sends its next request as soon as the previous one finishes (a closed loop),
+so concurrency is the number of requests in flight. Requests are spread over
+`repos` copies of the fixture with distinct commits, so scans of different
+repositories do not share per-commit caches.
+
+The app runs in this process, as in the harness, and a report records:
+
+    endpoints       Per scenario: requests, errors, throughput and latency
+                    percentiles (p50/p95/p99/max, seconds)
+    event_loop_lag  How late a 50 ms timer on the app's event loop fires (p50/p99/max);
+                    anything that blocks the loop (parsing, hashing, sync I/O) shows here
+    resources       Peak RSS of this process, and peak total RSS and process count of
+                    its process tree (git, analyzers, shells), sampled every 100 ms
+                    from a thread. Stand-ins are excluded. Tree figures need /proc.
+    upstream        Requests the stand-ins served during the run
+
+Reports use the layout of baseline.py with a "load" section instead of "scenarios",
+plus every request as [scenario, status, start, seconds] for plotting, and are
+compared the same way: latencies, lag and memory regress past the tolerance,
+throughput regresses when it drops by as much.
+
+    python -m benchmarks.load --concurrency 8 --requests 200
+    python -m benchmarks.load --concurrency 8 --save-baseline load-c8
+    python -m benchmarks.load --concurrency 8 --baseline load-c8
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+import httpx
+
+from .baseline import Difference, format_differences, load_report, new_report, save_report
+from .fixtures import FIXTURES
+from .harness import SCENARIOS, BenchEnvironment, Scenario
+from .stubs import GITHUB_DEFAULTS, OPENAI_DEFAULTS
+
+# One dashboard visit: the GitHub panels, both scans and a question
+DEFAULT_MIX = {scenario.name: 1.0 for scenario in SCENARIOS}
+LAG_INTERVAL = 0.05
+SAMPLE_INTERVAL = 0.1
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _distribution(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(max(values, default=0.0), 4),
+        "mean": round(statistics.fmean(values), 4) if values else 0.0,
+    }
+
+
+def schedule(mix: Dict[str, float], requests: int, repos: int, seed: int = 0) -> List[Tuple[str, int]]:
+    """The (scenario, repository index) sequence of a run; the same for the same arguments."""
+    rng = random.Random(f"load:{seed}")
+    names = sorted(name for name, weight in mix.items() if weight > 0)
+    weights = [mix[name] for name in names]
+    return [(rng.choices(names, weights)[0], rng.randrange(repos)) for _ in range(requests)]
+
+
+class ProcessSampler:
+    """Samples RSS and the process tree of this process from a background thread.
+
+    Runs in a thread rather than on the event loop, so samples keep coming while the
+    loop is blocked. Subtrees rooted at `exclude` (the stand-ins) are left out.
+    """
+
+    def __init__(self, exclude: Sequence[int] = (), interval: float = SAMPLE_INTERVAL):
+        self.exclude: Set[int] = set(exclude)
+        self.interval = interval
+        self.available = os.path.isdir("/proc")
+        self.peak_tree_rss = 0
+        self.peak_processes = 0
+        self.process_samples: List[int] = []
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if self.available else 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-process-sampler", daemon=True)
+
+    def _tree(self) -> Tuple[int, int]:
+        """(processes, RSS bytes) of this process and its descendants."""
+        children: Dict[int, List[int]] = {}
+        rss: Dict[int, int] = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", encoding="utf-8", errors="replace") as f:
+                    # The command name may contain spaces; fields resume after its ")"
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            pid = int(entry)
+            children.setdefault(int(fields[1]), []).append(pid)
+            rss[pid] = int(fields[21]) * self._page_size
+        count, total, pending = 0, 0, [os.getpid()]
+        while pending:
+            pid = pending.pop()
+            if pid in self.exclude:
+                continue
+            count += 1
+            total += rss.get(pid, 0)
+            pending.extend(children.get(pid, ()))
+        return count, total
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            processes, total = self._tree()
+            self.peak_tree_rss = max(self.peak_tree_rss, total)
+            self.peak_processes = max(self.peak_processes, processes)
+            self.process_samples.append(processes)
+
+    def __enter__(self) -> "ProcessSampler":
+        if self.available:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.available:
+            self._stop.set()
+            self._thread.join()
+
+    def summary(self) -> Dict[str, Any]:
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        result = {"peak_rss_mb": round(peak_rss_mb, 1)}
+        if self.available:
+            result.update({
+                "peak_tree_rss_mb": round(self.peak_tree_rss / 2 ** 20, 1),
+                "peak_processes": self.peak_processes,
+                "mean_processes": round(statistics.fmean(self.process_samples), 2) if self.process_samples else 0.0,
+            })
+        return result
+
+
+async def _monitor_lag(samples: List[float], interval: float = LAG_INTERVAL) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_load(env: BenchEnvironment, plan: List[Tuple[str, int]], concurrency: int,
+                   repos: List[str], warmup: bool = False) -> Dict[str, Any]:
+    """Replay plan with `concurrency` clients; returns the "load" section and the raw requests."""
+    from app.main import app
+
+    scenarios: Dict[str, Scenario] = {s.name: s for s in SCENARIOS}
+    urls = [env.urls[repo] for repo in repos]
+    used = {name for name, _ in plan}
+    records: List[List[Any]] = []
+    lag: List[float] = []
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://reviewmate.bench", timeout=None) as client:
+            for name in sorted(used):
+                scenario = scenarios[name]
+                for url in urls:
+                    if scenario.setup:
+                        await scenario.setup(client, url)
+                    if warmup:
+                        await client.post(scenario.path, json=scenario.body(url, -1))
+
+            queue = iter(enumerate(plan))
+            started = time.perf_counter()
+
+            async def worker() -> None:
+                for iteration, (name, repo) in queue:
+                    scenario = scenarios[name]
+                    start = time.perf_counter()
+                    try:
+                        response = await client.post(scenario.path, json=scenario.body(urls[repo], iteration))
+                        status = response.status_code
+                    except Exception as e:
+                        print(f"{name}: request failed: {e}")
+                        status = 0
+                    records.append([name, status, round(start - started, 4), round(time.perf_counter() - start, 4)])
+
+            before = env.upstream_stats()
+            with ProcessSampler(exclude=[env.github.process.pid, env.openai.process.pid]) as sampler:
+                monitor = asyncio.create_task(_monitor_lag(lag))
+                try:
+                    await asyncio.gather(*(worker() for _ in range(concurrency)))
+                finally:
+                    monitor.cancel()
+            wall = time.perf_counter() - started
+            upstream = dict(env.upstream_stats() - before)
+
+    endpoints = {}
+    for name in sorted(used):
+        mine = [r for r in records if r[0] == name]
+        ok = [r[3] for r in mine if r[1] == 200]
+        endpoints[name] = {
+            "requests": len(mine),
+            "errors": len(mine) - len(ok),
+            "throughput_rps": round(len(ok) / wall, 3),
+            "latency": _distribution(ok),
+        }
+    ok_total = sum(e["requests"] - e["errors"] for e in endpoints.values())
+    load = {
+        "wall_seconds": round(wall, 3),
+        "requests": len(records),
+        "errors": len(records) - ok_total,
+        "throughput_rps": round(ok_total / wall, 3),
+        "endpoints": endpoints,
+        "event_loop_lag": _distribution(lag),
+        "resources": sampler.summary(),
+        "upstream": upstream,
+    }
+    return {"load": load, "requests": sorted(records, key=lambda r: r[2])}
+
+
+def compare_load(baseline: Dict[str, Any], current: Dict[str, Any],
+                 tolerance: float = 0.25, min_delta: float = 0.05) -> List[Difference]:
+    """Compare two load reports; min_delta is in seconds for times and 10x that in MB for memory."""
+    if baseline.get("config") != current.get("config"):
+        print("Warning: load configurations differ; results are not directly comparable")
+    if baseline.get("environment", {}).get("tools") != current.get("environment", {}).get("tools"):
+        print("Warning: installed analyzers differ from the baseline's")
+
+    def higher_is_worse(scope: str, metric: str, old: float, new: float, floor: float) -> Difference:
+        regression = new - old > floor and new > old * (1 + tolerance)
+        return Difference(scope, metric, old, new, regression)
+
+    old, new = baseline["load"], current["load"]
+    differences = [
+        Difference("overall", "throughput_rps", old["throughput_rps"], new["throughput_rps"],
+                   new["throughput_rps"] < old["throughput_rps"] * (1 - tolerance)),
+    ]
+    if new["errors"] > old["errors"]:
+        differences.append(Difference("overall", "errors", old["errors"], new["errors"], True))
+    for metric in ("p99", "max"):
+        differences.append(higher_is_worse("overall", f"event_loop_lag {metric}", old["event_loop_lag"][metric],
+                                           new["event_loop_lag"][metric], min_delta))
+    for metric in ("peak_rss_mb", "peak_tree_rss_mb", "peak_processes"):
+        if metric in old["resources"] and metric in new["resources"]:
+            floor = 2 if metric == "peak_processes" else min_delta * 1000
+            differences.append(higher_is_worse("overall", metric, old["resources"][metric],
+                                               new["resources"][metric], floor))
+    for name, endpoint in new["endpoints"].items():
+        reference = old["endpoints"].get(name)
+        if not reference:
+            continue
+        if endpoint["errors"] > reference["errors"]:
+            differences.append(Difference(name, "errors", reference["errors"], endpoint["errors"], True))
+        for metric in ("p50", "p95", "p99"):
+            differences.append(higher_is_worse(name, f"latency {metric}", reference["latency"][metric],
+                                               endpoint["latency"][metric], min_delta))
+    return differences
+
+
+def format_load(load: Dict[str, Any]) -> str:
+    lines = [f"{'endpoint':<22} {'requests':>8} {'errors':>6} {'req/s':>7} "
+             f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+    for name, e in load["endpoints"].items():
+        latency = e["latency"]
+        lines.append(f"{name:<22} {e['requests']:>8} {e['errors']:>6} {e['throughput_rps']:>7.2f} "
+                     f"{latency['p50']:>8.3f} {latency['p95']:>8.3f} {latency['p99']:>8.3f} {latency['max']:>8.3f}")
+    lag = load["event_loop_lag"]
+    lines.append(f"{'all':<22} {load['requests']:>8} {load['errors']:>6} {load['throughput_rps']:>7.2f}"
+                 f"   in {load['wall_seconds']:.1f}s")
+    lines.append(f"event loop lag: p50 {lag['p50'] * 1000:.1f} ms, p99 {lag['p99'] * 1000:.1f} ms, "
+                 f"max {lag['max'] * 1000:.1f} ms")
+    lines.append("resources: " + ", ".join(f"{k}={v}" for k, v in load["resources"].items()))
+    if load["upstream"]:
+        lines.append("upstream: " + ", ".join(f"{op}={n}" for op, n in sorted(load["upstream"].items())))
+    return "\n".join(lines)
+
+
+def _mix(value: str) -> Dict[str, float]:
+    """"github_issues=2,sast=1" -> weights; scenarios not named are left out."""
+    names = {s.name for s in SCENARIOS}
+    mix = {}
+    for part in filter(None, value.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in names:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description="Concurrent load benchmark")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight (default 4)")
+    parser.add_argument("--requests", type=int, default=70, help="Requests in the run (default 70)")
+    parser.add_argument("--mix", type=_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. github_issues=2,sast=1 (default: all, equally)")
+    parser.add_argument("--repos", type=int, default=4, help="Distinct fixture repositories (default 4)")
+    parser.add_argument("--fixture", default="sample", choices=sorted(FIXTURES), help="Repository under test")
+    parser.add_argument("--seed", type=int, default=0, help="Schedule seed")
+    parser.add_argument("--warmup", action="store_true",
+                        help="Send every scenario once per repository first (measure warm caches)")
+    parser.add_argument("--github-latency-ms", type=float, default=GITHUB_DEFAULTS["latency_ms"])
+    parser.add_argument("--openai-latency-ms", type=float, default=OPENAI_DEFAULTS["latency_ms"])
+    parser.add_argument("--embedding-latency-ms", type=float, default=OPENAI_DEFAULTS["embedding_latency_ms"])
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store the report as benchmarks/baselines/NAME.json")
+    parser.add_argument("--baseline", metavar="NAME_OR_PATH", help="Compare with a stored baseline or report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change (default 0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Slowdowns below this many seconds never count (default 0.05)")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory (fixtures, data)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    github = {**GITHUB_DEFAULTS, "latency_ms": args.github_latency_ms}
+    openai = {**OPENAI_DEFAULTS, "latency_ms": args.openai_latency_ms,
+              "embedding_latency_ms": args.embedding_latency_ms}
+    repos = [f"bench/load-{i}" for i in range(args.repos)]
+    plan = schedule(args.mix, args.requests, args.repos, args.seed)
+    report = new_report({
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "mix": args.mix,
+        "repos": args.repos,
+        "fixture": args.fixture,
+        "seed": args.seed,
+        "warmup": args.warmup,
+        "github": github,
+        "openai": openai,
+    })
+    del report["scenarios"]
+
+    fixtures = {repo: f"{args.fixture}#{i}" for i, repo in enumerate(repos)}
+    with BenchEnvironment(fixtures, github, openai, keep=args.keep) as env:
+        if args.keep:
+            print(f"Work directory: {env.work_dir}")
+        report.update(asyncio.run(run_load(env, plan, args.concurrency, repos, args.warmup)))
+
+    print(format_load(report["load"]))
+    if args.output:
+        save_report(report, args.output)
+    if args.save_baseline:
+        print(f"Baseline saved to {save_report(report, args.save_baseline)}")
+
+    if args.baseline:
+        differences = compare_load(load_report(args.baseline), report, args.tolerance, args.min_delta)
+        print()
+        print(format_differences(differences))
+        regressions = [d for d in differences if d.regression]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+            return 1
+    return 1 if report["load"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Scaling curves for the subsystems whose cost grows with repository or scan size.
+
+Each subsystem is measured at several sizes on synthetic inputs (synthetic.py):
+
+    code_quality  size = files in the repository
+                  manifest      build_manifest() over the checkout
+                  sampling      get_relevant_files() (path filters, header reads, scoring)
+                  duplicates    find_duplicates() over every candidate file
+    sast          size = findings per tool, spread over a 10k-file path space
+                  semgrep           streaming Semgrep JSON into the ScanAggregator
+                  gitleaks          parsing and normalizing a Gitleaks report, then aggregating
+                  dependency_audit  streaming pip-audit JSON into the aggregator
+                  report            encoding the aggregated results as the response would be
+    context       size = SAST findings in the chatbot's security section
+                  update        ContextManager.update_context()
+                  index         first question: render, chunk, embed and index the context
+                  search        a second question against the built index
+
+Every point runs in a fresh interpreter, so caches are cold and peak RSS belongs to
+that point alone. Embeddings come from the local OpenAI stand-in with no latency.
+Results are written as CSV (one row per stage) for plotting:
+
+    subsystem,size,run,stage,seconds,peak_rss_mb,base_rss_mb,detail
+
+base_rss_mb is the RSS after imports, before the measured work.
+
+    python -m benchmarks.scaling --output curves.csv
+    python -m benchmarks.scaling --subsystem code_quality --files 1000,10000,100000
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from .stubs import StubServer
+from .synthetic import RepoSpec, SyntheticRepo, build_synthetic, write_tool_outputs
+
+SUBSYSTEMS = ("code_quality", "sast", "context")
+PATH_SPACE_FILES = 10000
+CSV_FIELDS = ("subsystem", "size", "run", "stage", "seconds", "peak_rss_mb", "base_rss_mb", "detail")
+
+
+def _rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class _Stages:
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self._start = 0.0
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+
+    def stop(self, stage: str) -> None:
+        self.seconds[stage] = round(time.perf_counter() - self._start, 4)
+        self._start = time.perf_counter()
+
+
+async def _code_quality_point(checkout: str, stages: _Stages) -> Dict[str, Any]:
+    from app.api.code_quality import get_relevant_files
+    from app.utils.duplicate_detector import candidate_files, find_duplicates
+    from app.utils.file_store import FileStore
+    from app.utils.repo_manifest import build_manifest
+
+    stages.start()
+    manifest = build_manifest(checkout)
+    stages.stop("manifest")
+    store = FileStore(checkout)
+    try:
+        selected = await get_relevant_files(store, manifest, 30)
+        stages.stop("sampling")
+    finally:
+        store.close()
+    paths = candidate_files(manifest)
+    stages.start()
+    duplicates = find_duplicates(checkout, paths)
+    stages.stop("duplicates")
+    return {"files": len(manifest.files), "selected": sum(map(len, selected.values())),
+            "duplicate_candidates": len(paths), "duplicate_files": len(duplicates["duplicate_files"])}
+
+
+async def _aggregate(tools: str, stages: Optional[_Stages] = None):
+    """Feed the synthetic reports through the SAST parsing paths into a ScanAggregator."""
+    from app.api.sast_api import ScanAggregator, normalize_pip_audit, normalize_severity
+    from app.utils.secret_scanner import normalize_finding
+    from app.utils.tool_output import ToolRun, iter_json_file
+
+    stages = stages or _Stages()
+    cap = 1 << 40
+    aggregator = ScanAggregator()
+    stages.start()
+    run = ToolRun("semgrep", f"cat {os.path.join(tools, 'semgrep.json')}", cap)
+    async for r in run.items("results.item"):
+        aggregator.add_static_issue(r.get("path", "unknown"), r.get("start", {}).get("line", 0),
+                                    normalize_severity(r.get("severity", "INFO")),
+                                    r.get("extra", {}).get("message", "Unknown issue"))
+    stages.stop("semgrep")
+    leaks = [normalize_finding(leak) for leak in iter_json_file(os.path.join(tools, "gitleaks.json"), "item", cap)]
+    for leak in leaks:
+        aggregator.add_secret(leak)
+    stages.stop("gitleaks")
+    run = ToolRun("pip-audit", f"cat {os.path.join(tools, 'pip-audit.json')}", cap)
+    async for dep in run.items("dependencies.item"):
+        for finding in normalize_pip_audit({"dependencies": [dep]}):
+            aggregator.add_dependency("requirements.txt", finding)
+    stages.stop("dependency_audit")
+    return aggregator
+
+
+async def _sast_point(tools: str, stages: _Stages) -> Dict[str, Any]:
+    from fastapi.encoders import jsonable_encoder
+
+    aggregator = await _aggregate(tools, stages)
+    response = {
+        "severity_summary": {level.value: group for level, group in aggregator.severity_groups.items()},
+        "vulnerabilities": {"total": aggregator.vuln_total, "files": aggregator.vuln_by_file},
+        "secrets": {"total": aggregator.secret_total, "files": aggregator.secret_by_file},
+        "static_warnings": {"total": aggregator.static_total, "files": aggregator.static_by_file},
+        "dependency_cves": {"files": aggregator.dep_cves},
+    }
+    stages.start()
+    body = json.dumps(jsonable_encoder(response))
+    stages.stop("report")
+    return {"files": len(aggregator.top_risky_counter), "response_mb": round(len(body) / 2 ** 20, 2)}
+
+
+async def _context_point(tools: str, stages: _Stages) -> Dict[str, Any]:
+    from app.utils.context_manager import context_manager
+
+    aggregator = await _aggregate(tools)
+    repo_url = "https://github.com/bench/synthetic"
+    top = sorted(aggregator.top_risky_counter.items(), key=lambda x: x[1], reverse=True)[:5]
+    data = {
+        "repoUrl": repo_url,
+        "vulnerabilities": {"total": aggregator.vuln_total, "files": aggregator.vuln_by_file},
+        "top_risky_files": [{"file": f, "issue_count": n} for f, n in top],
+    }
+    data = json.loads(json.dumps(data, default=str))  # As received from the client
+    stages.start()
+    await context_manager.update_context("security", data, "bench")
+    stages.stop("update")
+    await context_manager.get_relevant_context("Which files have the most vulnerabilities?", "bench", repo_url)
+    stages.stop("index")
+    await context_manager.get_relevant_context("Are there any leaked secrets?", "bench", repo_url)
+    stages.stop("search")
+    state = await context_manager._get_repo("bench", repo_url)
+    return {"context_chars": len(state.rendered or ""), "chunks": len(state.vector_store._chunks)}
+
+
+POINTS = {"code_quality": _code_quality_point, "sast": _sast_point, "context": _context_point}
+
+
+def run_point(subsystem: str, source: str, result_path: str) -> None:
+    """Child side: measure one point and write its result as JSON."""
+    # Import the app before measuring, so base_rss_mb covers the interpreter and its modules
+    import app.main  # noqa: F401
+
+    base_rss = _rss_mb()
+    stages = _Stages()
+    detail = asyncio.run(POINTS[subsystem](source, stages))
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"stages": stages.seconds, "detail": detail, "peak_rss_mb": _rss_mb(), "base_rss_mb": base_rss}, f)
+
+
+def _prepare(subsystem: str, size: int, work_dir: str) -> str:
+    """Build (or reuse) the synthetic input of one point."""
+    if subsystem == "code_quality":
+        repo = os.path.join(work_dir, "repos", f"files-{size}")
+        if not os.path.isdir(repo + ".checkout"):
+            shutil.rmtree(repo, ignore_errors=True)
+            build_synthetic(repo, RepoSpec(files=size), checkout=True)
+        return repo + ".checkout"
+    tools = os.path.join(work_dir, "tools", f"findings-{size}")
+    if not os.path.exists(os.path.join(tools, "pip-audit.json")):
+        repo = SyntheticRepo(RepoSpec(files=PATH_SPACE_FILES))
+        write_tool_outputs(tools, list(repo.paths()), size, repo.secrets())
+    return tools
+
+
+def measure(subsystems: List[str], sizes: Dict[str, List[int]], repeat: int, work_dir: str,
+            output: Optional[str]) -> List[Dict[str, Any]]:
+    rows = []
+    with StubServer("openai", {"latency_ms": 0, "embedding_latency_ms": 0}) as openai:
+        env = {**os.environ, "OPENAI_BASE_URL": f"{openai.url}/v1", "OPENAI_API_KEY": "sk-bench",
+               "SEMGREP_RULES_AUTO_REFRESH": "false"}
+        for subsystem in subsystems:
+            for size in sizes[subsystem]:
+                print(f"Preparing {subsystem} at {size}...", file=sys.stderr)
+                source = _prepare(subsystem, size, work_dir)
+                for run in range(repeat):
+                    data_dir = tempfile.mkdtemp(prefix="data-", dir=work_dir)
+                    result_path = os.path.join(data_dir, "result.json")
+                    try:
+                        subprocess.run(
+                            [sys.executable, "-m", "benchmarks.scaling", "--point", subsystem, source, result_path],
+                            env={**env, "DATA_DIR": data_dir}, cwd=os.path.dirname(os.path.dirname(__file__)),
+                            stdout=subprocess.DEVNULL, check=True
+                        )
+                        with open(result_path, encoding="utf-8") as f:
+                            result = json.load(f)
+                    finally:
+                        shutil.rmtree(data_dir, ignore_errors=True)
+                    for stage, seconds in result["stages"].items():
+                        rows.append({"subsystem": subsystem, "size": size, "run": run, "stage": stage,
+                                     "seconds": seconds, "peak_rss_mb": result["peak_rss_mb"],
+                                     "base_rss_mb": result["base_rss_mb"],
+                                     "detail": json.dumps(result["detail"], sort_keys=True)})
+                        print(f"{subsystem:<13} {size:>8} run {run}  {stage:<17} {seconds:>9.3f}s  "
+                              f"peak {result['peak_rss_mb']:>7.1f} MB", file=sys.stderr)
+    if output:
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
+
+
+def _sizes(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["--point"]:
+        run_point(*argv[1:4])
+        return
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scaling", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subsystem", action="append", choices=SUBSYSTEMS, help="Measure only these (repeatable)")
+    parser.add_argument("--files", type=_sizes, default=[1000, 10000, 100000], help="code_quality sizes")
+    parser.add_argument("--findings", type=_sizes, default=[1000, 10000, 50000], help="sast and context sizes")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--work-dir", help="Keep synthetic inputs here and reuse them across invocations")
+    parser.add_argument("--output", help="CSV file for the results")
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="reviewmate-scaling-")
+    os.makedirs(work_dir, exist_ok=True)
+    sizes = {"code_quality": args.files, "sast": args.findings, "context": args.findings}
+    try:
+        measure(args.subsystem or list(SUBSYSTEMS), sizes, args.repeat, work_dir, args.output)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
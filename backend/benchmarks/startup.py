@@ -0,0 +1,182 @@
+"""Cold-start benchmark: how long a fresh process takes to import the app and serve.
+
+Every run starts new interpreters (the OS file cache stays warm; the first run also
+writes any missing .pyc files, which makes it the "cold" figure):
+
+    import          `import app.main` in a plain interpreter
+    first_response  Spawning `uvicorn app.main:app` until GET / answers 200, which
+                    includes the interpreter, the import and the lifespan startup
+
+Each run also records which heavy SDKs (core/startup.py HEAVY_MODULES) were loaded
+by the import. They are meant to load on first use, so any listed here is reported
+and fails the run. The slowest imports of one extra `-X importtime` run are printed
+as a hint. Reports have the same layout as the end-to-end ones and are compared the
+same way.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --save-baseline startup
+    python -m benchmarks.startup --baseline startup
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from .baseline import compare, format_differences, format_summary, load_report, new_report, save_report, summarize
+from .stubs import BACKEND_DIR
+
+# Runs in the child; the last stdout line is the result, whatever the app prints before it
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - start
+from app.core.startup import HEAVY_MODULES
+print()
+print(json.dumps({"seconds": seconds, "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules]}))
+"""
+
+
+def _environment(data_dir: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "DATA_DIR": data_dir,
+        "PDF_CACHE_DIR": os.path.join(data_dir, "documents"),
+        "SECRETS_MIRROR_DIR": os.path.join(data_dir, "mirrors"),
+        "SEMGREP_RULES_DIR": os.environ.get("SEMGREP_RULES_DIR", os.path.join(data_dir, "semgrep-rules")),
+        "SEMGREP_RULES_AUTO_REFRESH": "false",
+        "OPENAI_API_KEY": "sk-bench",
+    }
+
+
+def measure_import(env: Dict[str, str]) -> Dict[str, Any]:
+    result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_first_response(env: Dict[str, str], timeout: float = 60) -> float:
+    """Seconds from spawning uvicorn to the first 200 from GET /."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(128)
+    url = f"http://127.0.0.1:{sock.getsockname()[1]}/"
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--fd", str(sock.fileno()), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, pass_fds=[sock.fileno()], stdout=subprocess.DEVNULL
+        )
+    finally:
+        sock.close()
+    try:
+        # Connections wait in the backlog until the server accepts; just retry until it answers
+        with httpx.Client(timeout=timeout) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {process.returncode} before serving")
+                try:
+                    if client.get(url).status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"No response from uvicorn within {timeout}s")
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def profile(env: Dict[str, str], top: int = 10) -> Dict[str, Any]:
+    from app.core.startup import parse_importtime
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=BACKEND_DIR,
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return parse_importtime(result.stderr, top=top)
+
+
+def run_startup(repeat: int) -> Dict[str, Any]:
+    """Measure `repeat` cold starts; returns {"cold_start": {"runs", "summary"}}."""
+    runs: List[Dict[str, Any]] = []
+    for _ in range(repeat):
+        data_dir = tempfile.mkdtemp(prefix="reviewmate-startup-")
+        try:
+            env = _environment(data_dir)
+            run = {"status": 200, "phases": {}, "upstream": {}}
+            try:
+                imported = measure_import(env)
+                run["phases"]["import"] = round(imported["seconds"], 4)
+                run["heavy_modules"] = imported["heavy_modules"]
+                run["phases"]["first_response"] = round(measure_first_response(env), 4)
+                if imported["heavy_modules"]:
+                    run["status"] = 0
+                    run["error"] = f"Imported at startup: {', '.join(imported['heavy_modules'])}"
+            except Exception as e:
+                run.update({"status": 0, "error": str(e)})
+            if run["status"] != 200:
+                print(f"cold_start: {run['error']}")
+            runs.append(run)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    return {"cold_start": {"runs": runs, "summary": summarize(runs)}}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description="Cold-start benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes to start (default 5)")
+    parser.add_argument("--no-profile", action="store_true", help="Skip the -X importtime summary")
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store the report as benchmarks/baselines/NAME.json")
+    parser.add_argument("--baseline", metavar="NAME_OR_PATH", help="Compare with a stored baseline or report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (default 0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Slowdowns below this many seconds never count (default 0.05)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = new_report({"benchmark": "startup", "repeat": args.repeat})
+    report["scenarios"] = run_startup(args.repeat)
+    print(format_summary(report))
+
+    if not args.no_profile:
+        data_dir = tempfile.mkdtemp(prefix="reviewmate-startup-")
+        try:
+            imports = profile(_environment(data_dir))
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        print("\nSlowest imports (-X importtime, cumulative): "
+              + ", ".join(f"{m['module']} {m['seconds']:.3f}s" for m in imports["top_cumulative"]))
+    if args.output:
+        save_report(report, args.output)
+    if args.save_baseline:
+        print(f"Baseline saved to {save_report(report, args.save_baseline)}")
+
+    failed = report["scenarios"]["cold_start"]["summary"]["errors"]
+    if args.baseline:
+        differences = compare(load_report(args.baseline), report, args.tolerance, args.min_delta)
+        print()
+        print(format_differences(differences))
+        regressions = [d for d in differences if d.regression]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
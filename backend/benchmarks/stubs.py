@@ -0,0 +1,346 @@
+"""Local stand-ins for the GitHub GraphQL API and the OpenAI API.
+
+Each stand-in is a small FastAPI app served by uvicorn in its own process, so its
+CPU time and memory never show up in the measurements of the app under test.
+
+GitHub (POST /graphql) answers the forks, contributors (commit history), issues and
+pull request queries the routers send. Every repository exists; its data is generated
+from a seed derived from owner/name, so the same repository always has the same forks,
+commits, issues and pull requests. Dates are relative to the current day so the
+"last year" and "last month" filters keep matching.
+
+OpenAI (/v1/chat/completions, /v1/embeddings) returns well-formed responses. Prompts
+listing "File: <path>" blocks (code quality batches) get one insight per file in the
+format the parser expects; other prompts get a fixed-length answer. Embeddings are
+deterministic unit vectors derived from the input text. stream=true is answered as
+server-sent events.
+
+Both count the requests they serve per operation at GET /_stats, which the harness
+diffs around each scenario.
+
+Run one directly with: python -m benchmarks.stubs github --port 9001
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+GITHUB_DEFAULTS = {
+    "latency_ms": 40.0,      # Added to every response
+    "page_size": 100,        # Upper bound on nodes per page, whatever `first` asks for
+    "forks": 25,
+    "commits": 450,
+    "contributors": 30,
+    "issues": 320,
+    "pull_requests": 140,
+}
+
+OPENAI_DEFAULTS = {
+    "latency_ms": 300.0,        # Time to the first byte of a completion
+    "ms_per_token": 0.0,        # Generation time per completion token
+    "answer_tokens": 120,       # Length of free-form answers
+    "embedding_latency_ms": 60.0,
+    "embedding_dim": 256,
+}
+
+ISO = "%Y-%m-%dT%H:%M:%SZ"
+RESOURCE_PATTERN = re.compile(r"\b(forks|history|issues|pullRequests)\(\s*first:\s*(\d+)")
+FILE_PATTERN = re.compile(r"^File: (.+)$", re.MULTILINE)
+WORDS = ("refactor", "module", "handler", "config", "error", "path", "retry", "token", "cache",
+         "request", "parse", "validate", "docstring", "complexity", "function", "branch")
+
+
+def _seed(*parts: Any) -> int:
+    return int.from_bytes(hashlib.blake2b("/".join(map(str, parts)).encode(), digest_size=8).digest(), "big")
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime(ISO)
+
+
+class RepositoryData:
+    """Deterministic GitHub data for one repository."""
+
+    def __init__(self, owner: str, name: str, config: Dict[str, Any]):
+        rng = random.Random(_seed(owner, name))
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        logins = [f"dev{i:03d}" for i in range(max(1, config["contributors"]))]
+        # A few prolific authors and a long tail, like real projects
+        weights = [1.0 / (rank + 1) for rank in range(len(logins))]
+
+        self.forks = [
+            {"owner": {"login": f"forker{i:04d}", "avatarUrl": f"https://avatars.example.com/u/{i}"},
+             "nameWithOwner": f"forker{i:04d}/{name}"}
+            for i in range(config["forks"])
+        ]
+        self.commits = []
+        for i in range(config["commits"]):
+            login = rng.choices(logins, weights)[0]
+            user = None if rng.random() < 0.05 else {"login": login, "avatarUrl": f"https://avatars.example.com/{login}"}
+            self.commits.append({"node": {"author": {"user": user, "name": login}}})
+        self.issues = []
+        for i in range(config["issues"]):
+            created = now - timedelta(days=rng.uniform(0, 420))
+            closed = created + timedelta(days=rng.uniform(0, 30)) if rng.random() < 0.6 else None
+            self.issues.append({
+                "number": config["issues"] - i,
+                "title": f"Issue {config['issues'] - i}: {' '.join(rng.sample(WORDS, 4))}",
+                "state": "CLOSED" if closed else "OPEN",
+                "createdAt": _iso(created),
+                "closedAt": _iso(closed) if closed else None,
+                "author": None if rng.random() < 0.03 else {"login": rng.choice(logins)},
+            })
+        self.issues.sort(key=lambda issue: issue["createdAt"], reverse=True)
+        self.pull_requests = []
+        for i in range(config["pull_requests"]):
+            created = now - timedelta(days=rng.uniform(0, 60))
+            state = rng.choices(["OPEN", "MERGED", "CLOSED"], [0.3, 0.6, 0.1])[0]
+            login = rng.choice(logins)
+            self.pull_requests.append({
+                "number": config["pull_requests"] - i,
+                "title": f"PR {config['pull_requests'] - i}: {' '.join(rng.sample(WORDS, 3))}",
+                "state": state,
+                "createdAt": _iso(created),
+                "mergedAt": _iso(created + timedelta(hours=rng.uniform(1, 72))) if state == "MERGED" else None,
+                "url": f"https://github.com/{owner}/{name}/pull/{config['pull_requests'] - i}",
+                "author": {"login": login, "avatarUrl": f"https://avatars.example.com/{login}"},
+            })
+        self.pull_requests.sort(key=lambda pr: pr["createdAt"], reverse=True)
+
+
+def _page(items: List[Dict[str, Any]], first: int, after: Optional[str], page_size: int) -> Dict[str, Any]:
+    start = int(after or 0)
+    end = min(len(items), start + min(first, page_size))
+    return {
+        "totalCount": len(items),
+        "pageInfo": {"hasNextPage": end < len(items), "endCursor": str(end)},
+        "nodes": items[start:end],
+    }
+
+
+def github_app(config: Dict[str, Any]) -> FastAPI:
+    """GitHub GraphQL stand-in."""
+    config = {**GITHUB_DEFAULTS, **config}
+    app = FastAPI()
+    stats: Counter = Counter()
+    repositories: Dict[str, RepositoryData] = {}
+
+    @app.get("/_stats")
+    async def get_stats():
+        return {"requests": dict(stats)}
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"message": "Bad credentials"}, status_code=401)
+        payload = await request.json()
+        variables = payload.get("variables") or {}
+        match = RESOURCE_PATTERN.search(payload.get("query", ""))
+        if not match:
+            stats["unknown"] += 1
+            return {"errors": [{"message": "Unsupported query"}]}
+        resource, first = match.group(1), int(match.group(2))
+        stats[resource] += 1
+        await asyncio.sleep(config["latency_ms"] / 1000)
+
+        key = f"{variables.get('owner')}/{variables.get('repo')}"
+        if key not in repositories:
+            repositories[key] = RepositoryData(variables.get("owner"), variables.get("repo"), config)
+        repo = repositories[key]
+        after = variables.get("after")
+        if resource == "forks":
+            page = _page(repo.forks, first, None, config["page_size"])
+            data = {"forks": {"totalCount": page["totalCount"], "nodes": page["nodes"]}}
+        elif resource == "history":
+            page = _page(repo.commits, first, after, config["page_size"])
+            history = {"pageInfo": page["pageInfo"], "edges": page["nodes"]}
+            data = {"defaultBranchRef": {"target": {"history": history}}}
+        elif resource == "issues":
+            data = {"issues": _page(repo.issues, first, after, config["page_size"])}
+        else:
+            data = {"pullRequests": _page(repo.pull_requests, first, after, config["page_size"])}
+        return {"data": {"repository": data}}
+
+    return app
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _completion_text(messages: List[Dict[str, Any]], config: Dict[str, Any], max_tokens: int) -> str:
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    files = FILE_PATTERN.findall(prompt)
+    if files:
+        return "\n".join(
+            f"File: {path}\n1. Summary: {path} mixes parsing and I/O in one function.\n"
+            f"2. Suggestion: Split the handler into smaller functions.\n"
+            f"2. Suggestion: Add docstrings to public functions.\n"
+            f"3. Before: result = handle(data)\nAfter: result = handle(parse(data))"
+            for path in files
+        )
+    rng = random.Random(_seed(prompt))
+    return " ".join(rng.choice(WORDS) for _ in range(min(max_tokens, config["answer_tokens"])))
+
+
+def openai_app(config: Dict[str, Any]) -> FastAPI:
+    """OpenAI API stand-in (chat completions and embeddings)."""
+    config = {**OPENAI_DEFAULTS, **config}
+    app = FastAPI()
+    stats: Counter = Counter()
+
+    @app.get("/_stats")
+    async def get_stats():
+        return {"requests": dict(stats)}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["chat.completions"] += 1
+        messages = body.get("messages", [])
+        text = _completion_text(messages, config, body.get("max_tokens") or 1000)
+        prompt_tokens = sum(_count_tokens(str(m.get("content", ""))) for m in messages)
+        completion_tokens = _count_tokens(text)
+        base = {"id": f"chatcmpl-{stats['chat.completions']}", "created": int(time.time()),
+                "model": body.get("model", "gpt-4")}
+        await asyncio.sleep(config["latency_ms"] / 1000)
+
+        if body.get("stream"):
+            async def events():
+                words = text.split(" ")
+                for i, word in enumerate(words):
+                    delta = {"content": word if i == 0 else " " + word}
+                    if i == 0:
+                        delta["role"] = "assistant"
+                    chunk = {**base, "object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(config["ms_per_token"] * completion_tokens / len(words) / 1000)
+                done = {**base, "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(config["ms_per_token"] * completion_tokens / 1000)
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        stats["embeddings"] += 1
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await asyncio.sleep(config["embedding_latency_ms"] / 1000)
+        data = []
+        for i, text in enumerate(texts):
+            vector = np.random.default_rng(_seed(text)).standard_normal(config["embedding_dim"])
+            vector /= np.linalg.norm(vector)
+            data.append({"object": "embedding", "index": i, "embedding": vector.round(6).tolist()})
+        tokens = sum(_count_tokens(str(t)) for t in texts)
+        return {"object": "list", "data": data, "model": body.get("model", ""),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    return app
+
+
+STUBS = {"github": github_app, "openai": openai_app}
+
+
+class StubServer:
+    """Runs a stand-in in a child process; use as a context manager.
+
+    The listening socket is bound here and handed to the child, so the port is known
+    up front and connections made before the child is ready simply wait in the backlog.
+    """
+
+    def __init__(self, kind: str, config: Optional[Dict[str, Any]] = None):
+        self.kind = kind
+        self.config = config or {}
+        self.port = 0
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "StubServer":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(2048)
+        self.port = sock.getsockname()[1]
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.stubs", self.kind,
+                 "--fd", str(sock.fileno()), "--config", json.dumps(self.config)],
+                cwd=BACKEND_DIR, pass_fds=[sock.fileno()]
+            )
+        finally:
+            sock.close()
+        try:
+            self.stats()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def stats(self) -> Counter:
+        """Requests served so far, per operation."""
+        response = httpx.get(f"{self.url}/_stats", timeout=30)
+        response.raise_for_status()
+        return Counter(response.json()["requests"])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a GitHub or OpenAI stand-in")
+    parser.add_argument("kind", choices=sorted(STUBS))
+    parser.add_argument("--config", default="{}", help="JSON object overriding the defaults")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--fd", type=int, help="Inherited listening socket")
+    args = parser.parse_args(argv)
+
+    app = STUBS[args.kind](json.loads(args.config))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+    if args.fd is not None:
+        server.run(sockets=[socket.socket(fileno=args.fd)])
+    else:
+        server.config.port = args.port or 9000
+        print(f"Serving the {args.kind} stand-in on http://127.0.0.1:{server.config.port} (pid {os.getpid()})")
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
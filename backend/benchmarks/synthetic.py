@@ -0,0 +1,526 @@
+"""Deterministic synthetic repositories and analyzer outputs for scaling tests.
+
+SyntheticRepo turns a RepoSpec into files: the same spec (including its seed) yields
+byte-identical trees on every machine and Python version, because every file is
+generated from its own RNG seeded with (seed, index). Nothing is kept in memory, so
+100k-file repositories stream straight into git fast-import (fixtures.build_repo).
+
+A spec controls:
+
+    files, languages      Number of files and language mix (python, javascript,
+                          typescript, go), e.g. {"python": 0.6, "go": 0.4}
+    max_depth             Directory depth of first-party files (1..max_depth)
+    mean_lines            Mean file length; lengths are log-normally distributed
+    vendored              Share of files under vendor/ and third_party/
+    generated             Share of generated files: half marked by name (_pb2.py,
+                          .min.js, .generated.ts, _gen.go), half by a header comment only
+    duplicates            Share of files that copy another file's code
+    todo_density          TODO comments per line
+    secrets               Secrets present at HEAD (AWS, GitHub, Slack, Stripe, generic)
+    history_secrets       Secrets committed and removed again in a second commit
+
+After commits() (or files()) has been consumed, expected() describes what was
+generated (counts per category, TODOs, every planted secret with file, line and rule)
+so analyzer output can be checked against it.
+
+Analyzer outputs in the formats the SAST pipeline parses are generated for any list
+of paths: semgrep_report(), gitleaks_report() (planted secrets first, then noise) and
+pip_audit_report(). Findings are spread over files with a Zipf-like skew, as in real
+scans where a few files collect most findings.
+
+    python -m benchmarks.synthetic repo /tmp/big --files 100000 --checkout
+    python -m benchmarks.synthetic tools /tmp/big-tools --findings 50000 --files 100000
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import string
+import subprocess
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+EXTENSIONS = {"python": ".py", "javascript": ".js", "typescript": ".ts", "go": ".go"}
+COMMENT = {"python": "#", "javascript": "//", "typescript": "//", "go": "//"}
+GENERATED_NAMES = {"python": "_pb2.py", "javascript": ".min.js", "typescript": ".generated.ts", "go": "_gen.go"}
+GENERATED_HEADERS = {
+    "python": "# Generated by the protocol buffer compiler.  DO NOT EDIT!",
+    "javascript": "// Code generated by webpack. DO NOT EDIT.",
+    "typescript": "// <auto-generated> This file was generated by openapi-generator.",
+    "go": "// Code generated by protoc-gen-go. DO NOT EDIT.",
+}
+DIRECTORIES = ("core", "api", "services", "utils", "models", "handlers", "common", "internal",
+               "lib", "pkg", "controllers", "storage", "auth", "billing", "search", "jobs", "tests")
+STEMS = ("handler", "service", "client", "model", "router", "parser", "cache", "worker",
+         "config", "helpers", "views", "schema", "store", "adapter", "metrics", "session")
+VENDOR_LIBS = ("leftpad", "yaml", "protobuf", "jquery", "lodash", "six", "idna", "chardet")
+WORDS = ("total", "count", "limit", "score", "weight", "price", "size", "offset", "depth", "retries")
+TODO_NOTES = ("handle the empty case", "remove after the migration", "add retries",
+              "cache this lookup", "validate input", "split this function")
+SECRET_KINDS = ("aws-access-token", "github-pat", "slack-bot-token", "stripe-access-token", "generic-api-key")
+PACKAGES = ("flask", "django", "requests", "urllib3", "jinja2", "pyyaml", "pillow", "cryptography",
+            "werkzeug", "sqlalchemy", "numpy", "lxml", "paramiko", "aiohttp", "certifi", "idna")
+SEMGREP_RULES = (
+    ("python.lang.security.audit.eval-detected", "ERROR", "Detected the use of eval()."),
+    ("python.lang.security.audit.subprocess-shell-true", "ERROR", "subprocess call with shell=True."),
+    ("javascript.browser.security.insecure-document-method", "WARNING", "User input reaches innerHTML."),
+    ("generic.secrets.security.detected-generic-secret", "WARNING", "Generic secret detected."),
+    ("python.lang.maintainability.useless-ifelse", "INFO", "Both branches are identical."),
+    ("typescript.react.security.audit.react-dangerouslysetinnerhtml", "ERROR", "dangerouslySetInnerHTML used."),
+)
+
+
+@dataclass
+class RepoSpec:
+    files: int = 1000
+    languages: Dict[str, float] = field(default_factory=lambda: {"python": 0.5, "javascript": 0.3, "typescript": 0.2})
+    max_depth: int = 4
+    mean_lines: int = 60
+    vendored: float = 0.1
+    generated: float = 0.05
+    duplicates: float = 0.05
+    todo_density: float = 0.01
+    secrets: int = 10
+    history_secrets: int = 5
+    seed: int = 0
+
+
+def _rng(*parts: Any) -> random.Random:
+    # String seeds are hashed with SHA-512, so streams do not depend on PYTHONHASHSEED
+    return random.Random(":".join(map(str, parts)))
+
+
+def _token(rng: random.Random, alphabet: str, length: int) -> str:
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def _secret(rng: random.Random, kind: str) -> Tuple[str, str]:
+    """(variable name, value) for a secret that Gitleaks' default rules match."""
+    alnum = string.ascii_letters + string.digits
+    if kind == "aws-access-token":
+        return "AWS_ACCESS_KEY_ID", "AKIA" + _token(rng, string.ascii_uppercase + "234567", 16)
+    if kind == "github-pat":
+        return "GITHUB_TOKEN", "ghp_" + _token(rng, alnum, 36)
+    if kind == "slack-bot-token":
+        return "SLACK_BOT_TOKEN", f"xoxb-{_token(rng, string.digits, 12)}-{_token(rng, string.digits, 13)}-{_token(rng, alnum, 24)}"
+    if kind == "stripe-access-token":
+        return "STRIPE_SECRET_KEY", "sk_live_" + _token(rng, alnum, 24)
+    return "API_KEY", _token(rng, "0123456789abcdef", 32)
+
+
+OPERATORS = ("+", "-", "*", "/", "%")
+COMPARISONS = (">", "<", ">=", "<=", "==", "!=")
+INDENT = {"python": "    ", "javascript": "  ", "typescript": "  ", "go": "\t"}
+
+
+def _expr(rng: random.Random, language: str, depth: int = 0) -> str:
+    """A random expression; shapes (not just names) vary, so normalized token streams differ."""
+    roll = rng.random()
+    if depth > 1 or roll < 0.3:
+        return rng.choice(WORDS) if rng.random() < 0.6 else str(rng.randint(0, 99))
+    if roll < 0.5:
+        field_name = rng.choice(WORDS)
+        return f"item.{field_name.title() if language == 'go' else field_name}"
+    if roll < 0.75:
+        return f"{_expr(rng, language, depth + 1)} {rng.choice(OPERATORS)} {_expr(rng, language, depth + 1)}"
+    args = ", ".join(_expr(rng, language, depth + 1) for _ in range(rng.randint(0, 3)))
+    return f"{rng.choice(WORDS)}{rng.choice(STEMS).title()}({args})"
+
+
+def _statements(rng: random.Random, language: str, depth: int, count: int) -> List[str]:
+    """count random statements (assignments, guards, loops, appends, calls, error handling)."""
+    pad = INDENT[language] * depth
+    end = "" if language in ("python", "go") else ";"
+    lines = []
+    for _ in range(count):
+        kind = rng.choice(("assign", "accumulate", "guard", "loop", "collect", "call", "try") if depth < 4
+                          else ("assign", "accumulate", "collect", "call"))
+        if kind == "assign":
+            assign = ":=" if language == "go" else "="
+            lines.append(f"{pad}{rng.choice(WORDS)}{rng.randint(0, 9)} {assign} {_expr(rng, language)}{end}")
+        elif kind == "accumulate":
+            lines.append(f"{pad}total {rng.choice(OPERATORS)}= {_expr(rng, language)}{end}")
+        elif kind == "collect":
+            value = _expr(rng, language)
+            lines.append(f"{pad}out = append(out, {value})" if language == "go"
+                         else f"{pad}out.{'append' if language == 'python' else 'push'}({value}){end}")
+        elif kind == "call":
+            lines.append(f"{pad}{rng.choice(WORDS)}{rng.choice(STEMS).title()}"
+                         f"({', '.join(_expr(rng, language, 1) for _ in range(rng.randint(1, 3)))}){end}")
+        else:
+            condition = f"{_expr(rng, language, 1)} {rng.choice(COMPARISONS)} {_expr(rng, language, 1)}"
+            inner = _statements(rng, language, depth + 1, rng.randint(1, 3))
+            if kind == "guard":
+                inner = inner + [f"{pad}{INDENT[language]}return {_expr(rng, language)}{end}"]
+            if language == "python":
+                opener = {"guard": f"if {condition}:", "loop": "for item in items:", "try": "try:"}[kind]
+                lines += [f"{pad}{opener}"] + inner
+                if kind == "try":
+                    lines += [f"{pad}except {rng.choice(('ValueError', 'KeyError', 'TypeError'))}:",
+                              f"{pad}{INDENT[language]}{rng.choice(('pass', 'total = 0'))}"]
+            elif language == "go":
+                opener = {"guard": f"if {condition} {{", "loop": "for _, item := range items {",
+                          "try": f"if err := {rng.choice(WORDS)}{rng.choice(STEMS).title()}(item); err != nil {{"}[kind]
+                lines += [f"{pad}{opener}"] + inner + [f"{pad}}}"]
+            else:
+                opener = {"guard": f"if ({condition}) {{", "loop": "for (const item of items) {", "try": "try {"}[kind]
+                lines += [f"{pad}{opener}"] + inner
+                if kind == "try":
+                    lines += [f"{pad}}} catch (err) {{", f"{pad}{INDENT[language]}total = 0;"]
+                lines.append(f"{pad}}}")
+    return lines
+
+
+def _function(rng: random.Random, language: str, name: str) -> List[str]:
+    """One function of 2-6 random statements, so size, structure and complexity vary."""
+    a = rng.choice(WORDS)
+    limit = rng.randint(1, 500)
+    body = _statements(rng, language, 1, rng.randint(2, 6))
+    if language == "python":
+        lines = [f"def {name}(items, limit={limit}):"]
+        if rng.random() < 0.7:
+            lines.append(f'    """Return the {a} of items above limit."""')
+        return lines + ["    total = 0", "    out = []"] + body + ["    return total", ""]
+    if language == "go":
+        exported = name[0].upper() + name[1:]
+        lines = [f"// {exported} returns the {a} of items above limit."] if rng.random() < 0.7 else []
+        lines += [f"func {exported}(items []Item, limit int) int {{", "\ttotal := 0", "\tvar out []int"]
+        return lines + body + ["\treturn total", "}", ""]
+    signature = f"(items: Item[], limit: number = {limit}): number" if language == "typescript" else f"(items, limit = {limit})"
+    lines = [f"/** Return the {a} of items above limit. */"] if rng.random() < 0.7 else []
+    lines += [f"export function {name}{signature} {{", "  let total = 0;", "  const out = [];"]
+    return lines + body + ["  return total;", "}", ""]
+
+
+def _preamble(language: str, module: str) -> List[str]:
+    if language == "python":
+        return [f'"""{module} module."""', "import json", "import os", ""]
+    if language == "go":
+        return [f"package {module}", "", "type Item struct {", "\tTotal, Count, Limit, Score, Weight int",
+                "\tPrice, Size, Offset, Depth, Retries int", "}", ""]
+    if language == "typescript":
+        return [f"// {module} module", "export interface Item { [field: string]: number }", ""]
+    return [f"// {module} module", '"use strict";', ""]
+
+
+@dataclass
+class _Plan:
+    index: int
+    path: str
+    language: str
+    category: str          # "source", "vendored", "generated", "generated_header" or "duplicate"
+    source: Optional[int]  # File copied by a duplicate
+
+
+class SyntheticRepo:
+    """Files, commits and ground truth for a RepoSpec."""
+
+    def __init__(self, spec: RepoSpec):
+        self.spec = spec
+        total = sum(spec.languages.values())
+        self._languages = list(spec.languages)
+        self._cum_weights = list(itertools.accumulate(w / total for w in spec.languages.values()))
+        self._secrets: Dict[int, List[Dict[str, Any]]] = {}
+        self.stats: Dict[str, Any] = {}
+        self._plan_secrets()
+
+    def plan(self, index: int) -> _Plan:
+        """Path, language and category of file `index`, without generating its content."""
+        spec = self.spec
+        rng = _rng(spec.seed, "plan", index)
+        language = rng.choices(self._languages, cum_weights=self._cum_weights)[0]
+        ext = EXTENSIONS[language]
+        roll = rng.random()
+        stem = f"{rng.choice(STEMS)}_{index:06d}"
+        if roll < spec.vendored:
+            lib = f"{rng.choice(VENDOR_LIBS)}{rng.randint(1, 20)}"
+            dirs = [rng.choice(("vendor", "third_party")), lib] + [rng.choice(DIRECTORIES) for _ in range(rng.randint(0, 2))]
+            return _Plan(index, "/".join(dirs + [stem + ext]), language, "vendored", None)
+        dirs = [rng.choice(DIRECTORIES) for _ in range(rng.randint(1, max(1, spec.max_depth)))]
+        roll -= spec.vendored
+        if roll < spec.generated:
+            if rng.random() < 0.5:
+                name = stem + GENERATED_NAMES[language]
+                return _Plan(index, "/".join(dirs + [name]), language, "generated", None)
+            return _Plan(index, "/".join(dirs + [stem + ext]), language, "generated_header", None)
+        roll -= spec.generated
+        if roll < spec.duplicates and index > 0:
+            source = self.plan(rng.randrange(index))
+            if source.category == "source":
+                # Copies keep the language of the file they copy
+                return _Plan(index, "/".join(dirs + [stem + EXTENSIONS[source.language]]),
+                             source.language, "duplicate", source.index)
+        return _Plan(index, "/".join(dirs + [stem + ext]), language, "source", None)
+
+    def paths(self) -> Iterator[str]:
+        for index in range(self.spec.files):
+            yield self.plan(index).path
+
+    def _plan_secrets(self) -> None:
+        spec = self.spec
+        rng = _rng(spec.seed, "secrets")
+        wanted = spec.secrets + spec.history_secrets
+        candidates = []
+        # Secrets go into first-party source files, the ones real leaks end up in
+        for index in rng.sample(range(spec.files), min(spec.files, wanted * 4 + 16)):
+            if self.plan(index).category == "source":
+                candidates.append(index)
+            if len(candidates) == wanted:
+                break
+        for n, index in enumerate(candidates):
+            kind = SECRET_KINDS[n % len(SECRET_KINDS)]
+            name, value = _secret(_rng(spec.seed, "secret", n), kind)
+            self._secrets.setdefault(index, []).append(
+                {"rule": kind, "name": name, "value": value, "removed": n >= spec.secrets}
+            )
+
+    def _body(self, plan: _Plan) -> List[str]:
+        """Code lines of a file, before headers, TODOs and secrets."""
+        rng = _rng(self.spec.seed, "body", plan.index)
+        target = max(5, min(20 * self.spec.mean_lines,
+                            int(rng.lognormvariate(math.log(self.spec.mean_lines), 0.6))))
+        module = plan.path.rsplit("/", 1)[-1].split(".")[0]
+        lines = _preamble(plan.language, module if plan.language != "go" else plan.path.split("/")[-2])
+        n = 0
+        while len(lines) < target:
+            lines += _function(rng, plan.language, f"{rng.choice(WORDS)}{rng.choice(STEMS).title()}{n}")
+            n += 1
+        return lines
+
+    def render(self, index: int, include_removed: bool = True) -> Tuple[str, str]:
+        """(path, content) of file `index`; include_removed keeps history-only secrets."""
+        plan = self.plan(index)
+        if plan.category == "duplicate":
+            lines = self._body(self.plan(plan.source))
+            lines[0] = f"{COMMENT[plan.language]} Copied from {self.plan(plan.source).path}"
+        else:
+            lines = self._body(plan)
+        if plan.category == "generated_header":
+            lines.insert(0, GENERATED_HEADERS[plan.language])
+
+        rng = _rng(self.spec.seed, "todo", index)
+        comment = COMMENT[plan.language]
+        out = []
+        for line in lines:
+            if line.strip() and rng.random() < self.spec.todo_density:
+                indent = line[:len(line) - len(line.lstrip())]
+                out.append(f"{indent}{comment} TODO: {rng.choice(TODO_NOTES)}")
+            out.append(line)
+
+        # Secrets are module-level assignments right after the first line; the ones
+        # that stay come first, so their line numbers are the same in both commits
+        for offset, secret in enumerate(s for s in self._secrets.get(index, []) if include_removed or not s["removed"]):
+            if plan.language == "python":
+                statement = f'{secret["name"]} = "{secret["value"]}"'
+            elif plan.language == "go":
+                statement = f'const {secret["name"].title().replace("_", "")} = "{secret["value"]}"'
+            else:
+                statement = f'const {secret["name"]} = "{secret["value"]}";'
+            out.insert(1 + offset, statement)
+            secret["line"] = 2 + offset
+        return plan.path, "\n".join(out) + "\n"
+
+    def manifests(self) -> Dict[str, str]:
+        """Root dependency manifests pinning dated releases, so audits have findings."""
+        rng = _rng(self.spec.seed, "manifests")
+        requirements = "".join(f"{pkg}=={rng.randint(0, 3)}.{rng.randint(0, 12)}.{rng.randint(0, 9)}\n"
+                               for pkg in sorted(rng.sample(PACKAGES, 10)))
+        dependencies = {name: f"{rng.randint(0, 4)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}"
+                        for name in sorted(rng.sample(VENDOR_LIBS, 5))}
+        package = json.dumps({"name": "synthetic", "version": "1.0.0", "dependencies": dependencies}, indent=2)
+        return {"requirements.txt": requirements, "package.json": package + "\n"}
+
+    def files(self, include_removed: bool = True) -> Iterator[Tuple[str, str]]:
+        """Every file at the first commit (or HEAD with include_removed=False); fills stats."""
+        stats = {"files": 0, "bytes": 0, "lines": 0, "todos": 0,
+                 "by_category": {}, "by_language": {}}
+        for name, content in self.manifests().items():
+            stats["files"] += 1
+            stats["bytes"] += len(content)
+            yield name, content
+        for index in range(self.spec.files):
+            plan = self.plan(index)
+            path, content = self.render(index, include_removed)
+            stats["files"] += 1
+            stats["bytes"] += len(content.encode())
+            stats["lines"] += content.count("\n")
+            stats["todos"] += content.count(f"{COMMENT[plan.language]} TODO:")
+            stats["by_category"][plan.category] = stats["by_category"].get(plan.category, 0) + 1
+            stats["by_language"][plan.language] = stats["by_language"].get(plan.language, 0) + 1
+            yield path, content
+        self.stats = stats
+
+    def commits(self) -> List[Any]:
+        """The full tree, then (with history_secrets) a commit removing those secrets."""
+        commits: List[Any] = [self.files()]
+        removed = sorted({i for i, secrets in self._secrets.items() if any(s["removed"] for s in secrets)})
+        if removed:
+            commits.append(self.render(i, include_removed=False) for i in removed)
+        return commits
+
+    def secrets(self) -> List[Dict[str, Any]]:
+        """Planted secrets with path, line, rule and whether HEAD still has them."""
+        out = []
+        for index, secrets in sorted(self._secrets.items()):
+            path = self.plan(index).path
+            for s in secrets:
+                line = s.get("line")
+                if line is None:
+                    self.render(index)
+                    line = s["line"]
+                out.append({"file": path, "line": line, "rule": s["rule"], "secret": s["value"],
+                            "at_head": not s["removed"]})
+        return out
+
+    def expected(self) -> Dict[str, Any]:
+        """Spec, generation stats (once files() was consumed) and planted secrets."""
+        return {"spec": asdict(self.spec), "stats": self.stats, "secrets": self.secrets()}
+
+
+def _skewed(rng: random.Random, paths: Sequence[str], count: int) -> List[str]:
+    """count paths drawn with a Zipf-like skew over a shuffled order."""
+    order = list(paths)
+    rng.shuffle(order)
+    weights = list(itertools.accumulate(1.0 / (rank + 1) ** 0.8 for rank in range(len(order))))
+    return rng.choices(order, cum_weights=weights, k=count)
+
+
+def semgrep_report(paths: Sequence[str], count: int, seed: int = 0) -> Dict[str, Any]:
+    """Semgrep --json output with count results over paths."""
+    rng = _rng(seed, "semgrep")
+    results = []
+    for path in _skewed(rng, paths, count):
+        rule, severity, message = rng.choice(SEMGREP_RULES)
+        line = rng.randint(1, 400)
+        results.append({
+            "check_id": rule,
+            "path": path,
+            "start": {"line": line, "col": 5, "offset": line * 40},
+            "end": {"line": line, "col": 60, "offset": line * 40 + 55},
+            "extra": {"message": message, "severity": severity, "lines": "requires login",
+                      "metadata": {"category": "security", "confidence": "MEDIUM"},
+                      "fingerprint": f"{rng.getrandbits(64):016x}"},
+        })
+    return {"version": "1.60.0", "results": results, "errors": [], "paths": {"scanned": list(paths[:100])}}
+
+
+def gitleaks_report(paths: Sequence[str], count: int, secrets: Sequence[Dict[str, Any]] = (),
+                    seed: int = 0) -> List[Dict[str, Any]]:
+    """Gitleaks JSON report: the given planted secrets, then noise up to count leaks."""
+    rng = _rng(seed, "gitleaks")
+    leaks = []
+    noise = _skewed(rng, paths, max(0, count - len(secrets)))
+    entries = [(s["file"], s["line"], s["rule"], s["secret"]) for s in secrets[:count]]
+    entries += [(path, rng.randint(1, 400), rng.choice(SECRET_KINDS), _token(rng, string.ascii_letters, 32))
+                for path in noise]
+    for path, line, rule, secret in entries:
+        commit = f"{rng.getrandbits(160):040x}"
+        leaks.append({
+            "Description": rule.replace("-", " ").title(), "StartLine": line, "EndLine": line,
+            "StartColumn": 1, "EndColumn": 80, "Match": f'KEY = "{secret}"', "Secret": secret,
+            "File": path, "SymlinkFile": "", "Commit": commit, "Entropy": 4.5,
+            "Author": "Bench Author", "Email": "bench@example.com", "Date": "2024-01-01T00:00:00Z",
+            "Message": "Fixture commit 1", "Tags": [], "RuleID": rule,
+            "Fingerprint": f"{commit}:{path}:{rule}:{line}",
+        })
+    return leaks
+
+
+def pip_audit_report(count: int, seed: int = 0) -> Dict[str, Any]:
+    """pip-audit -f json output with count vulnerabilities spread over dependencies."""
+    rng = _rng(seed, "pip-audit")
+    dependencies = []
+    remaining = count
+    n = 0
+    while remaining > 0:
+        vulns = [{"id": f"PYSEC-2024-{rng.randint(1, 99999)}", "fix_versions": [f"{rng.randint(1, 9)}.0.0"],
+                  "aliases": [f"CVE-2024-{rng.randint(1000, 99999)}"], "description": "Synthetic advisory."}
+                 for _ in range(min(remaining, rng.randint(1, 8)))]
+        remaining -= len(vulns)
+        dependencies.append({"name": f"{PACKAGES[n % len(PACKAGES)]}-{n // len(PACKAGES)}",
+                             "version": f"{rng.randint(0, 3)}.{rng.randint(0, 12)}.0", "vulns": vulns})
+        n += 1
+    return {"dependencies": dependencies, "fixes": []}
+
+
+def write_tool_outputs(dest: str, paths: Sequence[str], findings: int,
+                       secrets: Sequence[Dict[str, Any]] = (), seed: int = 0) -> Dict[str, str]:
+    """Write semgrep.json, gitleaks.json and pip-audit.json with `findings` entries each."""
+    os.makedirs(dest, exist_ok=True)
+    reports = {
+        "semgrep": semgrep_report(paths, findings, seed),
+        "gitleaks": gitleaks_report(paths, findings, secrets, seed),
+        "pip-audit": pip_audit_report(findings, seed),
+    }
+    written = {}
+    for tool, report in reports.items():
+        written[tool] = os.path.join(dest, f"{tool}.json")
+        with open(written[tool], "w", encoding="utf-8") as f:
+            json.dump(report, f)
+    return written
+
+
+def build_synthetic(dest: str, spec: RepoSpec, checkout: bool = False) -> Dict[str, Any]:
+    """Build a bare repository at dest (plus dest + ".checkout" if asked) and write
+    dest + ".expected.json"; returns the ground truth."""
+    from .fixtures import build_repo
+
+    repo = SyntheticRepo(spec)
+    build_repo(dest, repo.commits())
+    expected = repo.expected()
+    if checkout:
+        subprocess.run(["git", "clone", "--quiet", dest, dest + ".checkout"], check=True)
+    with open(dest + ".expected.json", "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=2)
+    return expected
+
+
+def _languages(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in EXTENSIONS:
+            raise argparse.ArgumentTypeError(f"unknown language {name!r}; choose from {', '.join(EXTENSIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    defaults = RepoSpec()
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("repo", "tools"):
+        sub = commands.add_parser(name)
+        sub.add_argument("dest")
+        sub.add_argument("--files", type=int, default=defaults.files)
+        sub.add_argument("--languages", type=_languages, default=defaults.languages,
+                         help="Language mix, e.g. python=0.6,javascript=0.3,go=0.1")
+        sub.add_argument("--seed", type=int, default=defaults.seed)
+        for option in ("vendored", "generated", "duplicates", "todo_density"):
+            sub.add_argument(f"--{option.replace('_', '-')}", type=float, default=getattr(defaults, option))
+        for option in ("max_depth", "mean_lines", "secrets", "history_secrets"):
+            sub.add_argument(f"--{option.replace('_', '-')}", type=int, default=getattr(defaults, option))
+        if name == "repo":
+            sub.add_argument("--checkout", action="store_true", help="Also clone a working tree next to it")
+        else:
+            sub.add_argument("--findings", type=int, default=10000, help="Entries per report")
+    args = parser.parse_args(argv)
+
+    spec = RepoSpec(files=args.files, languages=args.languages, max_depth=args.max_depth,
+                    mean_lines=args.mean_lines, vendored=args.vendored, generated=args.generated,
+                    duplicates=args.duplicates, todo_density=args.todo_density, secrets=args.secrets,
+                    history_secrets=args.history_secrets, seed=args.seed)
+    if args.command == "repo":
+        expected = build_synthetic(args.dest, spec, args.checkout)
+        print(json.dumps(expected["stats"], indent=2))
+    else:
+        repo = SyntheticRepo(spec)
+        for tool, path in write_tool_outputs(args.dest, list(repo.paths()), args.findings,
+                                             repo.secrets(), spec.seed).items():
+            print(f"{tool}: {path}")
+
+
+if __name__ == "__main__":
+    main()
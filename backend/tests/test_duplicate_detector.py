@@ -0,0 +1,40 @@
+from app.utils.duplicate_detector import DocumentSpan, DuplicateIndex, find_duplicates, normalize_tokens, shingle_hashes
+
+LICENSE_HEADER = "\n".join(
+    f"# Copyright line {n}: permission is hereby granted, free of charge, to any person obtaining a copy"
+    for n in range(5)
+)
+BODY = "\n".join(
+    f"def handler_{n}(request, value):\n    if value > {n}:\n        return request.get('key_{n}', value) * {n}\n    return None"
+    for n in range(8)
+)
+
+
+def test_identical_blocks_are_sampled_not_compared_all_against_all():
+    hashes = shingle_hashes([t for t, _ in normalize_tokens(BODY)])
+    index = DuplicateIndex(max_bucket=20)
+    for n in range(2000):
+        index.add(DocumentSpan(f"vendor/copy_{n}.py", 1, 20), hashes)
+
+    pairs = list(index.candidate_pairs())
+
+    # All-against-all would be about 2 million pairs; the window allows max_bucket per member
+    assert index.capped_buckets == index.bands
+    assert len(pairs) <= 2000 * index.max_bucket
+    assert all(0 < j - i <= index.max_bucket for i, j, _ in pairs)
+    # The window chains every copy to the next, so no copy is lost
+    assert {i for pair in pairs for i in pair[:2]} == set(range(2000))
+
+
+def test_many_identical_files_still_form_one_group(tmp_path):
+    paths = []
+    for n in range(300):
+        path = f"generated/module_{n}.py"
+        (tmp_path / "generated").mkdir(exist_ok=True)
+        (tmp_path / path).write_text(LICENSE_HEADER + "\n" + BODY + "\n")
+        paths.append(path)
+
+    result = find_duplicates(str(tmp_path), paths, DuplicateIndex(max_bucket=10))
+
+    assert result["duplicate_files"] == sorted(paths)
+    assert len(result["duplicate_groups"]) == 1
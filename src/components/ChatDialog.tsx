@@ -12,6 +12,7 @@ import {
 import SendIcon from '@mui/icons-material/Send';
 import CloseIcon from '@mui/icons-material/Close';
 import { PRIMARY_COLOR, SECONDARY_COLOR } from './colors';
+import config from '../config';
 
 interface Message {
   role: 'user' | 'assistant';
@@ -27,6 +28,7 @@ export default function ChatDialog({ open, onClose }: ChatDialogProps) {
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [conversationId, setConversationId] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const scrollToBottom = () => {
@@ -49,23 +51,74 @@ export default function ChatDialog({ open, onClose }: ChatDialogProps) {
     setIsLoading(true);
 
     try {
-      const response = await fetch('http://localhost:8000/api/v1/chatbot/chat', {
+      const response = await fetch('http://localhost:8000/api/v1/chatbot/chat/stream', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Accept': 'text/event-stream',
           'Authorization': `Bearer ${localStorage.getItem('authToken') || sessionStorage.getItem('authToken')}`,
         },
         body: JSON.stringify({
-          question: input.trim()
+          question: input.trim(),
+          conversation_id: conversationId || undefined,
+          repo_url: localStorage.getItem(config.STORAGE_KEYS.REPO_URL) || undefined
         }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to get response');
       }
 
-      const data = await response.json();
-      setMessages(prev => [...prev, { role: 'assistant', content: data.answer || data.message || data.reply }]);
+      // Read server-sent events and append tokens to the answer as they arrive
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let started = false;
+
+      const appendToAnswer = (text: string) => {
+        if (!started) {
+          started = true;
+          setMessages(prev => [...prev, { role: 'assistant', content: text }]);
+          return;
+        }
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+        });
+      };
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const rawEvent = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          let event = 'message';
+          let data = '';
+          for (const line of rawEvent.split('\n')) {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+          }
+          if (!data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === 'token') {
+            appendToAnswer(payload.content);
+          } else if (event === 'done') {
+            setConversationId(payload.conversation_id);
+          } else if (event === 'error') {
+            throw new Error(payload.detail || 'Streaming failed');
+          }
+        }
+      }
+
+      if (!started) {
+        throw new Error('Empty response');
+      }
     } catch (error) {
       console.error('Error:', error);
       setMessages(prev => [...prev, { 
@@ -165,7 +218,7 @@ export default function ChatDialog({ open, onClose }: ChatDialogProps) {
             </Paper>
           </Box>
         ))}
-        {isLoading && (
+        {isLoading && messages[messages.length - 1]?.role !== 'assistant' && (
           <Box sx={{ alignSelf: 'flex-start', p: 1 }}>
             <CircularProgress size={20} />
           </Box>